@@ -1,3 +1,4 @@
+import asyncio
 import sys
 from pathlib import Path
 
@@ -5,28 +6,33 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from logging.config import fileConfig
-from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.engine import Connection
 from alembic import context
 
 # ВАЖНО: импортируйте Base из ваших моделей
 from app.models.models import Base  # ← путь к вашим моделям!
+from app.models.engine import DATABASE_URL, create_engine
 
 # this is the Alembic Config object
 config = context.config
 
 # Interpret the config file for Python logging.
-if config.config_file_name is not None:
+# app.cli вызывает alembic из настроенного приложения - его логи не трогаем
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # ВАЖНО: установите target_metadata
 target_metadata = Base.metadata  # ← эта строка обязательна!
 
+# База та же, что у приложения: DATABASE_URL или database/soveshchayka.db
+# (app/models/engine.py); sqlalchemy.url из alembic.ini не используется
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
-    url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url,
+        url=DATABASE_URL,
         target_metadata=target_metadata,  # ← передаем metadata
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
@@ -36,25 +42,32 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
-def run_migrations_online() -> None:
-    """Run migrations in 'online' mode."""
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection, 
+        target_metadata=target_metadata  # ← передаем metadata
     )
 
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, 
-            target_metadata=target_metadata  # ← передаем metadata
-        )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """Тот же движок, что у приложения (aiosqlite или asyncpg), но без пула"""
+    connectable = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
 
-        with context.begin_transaction():
-            context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode."""
+    asyncio.run(run_async_migrations())
 
 
 if context.is_offline_mode():
     run_migrations_offline()
 else:
-    run_migrations_online()
\ No newline at end of file
+    run_migrations_online()
@@ -0,0 +1,32 @@
+"""Booking indexes
+
+Revision ID: 5d2f8a91c3e7
+Revises: 197c7b3a4b52
+Create Date: 2026-10-18 10:12:03.418825
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8a91c3e7'
+down_revision: Union[str, Sequence[str], None] = '197c7b3a4b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_bookings_room_date_time', 'bookings', ['room_id', 'date', 'start_time', 'end_time'], unique=False)
+    op.create_index('ix_bookings_user_date', 'bookings', ['user_id', 'date'], unique=False)
+    op.create_index('ix_bookings_date', 'bookings', ['date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_date', table_name='bookings')
+    op.drop_index('ix_bookings_user_date', table_name='bookings')
+    op.drop_index('ix_bookings_room_date_time', table_name='bookings')
@@ -0,0 +1,113 @@
+"""Booking times as minutes since midnight
+
+Revision ID: a7c41e0b9d26
+Revises: 5d2f8a91c3e7
+Create Date: 2026-10-18 11:40:27.102934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c41e0b9d26'
+down_revision: Union[str, Sequence[str], None] = '5d2f8a91c3e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+bookings = sa.table(
+    'bookings',
+    sa.column('id', sa.String),
+    sa.column('start_time', sa.String),
+    sa.column('end_time', sa.String),
+    sa.column('start_minute', sa.Integer),
+    sa.column('end_minute', sa.Integer),
+)
+
+
+def _to_minutes(value: str) -> int:
+    """"HH:MM", "H:MM" или "H" -> минуты; None, если значение не время суток"""
+    hours, _, minutes = (value or '').strip().partition(':')
+    minutes = minutes or '0'
+    if not hours.isdigit() or not minutes.isdigit() or int(minutes) >= 60:
+        return None
+    total = int(hours) * 60 + int(minutes)
+    return total if total <= 24 * 60 else None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('bookings', sa.Column('start_minute', sa.Integer(), nullable=True))
+    op.add_column('bookings', sa.Column('end_minute', sa.Integer(), nullable=True))
+
+    # Переносим "HH:MM" -> минуты (в т.ч. кривые значения вида "9:00");
+    # в режиме --sql строк нет, переносить нечего
+    conn = op.get_bind()
+    rows = [] if op.get_context().as_sql else conn.execute(
+        sa.select(bookings.c.id, bookings.c.start_time, bookings.c.end_time)
+    ).fetchall()
+    values = [
+        {'b_id': row.id, 'b_start': _to_minutes(row.start_time), 'b_end': _to_minutes(row.end_time)}
+        for row in rows
+    ]
+    # Колонки станут NOT NULL - неразобранное время нужно исправить до миграции
+    invalid = [
+        f"{row.id} ({row.start_time!r}-{row.end_time!r})"
+        for row, value in zip(rows, values) if value['b_start'] is None or value['b_end'] is None
+    ]
+    if invalid:
+        raise RuntimeError(
+            "Cannot convert booking times to minutes, fix start_time/end_time (HH:MM) "
+            f"and rerun: {', '.join(invalid)}"
+        )
+    if values:
+        conn.execute(
+            bookings.update()
+            .where(bookings.c.id == sa.bindparam('b_id'))
+            .values(start_minute=sa.bindparam('b_start'), end_minute=sa.bindparam('b_end')),
+            values
+        )
+
+    op.drop_index('ix_bookings_room_date_time', table_name='bookings')
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.alter_column('start_minute', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('end_minute', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('start_time')
+        batch_op.drop_column('end_time')
+    op.create_index('ix_bookings_room_date_time', 'bookings', ['room_id', 'date', 'start_minute', 'end_minute'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('bookings', sa.Column('start_time', sa.String(length=5), nullable=True))
+    op.add_column('bookings', sa.Column('end_time', sa.String(length=5), nullable=True))
+
+    conn = op.get_bind()
+    rows = [] if op.get_context().as_sql else conn.execute(
+        sa.select(bookings.c.id, bookings.c.start_minute, bookings.c.end_minute)
+    ).fetchall()
+    if rows:
+        conn.execute(
+            bookings.update()
+            .where(bookings.c.id == sa.bindparam('b_id'))
+            .values(start_time=sa.bindparam('b_start'), end_time=sa.bindparam('b_end')),
+            [
+                {
+                    'b_id': row.id,
+                    'b_start': f'{row.start_minute // 60:02d}:{row.start_minute % 60:02d}',
+                    'b_end': f'{row.end_minute // 60:02d}:{row.end_minute % 60:02d}',
+                }
+                for row in rows
+            ]
+        )
+
+    op.drop_index('ix_bookings_room_date_time', table_name='bookings')
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.alter_column('start_time', existing_type=sa.String(length=5), nullable=False)
+        batch_op.alter_column('end_time', existing_type=sa.String(length=5), nullable=False)
+        batch_op.drop_column('start_minute')
+        batch_op.drop_column('end_minute')
+    op.create_index('ix_bookings_room_date_time', 'bookings', ['room_id', 'date', 'start_time', 'end_time'], unique=False)
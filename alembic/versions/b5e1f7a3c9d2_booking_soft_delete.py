@@ -0,0 +1,89 @@
+"""Booking updated_at and soft-delete tombstones
+
+Revision ID: b5e1f7a3c9d2
+Revises: f2a6c8d4e1b7
+Create Date: 2026-10-18 16:21:35.804117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1f7a3c9d2'
+down_revision: Union[str, Sequence[str], None] = 'f2a6c8d4e1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _overlap_condition(live_only: bool) -> str:
+    condition = """
+        SELECT 1 FROM bookings
+        WHERE room_id = NEW.room_id AND date = NEW.date
+          AND start_minute < NEW.end_minute AND end_minute > NEW.start_minute
+    """
+    return condition + ("  AND deleted_at IS NULL" if live_only else "")
+
+
+def _create_sqlite_triggers(live_only: bool) -> None:
+    condition = _overlap_condition(live_only)
+    op.execute('DROP TRIGGER IF EXISTS bookings_no_overlap_insert')
+    op.execute('DROP TRIGGER IF EXISTS bookings_no_overlap_update')
+    op.execute(f"""
+        CREATE TRIGGER bookings_no_overlap_insert
+        BEFORE INSERT ON bookings
+        WHEN EXISTS ({condition})
+        BEGIN SELECT RAISE(ABORT, 'bookings_no_overlap'); END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER bookings_no_overlap_update
+        BEFORE UPDATE OF room_id, date, start_minute, end_minute ON bookings
+        WHEN EXISTS ({condition} AND id != NEW.id)
+        BEGIN SELECT RAISE(ABORT, 'bookings_no_overlap'); END
+    """)
+
+
+def _create_pg_constraint(live_only: bool) -> None:
+    op.execute('ALTER TABLE bookings DROP CONSTRAINT IF EXISTS bookings_no_overlap')
+    op.execute(f"""
+        ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+        EXCLUDE USING gist (room_id WITH =, date WITH =, int4range(start_minute, end_minute) WITH &&)
+        {'WHERE (deleted_at IS NULL)' if live_only else ''}
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_context().dialect.name
+    op.add_column('bookings', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('bookings', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE bookings SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+
+    # В SQLite batch пересоздает таблицу, триггеры при этом пропадают -
+    # они создаются заново ниже, уже без учета отмененных бронирований
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_bookings_updated', 'bookings', ['updated_at', 'id'], unique=False)
+
+    if dialect == 'sqlite':
+        _create_sqlite_triggers(live_only=True)
+    elif dialect == 'postgresql':
+        _create_pg_constraint(live_only=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_context().dialect.name
+    # Tombstone-ы превращаются обратно в настоящие удаления
+    op.execute("DELETE FROM bookings WHERE deleted_at IS NOT NULL")
+    op.drop_index('ix_bookings_updated', table_name='bookings')
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.drop_column('deleted_at')
+        batch_op.drop_column('updated_at')
+
+    if dialect == 'sqlite':
+        _create_sqlite_triggers(live_only=False)
+    elif dialect == 'postgresql':
+        _create_pg_constraint(live_only=False)
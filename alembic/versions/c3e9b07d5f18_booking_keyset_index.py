@@ -0,0 +1,31 @@
+"""Booking keyset pagination index
+
+Revision ID: c3e9b07d5f18
+Revises: a7c41e0b9d26
+Create Date: 2026-10-18 13:05:51.664210
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9b07d5f18'
+down_revision: Union[str, Sequence[str], None] = 'a7c41e0b9d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (date) - префикс нового индекса, отдельный индекс больше не нужен
+    op.create_index('ix_bookings_date_start', 'bookings', ['date', 'start_minute', 'id'], unique=False)
+    op.drop_index('ix_bookings_date', table_name='bookings')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_bookings_date', 'bookings', ['date'], unique=False)
+    op.drop_index('ix_bookings_date_start', table_name='bookings')
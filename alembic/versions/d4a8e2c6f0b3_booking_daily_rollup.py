@@ -0,0 +1,63 @@
+"""Booking daily rollup table
+
+Revision ID: d4a8e2c6f0b3
+Revises: b5e1f7a3c9d2
+Create Date: 2026-10-18 19:42:10.318845
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8e2c6f0b3'
+down_revision: Union[str, Sequence[str], None] = 'b5e1f7a3c9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Рабочее окно по умолчанию (ROLLUP_DAY_START/ROLLUP_DAY_END = 08:00-20:00);
+# для другого окна после миграции: python -m app.cli rebuild-rollups
+DAY_START = 8 * 60
+DAY_END = 20 * 60
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'booking_daily_rollup',
+        sa.Column('room_id', sa.String(length=36), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('bookings', sa.Integer(), nullable=False),
+        sa.Column('booked_minutes', sa.Integer(), nullable=False),
+        sa.Column('working_minutes', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('room_id', 'date'),
+    )
+    op.create_index('ix_booking_daily_rollup_date', 'booking_daily_rollup', ['date', 'room_id'], unique=False)
+
+    # Заполнение из живых бронирований; CASE вместо MIN/MAX(a, b) - одинаково в SQLite и PostgreSQL
+    window_start = f"CASE WHEN start_minute > {DAY_START} THEN start_minute ELSE {DAY_START} END"
+    window_end = f"CASE WHEN end_minute < {DAY_END} THEN end_minute ELSE {DAY_END} END"
+    op.execute(f"""
+        INSERT INTO booking_daily_rollup (room_id, date, bookings, booked_minutes, working_minutes, revenue)
+        SELECT room_id, date, COUNT(id), SUM(end_minute - start_minute),
+               SUM(CASE WHEN {window_end} > {window_start} THEN {window_end} - {window_start} ELSE 0 END),
+               0
+        FROM bookings
+        WHERE deleted_at IS NULL
+        GROUP BY room_id, date
+    """)
+    op.execute("""
+        UPDATE booking_daily_rollup
+        SET revenue = COALESCE(booked_minutes * (
+            SELECT COALESCE(price, 0) FROM rooms WHERE rooms.id = booking_daily_rollup.room_id
+        ) / 60.0, 0)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_daily_rollup_date', table_name='booking_daily_rollup')
+    op.drop_table('booking_daily_rollup')
@@ -0,0 +1,58 @@
+"""Booking participants table
+
+Revision ID: e7c3a9f1b5d4
+Revises: d4a8e2c6f0b3
+Create Date: 2026-10-18 20:37:54.602117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c3a9f1b5d4'
+down_revision: Union[str, Sequence[str], None] = 'd4a8e2c6f0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _emails(participants) -> list:
+    # Как app.models.rows.participant_emails: без пробелов, в нижнем регистре, без повторов
+    emails = []
+    for participant in (participants or "").split(","):
+        email = participant.strip().lower()
+        if email and email not in emails:
+            emails.append(email)
+    return emails
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    participants = op.create_table(
+        'booking_participants',
+        sa.Column('booking_id', sa.String(length=36), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('booking_id', 'email'),
+    )
+    op.create_index('ix_booking_participants_email', 'booking_participants', ['email', 'booking_id'], unique=False)
+
+    # CSV разбирается в Python - split по запятой в SQL у SQLite и PostgreSQL разный
+    rows = op.get_bind().execute(sa.text(
+        "SELECT id, participants FROM bookings WHERE participants IS NOT NULL AND participants != ''"
+    ))
+    entries = [
+        {'booking_id': booking_id, 'email': email}
+        for booking_id, csv in rows
+        for email in _emails(csv)
+    ]
+    if entries:
+        op.bulk_insert(participants, entries)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_participants_email', table_name='booking_participants')
+    op.drop_table('booking_participants')
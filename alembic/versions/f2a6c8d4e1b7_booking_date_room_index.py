@@ -0,0 +1,33 @@
+"""Booking index led by date for per-day room scans
+
+Revision ID: f2a6c8d4e1b7
+Revises: e8b4d21f6a93
+Create Date: 2026-10-18 15:03:44.270915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6c8d4e1b7'
+down_revision: Union[str, Sequence[str], None] = 'e8b4d21f6a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Те же колонки, но дата первой: проверки пересечений по-прежнему
+    # идут по равенству (date, room_id), а поиск окон за день читает
+    # покрывающий индекс уже в порядке (room_id, start_minute)
+    op.create_index('ix_bookings_date_room_time', 'bookings', ['date', 'room_id', 'start_minute', 'end_minute'], unique=False)
+    op.drop_index('ix_bookings_room_date_time', table_name='bookings')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_bookings_room_date_time', 'bookings', ['room_id', 'date', 'start_minute', 'end_minute'], unique=False)
+    op.drop_index('ix_bookings_date_room_time', table_name='bookings')
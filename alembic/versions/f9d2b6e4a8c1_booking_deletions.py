@@ -0,0 +1,35 @@
+"""Booking deletions for the changes feed
+
+Revision ID: f9d2b6e4a8c1
+Revises: e7c3a9f1b5d4
+Create Date: 2026-10-18 21:14:03.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9d2b6e4a8c1'
+down_revision: Union[str, Sequence[str], None] = 'e7c3a9f1b5d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'booking_deletions',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_booking_deletions_updated', 'booking_deletions', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booking_deletions_updated', table_name='booking_deletions')
+    op.drop_table('booking_deletions')
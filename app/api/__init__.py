@@ -3,5 +3,6 @@ from .rooms import rooms_router
 from .bookings import bookings_router
 from .admin import admin_router
 from .roles import roles_router
+from .events import events_router
 
-__all__ = ['users_router', 'rooms_router', 'bookings_router', 'admin_router', 'roles_router']
\ No newline at end of file
+__all__ = ['users_router', 'rooms_router', 'bookings_router', 'admin_router', 'roles_router', 'events_router']
\ No newline at end of file
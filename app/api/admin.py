@@ -1,22 +1,38 @@
-from fastapi import APIRouter, HTTPException
-from sqlalchemy import select, func
-from ..models import User, Room, Booking, Role, async_session
+import logging
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Role, async_session, get_db
+from ..repositories.user_repository import UserRepository
+from ..repositories.analytics_repository import AnalyticsRepository
+from ..services.analytics_service import AnalyticsService
+from ..exceptions.analytics_exceptions import InvalidAnalyticsQuery
+from ..exceptions.room_exceptions import RoomNotFound
+from ..utils.password import password_pool
+from ..utils.occupancy_cache import occupancy_cache
+from ..utils.booking_events import booking_event_hub
+from ..utils.invalidation_bus import invalidation_bus
+from ..utils.catalog_cache import catalog_cache
+from ..utils.analytics_cache import analytics_cache
+from ..utils.stats_cache import stats_cache
+from .http_cache import cache_headers, not_modified
 
 admin_router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @admin_router.get("/users")
 async def get_all_users():
     async with async_session() as session:
-        result = await session.execute(select(User))
-        users = result.scalars().all()
+        users = await UserRepository.get_all_users(session)
         return [user.to_dict() for user in users]
 
 @admin_router.put("/users/{user_id}/role")
 async def update_user_role(user_id: str, data: dict):
     async with async_session() as session:
         # Найти пользователя
-        user_result = await session.execute(select(User).where(User.id == user_id))
-        user = user_result.scalar()
+        user = await UserRepository.get_user_by_id(session, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -26,27 +42,102 @@ async def update_user_role(user_id: str, data: dict):
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         
-        user.role_id = role.id
+        user.role = role
         await session.commit()
         return user.to_dict()
 
 @admin_router.get("/stats")
-async def get_stats():
-    async with async_session() as session:
-        # Получаем количество пользователей
-        users_result = await session.execute(select(func.count(User.id)))
-        users_count = users_result.scalar()
-        
-        # Получаем количество комнат
-        rooms_result = await session.execute(select(func.count(Room.id)))
-        rooms_count = rooms_result.scalar()
-        
-        # Получаем количество бронирований
-        bookings_result = await session.execute(select(func.count(Booking.id)))
-        bookings_count = bookings_result.scalar()
-        
+async def get_stats(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Счетчики пользователей, комнат и бронирований из снимка (stats_cache):
+    сессия идет в БД, только если пользователи, комнаты или бронирования изменились
+    """
+    cached = not_modified(request, "stats", stats_cache.etag())
+    if cached:
+        return cached
+
+    async def load_totals():
+        users_count, rooms_count, bookings_count = await AnalyticsRepository.get_totals(db)
         return {
             "totalUsers": users_count or 0,
             "totalRooms": rooms_count or 0,
             "totalBookings": bookings_count or 0
-        }
\ No newline at end of file
+        }
+
+    snapshot = await stats_cache.get(load_totals)
+    return Response(snapshot.body, media_type="application/json", headers=cache_headers("stats", snapshot.etag))
+
+@admin_router.get("/analytics")
+async def get_analytics(
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    group_by: str = Query("room", alias="groupBy", description="room, user, day, week, month или total"),
+    room_id: str = Query(None),
+    day_start: str = Query("08:00"),
+    day_end: str = Query("20:00")
+):
+    """Загрузка комнат, бронирования по пользователям и выручка (цена за час x длительность) за период"""
+    try:
+        async with async_session() as session:
+            return await AnalyticsService.get_summary(session, date_from, date_to, group_by, room_id, day_start, day_end)
+    except InvalidAnalyticsQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RoomNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.exception("Ошибка при расчете аналитики")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@admin_router.get("/analytics/peak-hours")
+async def get_peak_hours(
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    room_id: str = Query(None),
+    top: int = Query(3, ge=1, le=24)
+):
+    """Загрузка по часам суток и самые занятые часы за период"""
+    try:
+        async with async_session() as session:
+            return await AnalyticsService.get_peak_hours(session, date_from, date_to, room_id, top)
+    except InvalidAnalyticsQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RoomNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.exception("Ошибка при расчете пиковых часов")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@admin_router.get("/metrics/password-pool")
+async def get_password_pool_metrics():
+    """Загрузка пула bcrypt: воркеры, очередь, отказы"""
+    return password_pool.stats()
+
+@admin_router.get("/metrics/occupancy-cache")
+async def get_occupancy_cache_metrics():
+    """Кэш занятости комнат: записи, память, попадания"""
+    return occupancy_cache.stats()
+
+@admin_router.get("/metrics/booking-events")
+async def get_booking_events_metrics():
+    """Живые обновления: подписчики воркера, доставленные и отключенные за переполнение"""
+    return booking_event_hub.stats()
+
+@admin_router.get("/metrics/invalidation-bus")
+async def get_invalidation_bus_metrics():
+    """Шина инвалидации кэшей между воркерами: бэкенд, отправлено, получено"""
+    return invalidation_bus.stats()
+
+@admin_router.get("/metrics/catalog-cache")
+async def get_catalog_cache_metrics():
+    """Кэш справочников комнат и ролей: версии, размер, попадания"""
+    return catalog_cache.stats()
+
+@admin_router.get("/metrics/analytics-cache")
+async def get_analytics_cache_metrics():
+    """Кэш агрегатов аналитики по закрытым месяцам: записи, попадания"""
+    return analytics_cache.stats()
+
+@admin_router.get("/metrics/stats-cache")
+async def get_stats_cache_metrics():
+    """Снимок /api/admin/stats: актуален ли, попадания"""
+    return stats_cache.stats()
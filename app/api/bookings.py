@@ -1,67 +1,103 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import ORJSONResponse
+from typing import List, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 from datetime import date, datetime
-import traceback
+import logging
 import uuid
 
 from app.models import get_db, Booking, User, Room  # ← Добавьте User и Room!
 from app.services.booking_service import BookingService
-from app.schemes.booking_schema import BookingCreateSchema
+from app.repositories.booking_repository import BookingRepository
+from app.utils.booking_time import parse_time
+from app.api.http_cache import fresh_cache_headers, not_modified, versions_etag
+from app.schemes.booking_schema import BookingCreateSchema, BookingResponseSchema, BookingPageSchema, BookingChangesSchema
 from app.exceptions.booking_exceptions import BookingNotFound, TimeSlotNotAvailable, InvalidBookingData
 
 bookings_router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@bookings_router.get("/")
+# Максимальный размер страницы для GET /api/bookings/?limit=
+MAX_PAGE_SIZE = 500
+
+@bookings_router.get("/", response_model=Union[List[BookingResponseSchema], BookingPageSchema])
 async def get_all_bookings(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     room_id: str = Query(None),
     user_id: str = Query(None),
-    booking_date: date = Query(None)
+    booking_date: date = Query(None),
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = Query(None)
 ):
+    """
+    Без limit/cursor возвращает список целиком (старый формат).
+    С limit - страницу {"items": [...], "nextCursor": "..."} в порядке (date, startTime, id).
+    ETag - по версии дня, если запрошен один день, иначе по версии всех бронирований.
+    Строки доверенные - отдаются в orjson без проверки схемой
+    """
     try:
-        print(f"📅 Запрос бронирований: room_id={room_id}, user_id={user_id}, date={booking_date}")
-        
-        query = select(Booking)
-        
-        filters = []
-        if room_id:
-            filters.append(Booking.room_id == room_id)
-        if user_id:
-            filters.append(Booking.user_id == user_id)
-        if booking_date:
-            if isinstance(booking_date, str):
-                date_obj = datetime.strptime(booking_date, "%Y-%m-%d").date()
-                filters.append(Booking.date == date_obj)
-            else:
-                filters.append(Booking.date == booking_date)
-        
-        if filters:
-            query = query.where(and_(*filters))
-        
-        result = await db.execute(query)
-        bookings = result.scalars().all()
-        
-        # Загружаем связанные данные
-        bookings_list = []
-        for booking in bookings:
-            await db.refresh(booking, ['user', 'room'])
-            bookings_list.append(booking.to_dict())
+        day = booking_date or (date_from if date_from and date_from == date_to else None)
+        partition = f"bookings:{day.isoformat()}" if day else "bookings"
+        # В ответе имя пользователя - ETag зависит и от пользователей
+        etag = versions_etag("bookings", partition, "users")
+        cached = not_modified(request, "bookings", etag)
+        if cached:
+            return cached
+        
+        if limit is not None or cursor is not None:
+            if booking_date:
+                date_from = date_to = booking_date
+            bookings, next_cursor = await BookingService.get_bookings_page(
+                db, limit or MAX_PAGE_SIZE, cursor, date_from, date_to, room_id, user_id
+            )
+            return ORJSONResponse(
+                {"items": bookings, "nextCursor": next_cursor},
+                headers=fresh_cache_headers("bookings", etag, partition, "users")
+            )
         
-        print(f"✅ Найдено {len(bookings_list)} бронирований")
-        return bookings_list
+        # Строки BookingRow (Core select с именем автора) orjson пишет без промежуточных dict
+        bookings = await BookingService.get_all_bookings(db, room_id, user_id, booking_date, date_from, date_to)
+        return ORJSONResponse(bookings, headers=fresh_cache_headers("bookings", etag, partition, "users"))
         
+    except InvalidBookingData as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при получении бронирований: {str(e)}")
-        traceback.print_exc()
-        return []
+        # Не пустой 200: для клиента это выглядело бы как пустой календарь
+        logger.exception("Ошибка при получении бронирований")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@bookings_router.post("/")
+@bookings_router.get("/changes", response_model=BookingChangesSchema)
+async def get_booking_changes(
+    db: AsyncSession = Depends(get_db),
+    since: str = Query(None),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    Лента изменений: созданные, измененные и отмененные ({"id", "deleted": true})
+    бронирования после курсора since. Первый вызов без since отдает все живые
+    бронирования; дальше передается nextCursor. hasMore - забрать следующую порцию сразу
+    """
+    try:
+        bookings, next_cursor, has_more = await BookingService.get_changes(db, limit, since)
+        return ORJSONResponse({
+            "changes": [booking.to_change() for booking in bookings],
+            "nextCursor": next_cursor,
+            "hasMore": has_more
+        })
+    except InvalidBookingData as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Ошибка при получении ленты изменений")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@bookings_router.post("/", response_model=BookingResponseSchema)
 async def create_booking(booking_data: BookingCreateSchema, db: AsyncSession = Depends(get_db)):
     """Создание бронирования - ИСПРАВЛЕННАЯ ВЕРСИЯ с импортами"""
     try:
-        print(f"📝 Создание бронирования: {booking_data}")
-        
         # Используем camelCase поля из схемы!
         room_id = booking_data.roomId      # ← camelCase!
         user_id = booking_data.userId      # ← camelCase!
@@ -71,11 +107,6 @@ async def create_booking(booking_data: BookingCreateSchema, db: AsyncSession = D
         title = booking_data.title
         participants = booking_data.participants or []
         
-        print(f"   room_id: {room_id}")
-        print(f"   user_id: {user_id}")
-        print(f"   date: {date_str}")
-        print(f"   time: {start_time}-{end_time}")
-        
         # Проверяем существование пользователя и комнаты
         # User и Room должны быть импортированы!
         user = await db.get(User, user_id)
@@ -92,20 +123,18 @@ async def create_booking(booking_data: BookingCreateSchema, db: AsyncSession = D
         except ValueError:
             raise HTTPException(status_code=400, detail="Неверный формат даты. Используйте YYYY-MM-DD")
         
-        # Проверяем доступность времени
-        conflicting = await db.execute(
-            select(Booking).where(
-                and_(
-                    Booking.room_id == room_id,
-                    Booking.date == booking_date,
-                    or_(
-                        and_(Booking.start_time < end_time, Booking.end_time > start_time)
-                    )
-                )
-            )
-        )
+        # Время храним в минутах от полуночи
+        try:
+            start_minute = parse_time(start_time)
+            end_minute = parse_time(end_time)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Неверный формат времени. Используйте HH:MM")
+        if end_minute <= start_minute:
+            raise HTTPException(status_code=400, detail="Время окончания должно быть позже времени начала")
         
-        if conflicting.scalar():
+        # Проверяем доступность времени
+        available = await BookingRepository.check_availability(db, room_id, booking_date, start_minute, end_minute)
+        if not available:
             raise HTTPException(status_code=400, detail="Это время уже занято")
         
         # Создаем бронирование
@@ -114,30 +143,33 @@ async def create_booking(booking_data: BookingCreateSchema, db: AsyncSession = D
             room_id=room_id,
             user_id=user_id,
             date=booking_date,
-            start_time=start_time,
-            end_time=end_time,
+            start_minute=start_minute,
+            end_minute=end_minute,
             title=title,
             participants=",".join(participants) if participants else ""
         )
         
-        db.add(new_booking)
-        await db.commit()
+        # Между проверкой и вставкой слот мог занять параллельный запрос
+        if not await BookingRepository.add_booking(db, new_booking):
+            raise HTTPException(status_code=400, detail="Это время уже занято")
         await db.refresh(new_booking)
         
         # Загружаем связи
         await db.refresh(new_booking, ['user', 'room'])
         
-        print(f"✅ Бронирование создано: {new_booking.id}")
+        logger.info(
+            "Бронирование создано",
+            extra={"booking_id": new_booking.id, "room_id": room_id, "user_id": user_id, "date": date_str}
+        )
         return new_booking.to_dict()
             
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Неожиданная ошибка: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Неожиданная ошибка")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@bookings_router.get("/{booking_id}")
+@bookings_router.get("/{booking_id}", response_model=BookingResponseSchema)
 async def get_booking(booking_id: str, db: AsyncSession = Depends(get_db)):
     try:
         booking = await BookingService.get_booking_by_id(db, booking_id)
@@ -145,18 +177,17 @@ async def get_booking(booking_id: str, db: AsyncSession = Depends(get_db)):
     except BookingNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при получении бронирования {booking_id}: {str(e)}")
+        logger.exception("Ошибка при получении бронирования %s", booking_id)
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
 @bookings_router.delete("/{booking_id}")
 async def delete_booking(booking_id: str, db: AsyncSession = Depends(get_db)):
     try:
-        print(f"🗑️ Удаление бронирования: {booking_id}")
         await BookingService.delete_booking(db, booking_id)
-        print(f"✅ Бронирование удалено: {booking_id}")
+        logger.info("Бронирование удалено", extra={"booking_id": booking_id})
         return {"message": f"Booking {booking_id} deleted successfully"}
     except BookingNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при удалении бронирования: {str(e)}")
+        logger.exception("Ошибка при удалении бронирования")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import logging
+from datetime import date
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+
+from app.utils.booking_events import booking_event_hub, TooManySubscribers
+
+events_router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Коды закрытия WebSocket
+POLICY_VIOLATION = 1008
+TRY_AGAIN_LATER = 1013
+
+
+def parse_subscription(room_ids, dates):
+    """Комнаты и даты подписки; ValueError, если дата не YYYY-MM-DD"""
+    return (
+        [room_id for room_id in room_ids or [] if room_id],
+        [date.fromisoformat(day).isoformat() for day in dates or [] if day],
+    )
+
+
+async def send_events(websocket: WebSocket, subscription) -> None:
+    while True:
+        message = await subscription.get()
+        if message is None:
+            # Не успевал читать - клиент переподключится и догонит через /api/bookings/changes
+            await websocket.send_text(json.dumps({"type": "overflow"}))
+            await websocket.close(code=TRY_AGAIN_LATER)
+            return
+        await websocket.send_text(message)
+
+
+@events_router.websocket("/bookings")
+async def booking_events(
+    websocket: WebSocket,
+    room_id: list[str] = Query(None),
+    booking_date: list[str] = Query(None, alias="date")
+):
+    """
+    Живые события бронирований: {"type": "created" | "updated" | "deleted", "booking": {...}}.
+    Фильтр задается в query (?room_id=...&date=YYYY-MM-DD, можно несколько) и
+    меняется сообщением {"roomIds": [...], "dates": [...]}; пустой фильтр - все
+    """
+    await websocket.accept()
+    try:
+        room_ids, dates = parse_subscription(room_id, booking_date)
+        subscription = booking_event_hub.subscribe(room_ids, dates)
+    except ValueError:
+        await websocket.close(code=POLICY_VIOLATION, reason="Invalid date")
+        return
+    except TooManySubscribers as e:
+        await websocket.close(code=TRY_AGAIN_LATER, reason=str(e))
+        return
+
+    sender = asyncio.create_task(send_events(websocket, subscription))
+    try:
+        while True:
+            data = await websocket.receive_json()
+            try:
+                room_ids, dates = parse_subscription(data.get("roomIds"), data.get("dates"))
+            except (ValueError, TypeError, AttributeError):
+                await websocket.send_text(json.dumps({"type": "error", "detail": "Invalid subscription"}))
+                continue
+            booking_event_hub.resubscribe(subscription, room_ids, dates)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    except json.JSONDecodeError:
+        await websocket.close(code=POLICY_VIOLATION, reason="Invalid JSON")
+    finally:
+        sender.cancel()
+        booking_event_hub.unsubscribe(subscription)
@@ -0,0 +1,67 @@
+"""
+Условные GET для списочных эндпоинтов: ETag + If-None-Match -> 304 и
+Cache-Control по маршрутам.
+
+ETag строится из версий таблиц/дней (app/utils/table_versions.py) и окна
+version_epoch до чтения данных, тело для этого не нужно: на совпадение отвечаем
+304 без запроса к БД. После чтения версии сверяются еще раз (fresh_cache_headers):
+если во время запроса пришло изменение, ответ уходит без ETag - иначе данные,
+прочитанные до или после изменения, закрепились бы за версией, которой не
+соответствуют.
+
+Настройки (переменные окружения), значение - заголовок Cache-Control целиком:
+    CACHE_CONTROL_ROOMS     - GET /api/rooms/, по умолчанию "public, no-cache"
+    CACHE_CONTROL_ROLES     - GET /api/roles/, по умолчанию "public, no-cache"
+    CACHE_CONTROL_USERS     - GET /api/users/, по умолчанию "private, no-cache"
+    CACHE_CONTROL_BOOKINGS  - GET /api/bookings/, по умолчанию "private, no-cache"
+    CACHE_CONTROL_STATS     - GET /api/admin/stats, по умолчанию "private, no-cache"
+"no-cache" - хранить можно, но перед использованием спросить сервер (дешевый 304).
+"""
+import os
+
+from fastapi import Request, Response
+
+from app.utils.catalog_cache import make_etag
+from app.utils.table_versions import table_versions, version_epoch
+
+CACHE_CONTROL = {
+    "rooms": os.getenv("CACHE_CONTROL_ROOMS", "public, no-cache"),
+    "roles": os.getenv("CACHE_CONTROL_ROLES", "public, no-cache"),
+    "users": os.getenv("CACHE_CONTROL_USERS", "private, no-cache"),
+    "bookings": os.getenv("CACHE_CONTROL_BOOKINGS", "private, no-cache"),
+    "stats": os.getenv("CACHE_CONTROL_STATS", "private, no-cache"),
+}
+
+
+def versions_etag(route: str, *keys: str) -> str:
+    """ETag из текущих версий таблиц/партиций: versions_etag("users", "users", "roles")"""
+    return make_etag(route, version_epoch(), *(table_versions.get(key) for key in keys))
+
+
+def cache_headers(route: str, etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL[route]}
+
+
+def fresh_cache_headers(route: str, etag: str, *keys: str) -> dict:
+    """Заголовки после чтения: ETag, только если версии keys не изменились с versions_etag"""
+    if versions_etag(route, *keys) != etag:
+        return {"Cache-Control": CACHE_CONTROL[route]}
+    return cache_headers(route, etag)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match в слабом сравнении (RFC 9110): W/ не учитывается"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(request: Request, route: str, etag: str):
+    """Ответ 304, если у клиента актуальная версия, иначе None"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers(route, etag))
+    return None
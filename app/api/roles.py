@@ -1,19 +1,32 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..models import Role
 from ..models import async_session
+from ..schemes.role_schema import RoleResponseSchema
+from ..utils.catalog_cache import catalog_cache
+from .dependencies import require_role
+from .http_cache import cache_headers, not_modified
 
 roles_router = APIRouter()
 
-@roles_router.get("/")
-async def get_all_roles():
-    async with async_session() as session:
-        result = await session.execute(select(Role))
-        roles = result.scalars().all()
-        return [role.to_dict() for role in roles]
+@roles_router.get("/", response_model=List[RoleResponseSchema])
+async def get_all_roles(request: Request):
+    """Справочник ролей из кэша (готовый JSON); в БД - только после изменения ролей"""
+    async def load():
+        async with async_session() as session:
+            result = await session.execute(select(Role))
+            roles = result.scalars().all()
+            return [role.to_dict() for role in roles]
+    
+    entry = await catalog_cache.get("roles", load)
+    etag = entry.etag
+    return not_modified(request, "roles", etag) or Response(
+        entry.body, media_type="application/json", headers=cache_headers("roles", etag)
+    )
 
-@roles_router.get("/{role_id}")
+@roles_router.get("/{role_id}", response_model=RoleResponseSchema)
 async def get_role(role_id: int):
     async with async_session() as session:
         result = await session.execute(select(Role).where(Role.id == role_id))
@@ -22,7 +35,7 @@ async def get_role(role_id: int):
             return role.to_dict()
         raise HTTPException(status_code=404, detail="Role not found")
 
-@roles_router.post("/")
+@roles_router.post("/", response_model=RoleResponseSchema, dependencies=[Depends(require_role("admin"))])
 async def create_role(data: dict):
     async with async_session() as session:
         existing = await session.execute(select(Role).where(Role.name == data.get("name")))
@@ -34,7 +47,7 @@ async def create_role(data: dict):
         await session.commit()
         return new_role.to_dict()
 
-@roles_router.put("/{role_id}")
+@roles_router.put("/{role_id}", response_model=RoleResponseSchema, dependencies=[Depends(require_role("admin"))])
 async def update_role(role_id: int, data: dict):
     async with async_session() as session:
         result = await session.execute(select(Role).where(Role.id == role_id))
@@ -47,7 +60,7 @@ async def update_role(role_id: int, data: dict):
         await session.commit()
         return role.to_dict()
 
-@roles_router.delete("/{role_id}")
+@roles_router.delete("/{role_id}", dependencies=[Depends(require_role("admin"))])
 async def delete_role(role_id: int):
     async with async_session() as session:
         result = await session.execute(select(Role).where(Role.id == role_id))
@@ -1,28 +1,107 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-import traceback
+from datetime import date
+import logging
 
 from app.models import get_db, Room  # Убедитесь, что Room импортирован
 from app.services.room_service import RoomService
-from app.schemes.room_schema import RoomCreateSchema  # Убедитесь, что схема импортирована
+from app.schemes.room_schema import RoomCreateSchema, RoomResponseSchema  # Убедитесь, что схема импортирована
 from app.exceptions.room_exceptions import RoomNotFound, InvalidRoomData
+from app.utils.catalog_cache import catalog_cache
+from app.api.http_cache import cache_headers, not_modified
+from app.api.dependencies import require_role
 
 rooms_router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@rooms_router.get("/")
-async def get_all_rooms(db: AsyncSession = Depends(get_db)):
+@rooms_router.get("/", response_model=List[RoomResponseSchema])
+async def get_all_rooms(request: Request, db: AsyncSession = Depends(get_db)):
+    """Справочник комнат из кэша (готовый JSON); в БД - только после изменения комнат"""
     try:
-        print("🏢 Запрос всех комнат...")
-        rooms = await RoomService.get_all_rooms(db)
-        print(f"✅ Найдено {len(rooms)} комнат")
-        return [room.to_dict() for room in rooms]
+        async def load():
+            rooms = await RoomService.get_all_rooms(db)
+            return [room.to_dict() for room in rooms]
+        
+        entry = await catalog_cache.get("rooms", load)
+        etag = entry.etag
+        return not_modified(request, "rooms", etag) or Response(
+            entry.body, media_type="application/json", headers=cache_headers("rooms", etag)
+        )
+    except Exception as e:
+        logger.exception("Ошибка при получении комнат")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+# Статические пути объявлены до /{room_id}
+@rooms_router.get("/available", response_model=List[RoomResponseSchema])
+async def get_available_rooms(
+    db: AsyncSession = Depends(get_db),
+    booking_date: date = Query(..., alias="date"),
+    start: str = Query(...),
+    end: str = Query(...),
+    min_capacity: int = Query(None, ge=1),
+    amenities: str = Query(None)
+):
+    """Свободные комнаты на интервал: ?date=2026-10-20&start=09:00&end=10:00&min_capacity=6&amenities=Проектор,Wi-Fi"""
+    try:
+        rooms = await RoomService.get_available_rooms(db, booking_date, start, end, min_capacity, amenities)
+        return ORJSONResponse([room.to_dict() for room in rooms])
+    except InvalidRoomData as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Ошибка при поиске свободных комнат")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@rooms_router.get("/free-slots")
+async def find_free_slots(
+    db: AsyncSession = Depends(get_db),
+    duration: int = Query(..., ge=1, description="Длительность в минутах"),
+    days: int = Query(7, ge=1),
+    limit: int = Query(10, ge=1),
+    start_date: date = Query(None, alias="from"),
+    day_start: str = Query("08:00"),
+    day_end: str = Query("20:00"),
+    min_capacity: int = Query(None, ge=1),
+    amenities: str = Query(None)
+):
+    """Ближайшие limit свободных слотов длиной duration минут в ближайшие days дней"""
+    try:
+        return await RoomService.find_free_slots(
+            db, duration, days, limit, start_date, day_start, day_end, min_capacity, amenities
+        )
+    except InvalidRoomData as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при получении комнат: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Ошибка при поиске свободных слотов")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@rooms_router.get("/{room_id}")
+@rooms_router.get("/availability")
+async def get_availability_grid(
+    db: AsyncSession = Depends(get_db),
+    start_date: date = Query(None, alias="from"),
+    days: int = Query(7, ge=1),
+    room_ids: str = Query(None, description="id через запятую, по умолчанию все комнаты"),
+    slot: int = Query(30, ge=1, description="Размер слота сетки в минутах"),
+    day_start: str = Query("08:00"),
+    day_end: str = Query("20:00"),
+    encoding: str = Query("bits", description="bits - строка 0/1 на день, runs - длины серий")
+):
+    """Сетка занятости комнаты x дни для календаря одним ответом"""
+    try:
+        ids = [room_id.strip() for room_id in room_ids.split(",") if room_id.strip()] if room_ids else None
+        return ORJSONResponse(await RoomService.get_availability_grid(
+            db, start_date or date.today(), days, ids, slot, day_start, day_end, encoding
+        ))
+    except InvalidRoomData as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Ошибка при построении сетки занятости")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@rooms_router.get("/{room_id}", response_model=RoomResponseSchema)
 async def get_room(room_id: str, db: AsyncSession = Depends(get_db)):
     try:
         room = await RoomService.get_room_by_id(db, room_id)
@@ -30,14 +109,12 @@ async def get_room(room_id: str, db: AsyncSession = Depends(get_db)):
     except RoomNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при получении комнаты {room_id}: {str(e)}")
+        logger.exception("Ошибка при получении комнаты %s", room_id)
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@rooms_router.post("/")
+@rooms_router.post("/", response_model=RoomResponseSchema, dependencies=[Depends(require_role("admin"))])
 async def create_room(data: dict, db: AsyncSession = Depends(get_db)):  # Добавьте Depends(db)
     try:
-        print(f"🏗️ Создание комнаты: {data}")
-        
         # Проверяем обязательные поля
         if not data.get("name"):
             raise HTTPException(status_code=400, detail="Room name is required")
@@ -54,53 +131,50 @@ async def create_room(data: dict, db: AsyncSession = Depends(get_db)):  # Доб
             float(data.get("price", 0))
         )
         
-        print(f"✅ Комната создана: {room.name}")
         return room.to_dict()
         
     except InvalidRoomData as e:
-        print(f"❌ Неверные данные комнаты: {str(e)}")
+        logger.info("Неверные данные комнаты: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при создании комнаты: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Ошибка при создании комнаты")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@rooms_router.put("/{room_id}")
+@rooms_router.put("/{room_id}", response_model=RoomResponseSchema, dependencies=[Depends(require_role("admin"))])
 async def update_room(room_id: str, data: dict, db: AsyncSession = Depends(get_db)):
     try:
-        room = await RoomService.update_room(
-            db, 
-            room_id, 
-            data.get("name"), 
-            data.get("capacity"), 
-            data.get("amenities"), 
-            data.get("price")
+        # Не переданные поля остаются прежними
+        room = await RoomService.get_room_by_id(db, room_id)
+        room_data = RoomCreateSchema(
+            name=data.get("name", room.name),
+            capacity=data.get("capacity", room.capacity),
+            amenities=data.get("amenities", room.amenities or ""),
+            price=data.get("price", room.price or 0)
         )
-        if not room:
-            raise HTTPException(status_code=404, detail="Room not found")
+        room = await RoomService.update_room(db, room_id, room_data)
         return room.to_dict()
     except RoomNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
-    except InvalidRoomData as e:
+    except (InvalidRoomData, ValidationError) as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при обновлении комнаты: {str(e)}")
+        logger.exception("Ошибка при обновлении комнаты")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@rooms_router.put("/{room_id}/price")
+@rooms_router.put("/{room_id}/price", response_model=RoomResponseSchema, dependencies=[Depends(require_role("admin"))])
 async def update_room_price(room_id: str, data: dict, db: AsyncSession = Depends(get_db)):
     try:
         room = await RoomService.update_room_price(db, room_id, data.get("price"))
-        if not room:
-            raise HTTPException(status_code=404, detail="Room not found")
         return room.to_dict()
     except RoomNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except InvalidRoomData as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при обновлении цены комнаты: {str(e)}")
+        logger.exception("Ошибка при обновлении цены комнаты")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@rooms_router.delete("/{room_id}")
+@rooms_router.delete("/{room_id}", dependencies=[Depends(require_role("admin"))])
 async def delete_room(room_id: str, db: AsyncSession = Depends(get_db)):
     try:
         success = await RoomService.delete_room(db, room_id)
@@ -110,5 +184,5 @@ async def delete_room(room_id: str, db: AsyncSession = Depends(get_db)):
     except RoomNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        print(f"❌ Ошибка при удалении комнаты: {str(e)}")
+        logger.exception("Ошибка при удалении комнаты")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
\ No newline at end of file
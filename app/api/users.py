@@ -1,61 +1,77 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import ORJSONResponse
+from typing import List
+from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
-import traceback
+import logging
 
 from app.models import get_db
+from app.api.dependencies import get_current_user, require_role
+from app.api.http_cache import fresh_cache_headers, not_modified, versions_etag
+from app.utils.tokens import create_access_token
 from app.services.user_service import UserService
-from app.schemes.user_schema import UserCreateSchema, UserRoleUpdateSchema
-from app.exceptions.user_exceptions import UserNotFound, UserAlreadyExists, InvalidUserData
+from app.services.booking_service import BookingService
+from app.schemes.booking_schema import BookingResponseSchema
+from app.schemes.user_schema import UserCreateSchema, UserRoleUpdateSchema, UserResponseSchema, UserAuthResponseSchema, CurrentUserSchema
+from app.exceptions.user_exceptions import UserNotFound, UserAlreadyExists, InvalidUserData, PasswordHashingBusy
+from app.exceptions.booking_exceptions import InvalidBookingData
 
 users_router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@users_router.get("/")
-async def get_all_users(db: AsyncSession = Depends(get_db)):
+def with_access_token(user, user_dict: dict) -> dict:
+    """Добавляет к ответу входа access-токен - дальше клиент ходит с ним, а не с паролем"""
+    token, expires_in = create_access_token(user)
+    return {**user_dict, "accessToken": token, "tokenType": "bearer", "expiresIn": expires_in}
+
+@users_router.get("/", response_model=List[UserResponseSchema])
+async def get_all_users(request: Request, db: AsyncSession = Depends(get_db)):
     try:
-        print("🔍 Запрос на получение всех пользователей...")
+        # В ответе название роли - ETag зависит и от ролей
+        etag = versions_etag("users", "users", "roles")
+        cached = not_modified(request, "users", etag)
+        if cached:
+            return cached
         users = await UserService.get_all_users(db)
-        print(f"✅ Найдено {len(users)} пользователей")
-        return [user.to_dict() for user in users]
+        return ORJSONResponse([user.to_dict() for user in users], headers=fresh_cache_headers("users", etag, "users", "roles"))
     except Exception as e:
-        print(f"❌ Ошибка при получении пользователей: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Ошибка при получении пользователей")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@users_router.post("/login")
+@users_router.post("/login", response_model=UserAuthResponseSchema)
 async def login(data: dict, db: AsyncSession = Depends(get_db)):
     try:
-        print("🔐 Запрос на вход в систему")
-        print(f"📧 Данные для входа: email={data.get('email')}")
-        
         email = data.get("email")
         password = data.get("password")
         
         if not email or not password:
-            print("❌ Отсутствует email или пароль")
             raise HTTPException(status_code=400, detail="Email and password required")
         
-        print(f"🔄 Аутентификация пользователя {email}...")
-        
         # Здесь должен вызываться статический метод
         user = await UserService.authenticate_user(db, email, password)
         
         if not user:
-            print(f"❌ Неверные учетные данные для {email}")
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        print(f"✅ Успешный вход для {email}")
-        user_dict = user.to_dict()
-        print(f"📊 Данные пользователя: {user_dict}")
-        return user_dict
+        return with_access_token(user, user.to_dict())
         
-    except HTTPException:
+    except (HTTPException, PasswordHashingBusy):
         raise
     except Exception as e:
-        print(f"❌ Неожиданная ошибка при входе: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Неожиданная ошибка при входе")
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@users_router.get("/{user_id}")
+@users_router.get("/me", response_model=CurrentUserSchema)
+async def get_me(current_user: dict = Depends(get_current_user)):
+    """Текущий пользователь из токена - без bcrypt и без запросов к БД"""
+    return {
+        "id": current_user["sub"],
+        "name": current_user["name"],
+        "email": current_user["email"],
+        "role": current_user["role"],
+    }
+
+@users_router.get("/{user_id}", response_model=UserResponseSchema)
 async def get_user(user_id: str, db: AsyncSession = Depends(get_db)):
     try:
         user = await UserService.get_user_by_id(db, user_id)
@@ -65,34 +81,43 @@ async def get_user(user_id: str, db: AsyncSession = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@users_router.post("/register")
+@users_router.get("/{user_id}/agenda", response_model=List[BookingResponseSchema])
+async def get_user_agenda(
+    user_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to")
+):
+    """Свои бронирования пользователя и встречи, куда он приглашен, с сегодняшнего дня (или from)"""
+    try:
+        etag = versions_etag("bookings", "bookings", "users")
+        cached = not_modified(request, "bookings", etag)
+        if cached:
+            return cached
+        bookings = await BookingService.get_user_agenda(db, user_id, date_from, date_to)
+        return ORJSONResponse(bookings, headers=fresh_cache_headers("bookings", etag, "bookings", "users"))
+    except UserNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InvalidBookingData as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Ошибка при получении повестки пользователя")
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+@users_router.post("/register", response_model=UserAuthResponseSchema)
 async def register(user_data: UserCreateSchema, db: AsyncSession = Depends(get_db)):
     try:
-        print("👤 Запрос на регистрацию нового пользователя")
-        print(f"📝 Данные: {user_data.firstName} {user_data.lastName}, {user_data.email}")
-        
         user = await UserService.create_user(db, user_data)
-        
-        # Проверяем, что пароль сохранен правильно
-        print(f"🔍 Проверка созданного пользователя:")
-        print(f"   ID: {user.id}")
-        print(f"   Email: {user.email}")
-        print(f"   Пароль в БД: {user.password[:30]}..." if user.password else "❌ Пароль отсутствует!")
-        
-        user_dict = user.to_dict()
-        print(f"✅ Пользователь успешно зарегистрирован: {user_dict['name']}")
-        
-        return user_dict
+        return with_access_token(user, user.to_dict())
     except UserAlreadyExists as e:
-        print(f"❌ Пользователь уже существует: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except InvalidUserData as e:
-        print(f"❌ Неверные данные: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    except PasswordHashingBusy:
+        raise
     except Exception as e:
-        print(f"❌ Ошибка регистрации: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Ошибка регистрации")
         raise HTTPException(status_code=500, detail=f"Registration error: {str(e)}")
 
 @users_router.post("/login")
@@ -112,7 +137,7 @@ async def login(data: dict, db: AsyncSession = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-@users_router.put("/{user_id}/role")
+@users_router.put("/{user_id}/role", response_model=UserResponseSchema, dependencies=[Depends(require_role("admin"))])
 async def update_user_role(user_id: str, role_data: UserRoleUpdateSchema, db: AsyncSession = Depends(get_db)):
     try:
         user = await UserService.update_user_role(db, user_id, role_data.role)
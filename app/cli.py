@@ -0,0 +1,97 @@
+"""
+Служебные команды:
+    python -m app.cli init-db           - создать таблицы (create_all) и роли;
+                                          при старте приложения это не делается.
+                                          Новая база помечается alembic stamp head,
+                                          дальше схема обновляется alembic upgrade head
+    python -m app.cli seed-demo         - то же плюс демо-пользователи, комнаты
+                                          и бронирования (только в пустые таблицы)
+    python -m app.cli rebuild-rollups   - пересобрать дневные сводки бронирований
+                                          (booking_daily_rollup) из bookings
+
+Настройки БД и шины инвалидации - те же переменные окружения, что у приложения:
+после пересборки воркеры получают сообщение и сбрасывают кэш аналитики.
+"""
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# .env до импорта модулей app - они читают настройки при импорте
+load_dotenv()
+
+from app.utils.logging_config import setup_logging, shutdown_logging
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).parent.parent / "alembic.ini"
+
+
+def stamp_head() -> None:
+    """Схема из create_all совпадает с последней миграцией - помечаем ее в alembic_version"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    command.stamp(config, "head")
+
+
+async def init_schema(demo_data: bool = False) -> None:
+    from app.models import engine, init_db
+    from app.utils.password import password_pool
+
+    try:
+        created = await init_db(demo_data=demo_data)
+    finally:
+        password_pool.shutdown()
+        await engine.dispose()
+    if created:
+        # env.py сам запускает asyncio.run - в отдельном потоке, вне текущего цикла
+        await asyncio.to_thread(stamp_head)
+        logger.info("Новая база помечена alembic head")
+
+
+async def seed_demo() -> None:
+    await init_schema(demo_data=True)
+
+
+async def rebuild_rollups() -> None:
+    from app.models import engine
+    from app.utils.booking_rollup import rebuild_booking_rollups
+    from app.utils.invalidation_bus import invalidation_bus
+    from app.utils.table_versions import new_version
+
+    async with engine.begin() as conn:
+        rows = await rebuild_booking_rollups(conn)
+    logger.info("Дневные сводки пересобраны: %s строк", rows)
+    await invalidation_bus.start()
+    invalidation_bus.publish("booking-rollups", {"version": new_version()})
+    await invalidation_bus.stop()
+    await engine.dispose()
+
+
+COMMANDS = {
+    "init-db": (init_schema, "создать таблицы и роли"),
+    "seed-demo": (seed_demo, "создать таблицы, роли и демо-данные"),
+    "rebuild-rollups": (rebuild_rollups, "пересобрать дневные сводки бронирований"),
+}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        commands.add_parser(name, help=help_text)
+    args = parser.parse_args(argv)
+    setup_logging()
+    try:
+        asyncio.run(COMMANDS[args.command][0]())
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+class AnalyticsException(Exception):
+    """Base exception for analytics queries"""
+    pass
+
+class InvalidAnalyticsQuery(AnalyticsException):
+    """Raised when analytics parameters are invalid"""
+    pass
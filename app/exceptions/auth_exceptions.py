@@ -0,0 +1,7 @@
+class AuthException(Exception):
+    """Base exception for authentication"""
+    pass
+
+class InvalidToken(AuthException):
+    """Raised when access token is malformed, has a bad signature or is expired"""
+    pass
@@ -18,3 +18,6 @@ class InvalidPassword(UserException):
     """Raised when password is invalid"""
     pass
 
+class PasswordHashingBusy(UserException):
+    """Raised when the password hashing pool queue is full"""
+    pass
@@ -1,11 +1,11 @@
 from .models import (
     Base, engine, async_session, get_db,
-    User, Room, Booking, Role,
-    init_db
+    User, Room, Booking, Role, BookingParticipant, BookingDeletion, BookingDailyRollup,
+    init_db, check_schema
 )
 
 __all__ = [
     'Base', 'engine', 'async_session', 'get_db',
-    'User', 'Room', 'Booking', 'Role',
-    'init_db'
+    'User', 'Room', 'Booking', 'Role', 'BookingParticipant', 'BookingDeletion', 'BookingDailyRollup',
+    'init_db', 'check_schema'
 ]
\ No newline at end of file
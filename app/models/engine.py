@@ -0,0 +1,126 @@
+"""
+Фабрика async-движка SQLAlchemy.
+
+URL берется из DATABASE_URL (по умолчанию SQLite-файл в папке database/).
+Поддерживаются SQLite (aiosqlite, по умолчанию) и PostgreSQL (asyncpg):
+postgres:// и postgresql:// приводятся к postgresql+asyncpg://.
+
+Для SQLite при каждом новом соединении выставляются PRAGMA:
+WAL (читатели не блокируют писателя), busy_timeout (ждать блокировку,
+а не падать с "database is locked"), synchronous=NORMAL (в WAL безопасно
+и без fsync на каждый коммит), mmap и размер кэша страниц.
+
+Настройки (переменные окружения):
+    DATABASE_URL            - строка подключения
+    DB_ECHO                 - логировать SQL (true/false)
+    DB_POOL_SIZE            - постоянных соединений в пуле, по умолчанию 5
+    DB_MAX_OVERFLOW         - дополнительных соединений сверх пула, по умолчанию 10
+    DB_POOL_TIMEOUT         - сколько ждать свободное соединение, секунды
+    DB_POOL_RECYCLE         - пересоздавать соединения старше N секунд (PostgreSQL)
+    DB_POOL_PRE_PING        - проверять соединение перед выдачей из пула (PostgreSQL)
+    DB_STATEMENT_CACHE_SIZE - кэш prepared statements asyncpg; 0 за pgbouncer
+                              в режиме transaction
+    SQLITE_BUSY_TIMEOUT_MS  - по умолчанию 5000
+    SQLITE_SYNCHRONOUS      - по умолчанию NORMAL
+    SQLITE_MMAP_SIZE        - байты, по умолчанию 256 МБ
+    SQLITE_CACHE_SIZE_KB    - по умолчанию 65536 (64 МБ)
+"""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+load_dotenv()
+
+BASE_DIR = Path(__file__).parent.parent.parent
+DB_DIR = BASE_DIR / "database"
+
+
+def normalize_url(url: str) -> str:
+    """postgres:// и postgresql:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://"""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+DATABASE_URL = normalize_url(os.getenv("DATABASE_URL", f"sqlite+aiosqlite:///{DB_DIR}/soveshchayka.db"))
+DB_ECHO = os.getenv("DB_ECHO", "False").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def is_postgres(url: str) -> bool:
+    return url.startswith("postgres")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return ":memory:" in url or url.rstrip("/").endswith("sqlite+aiosqlite:")
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        # Отрицательное значение - размер в КиБ, а не в страницах
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def create_engine(url: str = None, **overrides) -> AsyncEngine:
+    url = normalize_url(url or DATABASE_URL)
+    options = {"echo": DB_ECHO}
+
+    if is_sqlite(url):
+        if not _is_memory_sqlite(url):
+            # Каждое соединение aiosqlite - отдельный поток; писатель у SQLite
+            # все равно один, поэтому большой пул только плодит ожидание блокировки
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+        options["connect_args"] = {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    else:
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+        if is_postgres(url):
+            # Кэш asyncpg и кэш диалекта SQLAlchemy настраиваются отдельно
+            url = make_url(url).update_query_dict(
+                {"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)}
+            )
+            options["connect_args"] = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+
+    if "poolclass" in overrides:
+        # NullPool/StaticPool не принимают размеры пула
+        for key in ("pool_size", "max_overflow", "pool_timeout"):
+            options.pop(key, None)
+    options.update(overrides)
+    engine = create_async_engine(url, **options)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
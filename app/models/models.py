@@ -1,48 +1,26 @@
-from sqlalchemy import Column, String, Integer, Text, Float, Date, DateTime, ForeignKey, func, select, and_, or_
+from sqlalchemy import Column, String, Integer, Text, Float, Date, DateTime, ForeignKey, Index, DDL, event, func, select, and_, or_
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, relationship, sessionmaker
+from sqlalchemy import inspect as inspect_state
 from datetime import datetime
 import os
+import logging
 from pathlib import Path
-import bcrypt
-# Получаем корневую директорию проекта
-BASE_DIR = Path(__file__).parent.parent.parent  # Поднимаемся на 3 уровня из app/models/
 
-# Создаем папку для базы данных, если её нет
-DB_DIR = BASE_DIR / "database"
-DB_DIR.mkdir(exist_ok=True)
-async def init_default_data():
-    async with async_session() as session:
-        from sqlalchemy import select
-        from sqlalchemy.sql import func
-        import bcrypt  # добавьте этот импорт
-        
-        user_check = await session.execute(select(func.count(User.id)))
-        if user_check.scalar() == 0:
-            admin_role = await session.execute(select(Role).where(Role.name == "admin"))
-            admin_role = admin_role.scalar()
-            user_role = await session.execute(select(Role).where(Role.name == "user"))
-            user_role = user_role.scalar()
-
-            # Хешируем пароли для демо-пользователей
-            def hash_pass(password):
-                salt = bcrypt.gensalt()
-                hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-                return hashed.decode('utf-8')
-            
-            hashed_password = hash_pass("password123")
-            
-            users = [
-                User(id="user_1", first_name="Алексей", last_name="Иванов", 
-                     email="alex@company.com", password=hashed_password, role_id=admin_role.id),
-                User(id="user_2", first_name="Мария", last_name="Петрова", 
-                     email="maria@company.com", password=hashed_password, role_id=user_role.id),
-                User(id="user_3", first_name="Иван", last_name="Сидоров", 
-                     email="ivan@company.com", password=hashed_password, role_id=user_role.id)
-            ]
-            session.add_all(users)
-            await session.commit()
+from app.utils.booking_time import format_time
+from app.utils.password import hash_password
+from app.models.rows import participant_emails, split_participants
+from app.utils.occupancy_cache import install_occupancy_invalidation
+from app.utils.booking_events import install_booking_events
+from app.utils.invalidation_bus import install_entity_invalidation
+from app.utils.booking_rollup import install_booking_rollup, booking_rollups_missing, rebuild_booking_rollups
+from app.models.engine import BASE_DIR, DB_DIR, DATABASE_URL, create_engine, is_sqlite
+
+logger = logging.getLogger(__name__)
 
+# Создаем папку для базы данных, если её нет
+if is_sqlite(DATABASE_URL):
+    DB_DIR.mkdir(exist_ok=True)
 
 Base = declarative_base()
 
@@ -108,23 +86,39 @@ class Room(Base):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Проверка пересечений (дата + комната + интервал); покрывающий и уже
+        # упорядоченный по (room_id, start_minute) для поиска свободных окон за день
+        Index("ix_bookings_date_room_time", "date", "room_id", "start_minute", "end_minute"),
+        Index("ix_bookings_user_date", "user_id", "date"),
+        # Диапазон дат + порядок keyset-пагинации
+        Index("ix_bookings_date_start", "date", "start_minute", "id"),
+        # Лента изменений GET /api/bookings/changes
+        Index("ix_bookings_updated", "updated_at", "id"),
+    )
 
     id = Column(String(36), primary_key=True)
     room_id = Column(String(36), ForeignKey("rooms.id"), nullable=False)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
     date = Column(Date, nullable=False)
-    start_time = Column(String(5), nullable=False)
-    end_time = Column(String(5), nullable=False)
+    # Минуты от полуночи: 540 == "09:00"
+    start_minute = Column(Integer, nullable=False)
+    end_minute = Column(Integer, nullable=False)
     title = Column(String(255), nullable=False)
     participants = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Отмененное бронирование не удаляется, а помечается (tombstone), чтобы
+    # клиенты узнали об удалении из ленты изменений
+    deleted_at = Column(DateTime)
     user = relationship("User", back_populates="bookings")
     room = relationship("Room", back_populates="bookings")
+    # Те же адреса построчно - для поиска "где я участник" по индексу;
+    # заполняется из participants перед flush (_sync_participants)
+    participant_entries = relationship("BookingParticipant", cascade="all, delete-orphan")
 
     def to_dict(self):
-        participants = []
-        if self.participants:
-            participants = [p.strip() for p in self.participants.split(",")]
+        participants = split_participants(self.participants)
 
         return {
             "id": self.id,
@@ -132,39 +126,234 @@ class Booking(Base):
             "userId": self.user_id,
             "userName": self.user.first_name + " " + self.user.last_name if self.user else "",
             "date": self.date.isoformat() if self.date else "",
-            "startTime": self.start_time,
-            "endTime": self.end_time,
+            "startTime": format_time(self.start_minute),
+            "endTime": format_time(self.end_minute),
             "title": self.title,
             "participants": participants,
-            "createdAt": self.created_at.isoformat() if self.created_at else ""
+            "createdAt": self.created_at.isoformat() if self.created_at else "",
+            "updatedAt": self.updated_at.isoformat() if self.updated_at else ""
         }
 
-DATABASE_URL = f"sqlite+aiosqlite:///{DB_DIR}/soveshchayka.db"
-engine = create_async_engine(DATABASE_URL, echo=False)
+    def to_event(self):
+        """Тело живого события: только колонки, связи не загружаются"""
+        return {
+            "id": self.id,
+            "roomId": self.room_id,
+            "userId": self.user_id,
+            "date": self.date.isoformat(),
+            "startTime": format_time(self.start_minute),
+            "endTime": format_time(self.end_minute),
+            "title": self.title,
+            "updatedAt": self.updated_at.isoformat() if self.updated_at else ""
+        }
+
+    def to_change(self):
+        """Элемент ленты изменений: бронирование целиком или только tombstone"""
+        if self.deleted_at:
+            return {"id": self.id, "deleted": True, "updatedAt": self.updated_at.isoformat()}
+        return {**self.to_dict(), "deleted": False}
+
+class BookingParticipant(Base):
+    """Участник бронирования: строка на адрес из Booking.participants"""
+    __tablename__ = "booking_participants"
+    __table_args__ = (
+        # Встречи, куда приглашен адрес (GET /api/users/{id}/agenda)
+        Index("ix_booking_participants_email", "email", "booking_id"),
+    )
+
+    booking_id = Column(String(36), ForeignKey("bookings.id", ondelete="CASCADE"), primary_key=True)
+    # В нижнем регистре (participant_emails)
+    email = Column(String(120), primary_key=True)
+
+
+def _sync_participants(session, flush_context, instances):
+    """before_flush: строки booking_participants повторяют CSV participants"""
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Booking) and inspect_state(obj).attrs.participants.history.has_changes():
+            obj.participant_entries = [BookingParticipant(email=email) for email in participant_emails(obj.participants)]
+
+
+event.listen(Session, "before_flush", _sync_participants)
+
+class BookingDeletion(Base):
+    """
+    Запись об окончательно удаленном бронировании: вместе с комнатой или
+    пользователем строки bookings удаляются каскадом и tombstone-а не остается.
+    Лента изменений отдает эти записи как удаления
+    """
+    __tablename__ = "booking_deletions"
+    __table_args__ = (
+        # Порядок ленты изменений - как ix_bookings_updated
+        Index("ix_booking_deletions_updated", "updated_at", "id"),
+    )
+
+    # id удаленного бронирования; updated_at - время удаления (имя как у Booking
+    # для общего курсора ленты)
+    id = Column(String(36), primary_key=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_change(self):
+        return {"id": self.id, "deleted": True, "updatedAt": self.updated_at.isoformat()}
+
+
+def _record_booking_deletions(session, flush_context, instances):
+    """before_flush: каждое удаление строки bookings оставляет BookingDeletion"""
+    now = datetime.utcnow()
+    for obj in list(session.deleted):
+        if isinstance(obj, Booking):
+            session.add(BookingDeletion(id=obj.id, updated_at=now))
+
+
+event.listen(Session, "before_flush", _record_booking_deletions)
+
+class BookingDailyRollup(Base):
+    """Сводка живых бронирований комнаты за день (app/utils/booking_rollup.py)"""
+    __tablename__ = "booking_daily_rollup"
+    __table_args__ = (
+        # Диапазон дат по всем комнатам; (room_id, date) - первичный ключ
+        Index("ix_booking_daily_rollup_date", "date", "room_id"),
+    )
+
+    # Без внешнего ключа: сводка производная, при удалении комнаты ее строки
+    # удаляются вместе с бронированиями
+    room_id = Column(String(36), primary_key=True)
+    date = Column(Date, primary_key=True)
+    bookings = Column(Integer, nullable=False, default=0)
+    booked_minutes = Column(Integer, nullable=False, default=0)
+    # Минуты внутри рабочего окна ROLLUP_DAY_START..ROLLUP_DAY_END - для загрузки
+    working_minutes = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+# Пересечения запрещает сама БД: проверка в приложении (check-then-insert)
+# подвержена гонке между воркерами. SQLite сериализует писателей, поэтому триггер
+# выполняется атомарно со вставкой; в PostgreSQL - exclusion constraint.
+BOOKING_OVERLAP_CONSTRAINT = "bookings_no_overlap"
+
+_OVERLAP_CONDITION = """
+    SELECT 1 FROM bookings
+    WHERE room_id = NEW.room_id AND date = NEW.date
+      AND start_minute < NEW.end_minute AND end_minute > NEW.start_minute
+      AND deleted_at IS NULL
+"""
+
+event.listen(Booking.__table__, "after_create", DDL(f"""
+CREATE TRIGGER IF NOT EXISTS {BOOKING_OVERLAP_CONSTRAINT}_insert
+BEFORE INSERT ON bookings
+WHEN EXISTS ({_OVERLAP_CONDITION})
+BEGIN SELECT RAISE(ABORT, '{BOOKING_OVERLAP_CONSTRAINT}'); END
+""").execute_if(dialect="sqlite"))
+
+event.listen(Booking.__table__, "after_create", DDL(f"""
+CREATE TRIGGER IF NOT EXISTS {BOOKING_OVERLAP_CONSTRAINT}_update
+BEFORE UPDATE OF room_id, date, start_minute, end_minute ON bookings
+WHEN EXISTS ({_OVERLAP_CONDITION} AND id != NEW.id)
+BEGIN SELECT RAISE(ABORT, '{BOOKING_OVERLAP_CONSTRAINT}'); END
+""").execute_if(dialect="sqlite"))
+
+event.listen(Booking.__table__, "after_create", DDL(
+    "CREATE EXTENSION IF NOT EXISTS btree_gist"
+).execute_if(dialect="postgresql"))
+
+event.listen(Booking.__table__, "after_create", DDL(f"""
+ALTER TABLE bookings ADD CONSTRAINT {BOOKING_OVERLAP_CONSTRAINT}
+EXCLUDE USING gist (room_id WITH =, date WITH =, int4range(start_minute, end_minute) WITH &&)
+WHERE (deleted_at IS NULL)
+""").execute_if(dialect="postgresql"))
+
+# Кэш занятости (room_id, date) и живые события узнают о закоммиченных
+# изменениях бронирований; изменения комнат, ролей и пользователей идут в шину инвалидации
+install_occupancy_invalidation(Booking)
+install_booking_events(Booking)
+install_entity_invalidation({Room: "rooms", Role: "roles", User: "users"})
+# Дневные сводки обновляются в той же транзакции, что и бронирования
+install_booking_rollup(Booking, Room, BookingDailyRollup)
+
+engine = create_engine(DATABASE_URL)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_db():
     async with async_session() as session:
         yield session
 
-async def init_db():
-    print("🔄 Создание таблиц...")
+async def init_db(demo_data: bool = True) -> bool:
+    """
+    Схема, роли и (demo_data) демо-данные. При старте приложения не вызывается -
+    только явно: python -m app.cli init-db / seed-demo.
+    True, если схема создана в пустой базе (ее можно пометить alembic stamp head)
+    """
+    logger.info("Создание таблиц")
     try:
         async with engine.begin() as conn:
+            created = not await conn.run_sync(lambda sync_conn: inspect_state(sync_conn).get_table_names())
             await conn.run_sync(Base.metadata.create_all)
-        print("✅ Таблицы созданы успешно")
+            # create_all добавил таблицу сводок к базе с бронированиями - заполняем
+            if await booking_rollups_missing(conn):
+                logger.info("Заполнение дневных сводок: %s строк", await rebuild_booking_rollups(conn))
+            if await booking_participants_missing(conn):
+                logger.info("Заполнение участников бронирований: %s строк", await backfill_booking_participants(conn))
+        logger.info("Таблицы созданы успешно")
         
         await init_roles()
-        await init_default_data()
+        if demo_data:
+            await init_default_data()
+        return created
         
     except Exception as e:
-        print(f"❌ Ошибка при создании таблиц: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Ошибка при создании таблиц")
         raise
 
+def schema_problems(connection) -> list:
+    """Таблицы и колонки моделей, которых нет в БД (синхронное соединение, для run_sync)"""
+    inspector = inspect_state(connection)
+    existing = set(inspector.get_table_names())
+    problems = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            problems.append(f"no table {table.name}")
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column.name for column in table.columns if column.name not in columns]
+        if missing:
+            problems.append(f"no columns {table.name}.{{{', '.join(missing)}}}")
+    return problems
+
+async def check_schema():
+    """
+    Проверка при старте воркера (несколько запросов к каталогу): схема создана
+    и мигрирована, иначе RuntimeError с командой, которую нужно выполнить
+    """
+    async with engine.connect() as conn:
+        problems = await conn.run_sync(schema_problems)
+    if problems:
+        raise RuntimeError(
+            f"Database schema is not ready ({'; '.join(problems)}): "
+            "run `python -m app.cli init-db` for a new database or `alembic upgrade head` for an existing one"
+        )
+
+async def booking_participants_missing(conn) -> bool:
+    """Участники есть в CSV, а таблица участников пуста - ее только что создали на старой базе"""
+    has_entries = await conn.scalar(select(BookingParticipant.booking_id).limit(1))
+    has_participants = await conn.scalar(
+        select(Booking.id).where(Booking.participants.is_not(None), Booking.participants != "").limit(1)
+    )
+    return has_entries is None and has_participants is not None
+
+async def backfill_booking_participants(conn) -> int:
+    """booking_participants из CSV participants всех бронирований"""
+    rows = await conn.execute(
+        select(Booking.id, Booking.participants).where(Booking.participants.is_not(None), Booking.participants != "")
+    )
+    entries = [
+        {"booking_id": booking_id, "email": email}
+        for booking_id, participants in rows
+        for email in participant_emails(participants)
+    ]
+    if entries:
+        await conn.execute(BookingParticipant.__table__.insert(), entries)
+    return len(entries)
+
 async def init_roles():
-    print("👥 Инициализация ролей...")
+    logger.info("Инициализация ролей")
     async with async_session() as session:
         from sqlalchemy import select
         try:
@@ -174,28 +363,29 @@ async def init_roles():
                 {"name": "admin", "description": "Администратор"}
             ]
             
+            # Существующие роли - одним запросом, а не SELECT на каждую
+            existing = set((await session.execute(
+                select(Role.name).where(Role.name.in_([role["name"] for role in roles_to_create]))
+            )).scalars())
             for role_data in roles_to_create:
-                existing = await session.execute(
-                    select(Role).where(Role.name == role_data["name"])
-                )
-                if not existing.scalar():
+                if role_data["name"] not in existing:
                     role = Role(
                         name=role_data["name"],
                         description=role_data["description"]
                     )
                     session.add(role)
-                    print(f"  ✅ Создана роль: {role_data['name']}")
+                    logger.info("Создана роль: %s", role_data["name"])
             
             await session.commit()
-            print("✅ Роли инициализированы")
+            logger.info("Роли инициализированы")
             
         except Exception as e:
-            print(f"❌ Ошибка при создании ролей: {e}")
+            logger.exception("Ошибка при создании ролей")
             await session.rollback()
             raise
 
 async def init_default_data():
-    print("📦 Инициализация демо-данных...")
+    logger.info("Инициализация демо-данных")
     async with async_session() as session:
         from sqlalchemy import select
         from sqlalchemy.sql import func
@@ -205,7 +395,7 @@ async def init_default_data():
             # Проверяем пользователей
             user_check = await session.execute(select(func.count(User.id)))
             if user_check.scalar() == 0:
-                print("👤 Создаем демо-пользователей...")
+                logger.info("Создаем демо-пользователей")
                 
                 # Получаем роли
                 admin_role = await session.execute(select(Role).where(Role.name == "admin"))
@@ -214,19 +404,14 @@ async def init_default_data():
                 user_role = user_role.scalar()
                 
                 if not admin_role or not user_role:
-                    print("❌ Роли не найдены, создаем заново...")
+                    logger.warning("Роли не найдены, создаем заново")
                     await init_roles()
                     admin_role = await session.execute(select(Role).where(Role.name == "admin"))
                     admin_role = admin_role.scalar()
                     user_role = await session.execute(select(Role).where(Role.name == "user"))
                     user_role = user_role.scalar()
 
-                def hash_pass(password):
-                    salt = bcrypt.gensalt()
-                    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-                    return hashed.decode('utf-8')
-                
-                hashed_password = hash_pass("password123")
+                hashed_password = await hash_password("password123")
                 
                 users = [
                     User(
@@ -256,12 +441,12 @@ async def init_default_data():
                 ]
                 session.add_all(users)
                 await session.commit()
-                print(f"✅ Создано {len(users)} пользователей")
+                logger.info("Создано %s пользователей", len(users))
 
             # Проверяем комнаты
             room_check = await session.execute(select(func.count(Room.id)))
             if room_check.scalar() == 0:
-                print("🏢 Создаем демо-комнаты...")
+                logger.info("Создаем демо-комнаты")
                 rooms = [
                     Room(
                         id="room_001", 
@@ -294,12 +479,12 @@ async def init_default_data():
                 ]
                 session.add_all(rooms)
                 await session.commit()
-                print(f"✅ Создано {len(rooms)} комнат")
+                logger.info("Создано %s комнат", len(rooms))
 
             # Проверяем бронирования
             booking_check = await session.execute(select(func.count(Booking.id)))
             if booking_check.scalar() == 0:
-                print("📅 Создаем демо-бронирования...")
+                logger.info("Создаем демо-бронирования")
                 today = datetime.now().date()
                 tomorrow = today + timedelta(days=1)
                 
@@ -309,8 +494,8 @@ async def init_default_data():
                         room_id="room_001",
                         user_id="user_001",
                         date=today,
-                        start_time="09:00",
-                        end_time="10:00",
+                        start_minute=540,
+                        end_minute=600,
                         title="Планерка отдела",
                         participants=""
                     ),
@@ -319,8 +504,8 @@ async def init_default_data():
                         room_id="room_001", 
                         user_id="user_002",
                         date=today,
-                        start_time="11:00",
-                        end_time="12:30",
+                        start_minute=660,
+                        end_minute=750,
                         title="Презентация проекта",
                         participants="alex@company.com, manager@company.com"
                     ),
@@ -329,19 +514,19 @@ async def init_default_data():
                         room_id="room_002",
                         user_id="admin_001",
                         date=tomorrow,
-                        start_time="14:00",
-                        end_time="15:30",
+                        start_minute=840,
+                        end_minute=930,
                         title="Совещание с клиентом",
                         participants="client@company.com"
                     )
                 ]
                 session.add_all(bookings)
                 await session.commit()
-                print(f"✅ Создано {len(bookings)} бронирований")
+                logger.info("Создано %s бронирований", len(bookings))
             
-            print("✅ Демо-данные успешно инициализированы")
+            logger.info("Демо-данные успешно инициализированы")
             
         except Exception as e:
-            print(f"❌ Ошибка при создании демо-данных: {e}")
+            logger.exception("Ошибка при создании демо-данных")
             await session.rollback()
             raise
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Легкие строки для списочных чтений бронирований.
+
+Core select отдает кортежи (без identity map и инструментированных атрибутов),
+из них собираются __slots__-dataclass'ы, а orjson сериализует их сам, без
+промежуточных dict. Имена полей совпадают с ключами JSON Booking.to_dict();
+date/datetime остаются объектами - orjson пишет их в том же ISO-формате.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional
+
+from app.utils.booking_time import MINUTES_PER_DAY, format_time
+
+# "HH:MM" для каждой минуты суток - без форматирования на каждую строку
+_TIMES = tuple(format_time(minute) for minute in range(MINUTES_PER_DAY + 1))
+
+
+def minutes_to_time(minutes: int) -> str:
+    return _TIMES[minutes] if 0 <= minutes <= MINUTES_PER_DAY else format_time(minutes)
+
+
+def split_participants(participants: Optional[str]) -> List[str]:
+    """
+    Единственный разбор CSV участников: поле participants в ответах как было
+    (split по запятой + strip, пустые элементы сохраняются) и основа для
+    participant_emails
+    """
+    if not participants:
+        return []
+    return [p.strip() for p in participants.split(",")]
+
+
+def participant_emails(participants: Optional[str]) -> List[str]:
+    """Адреса для booking_participants из split_participants: в нижнем регистре, без пустых и повторов"""
+    emails = []
+    for participant in split_participants(participants):
+        email = participant.lower()
+        if email and email not in emails:
+            emails.append(email)
+    return emails
+
+
+@dataclass(slots=True)
+class BookingRow:
+    id: str
+    roomId: str
+    userId: str
+    userName: str
+    date: date
+    startTime: str
+    endTime: str
+    title: str
+    participants: List[str]
+    createdAt: Optional[datetime]
+    updatedAt: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row) -> "BookingRow":
+        """Кортеж из BookingRepository.booking_rows_query()"""
+        booking_id, room_id, user_id, user_name, booking_date, start_minute, end_minute, title, participants, created_at, updated_at = row
+        return cls(
+            booking_id, room_id, user_id, user_name, booking_date,
+            minutes_to_time(start_minute), minutes_to_time(end_minute),
+            title, split_participants(participants),
+            created_at or "", updated_at or "",
+        )
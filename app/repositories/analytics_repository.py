@@ -0,0 +1,122 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_, case, func, literal_column, union_all
+from datetime import date
+from typing import Dict, List, Tuple
+
+from app.models import Booking, BookingDailyRollup, Room, User
+from app.utils.booking_rollup import ROLLUP_DAY_START, ROLLUP_DAY_END
+
+# Ключ группировки в SQL; day/week/month/total сворачиваются из дней в сервисе
+GROUP_COLUMNS = {
+    "room": Booking.room_id,
+    "user": Booking.user_id,
+    "date": Booking.date,
+}
+
+
+def overlap_minutes(low, high):
+    """Минуты бронирования внутри окна [low, high) - без LEAST/GREATEST, одинаково в SQLite и PostgreSQL"""
+    start = case((Booking.start_minute > low, Booking.start_minute), else_=low)
+    end = case((Booking.end_minute < high, Booking.end_minute), else_=high)
+    return case((end > start, end - start), else_=0)
+
+
+class AnalyticsRepository:
+    @staticmethod
+    async def aggregate(session: AsyncSession, group: str, date_from: date, date_to: date, room_id: str = None, day_start: int = 0, day_end: int = 24 * 60) -> Dict[object, Tuple[int, int, int, float]]:
+        """
+        GROUP BY по живым бронированиям за [date_from, date_to]:
+        ключ -> (бронирований, минут, минут в рабочем окне, выручка).
+        Выручка - Room.price (за час) x длительность по текущей цене комнаты.
+        По комнатам и дням в стандартном рабочем окне читаются дневные сводки
+        """
+        if group != "user" and (day_start, day_end) == (ROLLUP_DAY_START, ROLLUP_DAY_END):
+            return await AnalyticsRepository.aggregate_rollups(session, group, date_from, date_to, room_id)
+        column = GROUP_COLUMNS[group]
+        duration = Booking.end_minute - Booking.start_minute
+        query = (
+            select(
+                column,
+                func.count(Booking.id),
+                func.sum(duration),
+                func.sum(overlap_minutes(day_start, day_end)),
+                func.sum(func.coalesce(Room.price, 0) * duration) / 60.0,
+            )
+            .join(Room, Room.id == Booking.room_id)
+            .where(Booking.date >= date_from, Booking.date <= date_to, Booking.deleted_at.is_(None))
+            .group_by(column)
+        )
+        if room_id:
+            query = query.where(Booking.room_id == room_id)
+        result = await session.execute(query)
+        return {
+            key: (count, minutes or 0, working or 0, float(revenue or 0))
+            for key, count, minutes, working, revenue in result
+        }
+
+    @staticmethod
+    async def aggregate_rollups(session: AsyncSession, group: str, date_from: date, date_to: date, room_id: str = None) -> Dict[object, Tuple[int, int, int, float]]:
+        """То же, что aggregate, по booking_daily_rollup: строка на комнату в день вместо строки на бронирование"""
+        column = BookingDailyRollup.room_id if group == "room" else BookingDailyRollup.date
+        query = (
+            select(
+                column,
+                func.sum(BookingDailyRollup.bookings),
+                func.sum(BookingDailyRollup.booked_minutes),
+                func.sum(BookingDailyRollup.working_minutes),
+                func.sum(BookingDailyRollup.revenue),
+            )
+            .where(BookingDailyRollup.date >= date_from, BookingDailyRollup.date <= date_to)
+            .group_by(column)
+        )
+        if room_id:
+            query = query.where(BookingDailyRollup.room_id == room_id)
+        result = await session.execute(query)
+        return {
+            key: (count or 0, minutes or 0, working or 0, float(revenue or 0))
+            for key, count, minutes, working, revenue in result
+        }
+
+    @staticmethod
+    async def hourly(session: AsyncSession, date_from: date, date_to: date, room_id: str = None) -> Dict[int, Tuple[int, int]]:
+        """Час суток -> (бронирований, пересекающих час; занятых минут в этом часе)"""
+        hours = union_all(*(select(literal_column(str(hour)).label("hour")) for hour in range(24))).subquery()
+        low = hours.c.hour * 60
+        query = (
+            select(hours.c.hour, func.count(Booking.id), func.sum(overlap_minutes(low, low + 60)))
+            .select_from(hours)
+            .join(Booking, and_(Booking.start_minute < low + 60, Booking.end_minute > low))
+            .where(Booking.date >= date_from, Booking.date <= date_to, Booking.deleted_at.is_(None))
+            .group_by(hours.c.hour)
+        )
+        if room_id:
+            query = query.where(Booking.room_id == room_id)
+        result = await session.execute(query)
+        return {hour: (count, minutes or 0) for hour, count, minutes in result}
+
+    @staticmethod
+    async def get_totals(session: AsyncSession) -> Tuple[int, int, int]:
+        """(пользователей, комнат, живых бронирований) за один запрос: три скалярных подзапроса"""
+        result = await session.execute(select(
+            select(func.count(User.id)).scalar_subquery(),
+            select(func.count(Room.id)).scalar_subquery(),
+            select(func.coalesce(func.sum(BookingDailyRollup.bookings), 0)).scalar_subquery(),
+        ))
+        return tuple(result.one())
+
+    @staticmethod
+    async def get_room_names(session: AsyncSession, room_id: str = None) -> Dict[str, str]:
+        query = select(Room.id, Room.name).order_by(Room.name)
+        if room_id:
+            query = query.where(Room.id == room_id)
+        result = await session.execute(query)
+        return dict(result.all())
+
+    @staticmethod
+    async def get_user_names(session: AsyncSession, user_ids: List[str]) -> Dict[str, str]:
+        if not user_ids:
+            return {}
+        result = await session.execute(
+            select(User.id, User.first_name + " " + User.last_name).where(User.id.in_(user_ids))
+        )
+        return dict(result.all())
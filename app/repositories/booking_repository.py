@@ -1,48 +1,181 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models import Booking, Room, User
+from sqlalchemy import select, exists, func, tuple_, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from app.models import Booking, BookingDeletion, BookingParticipant, Room, User
+from app.models.models import BOOKING_OVERLAP_CONSTRAINT
+from app.models.rows import BookingRow
+from app.utils.occupancy_cache import occupancy_cache
 from datetime import date, datetime
+from typing import List
 import uuid
 
 class BookingRepository:
     @staticmethod
-    async def get_all_bookings(session: AsyncSession):
-        result = await session.execute(select(Booking))
-        return result.scalars().all()
+    def booking_rows_query():
+        """
+        Колонки BookingRow одним Core-запросом: без ORM-объектов, имя автора
+        склеивает БД (LEFT JOIN - бронирование без автора отдается с "")
+        """
+        user_name = func.coalesce(User.first_name + " " + User.last_name, "")
+        return (
+            select(
+                Booking.id, Booking.room_id, Booking.user_id, user_name, Booking.date,
+                Booking.start_minute, Booking.end_minute, Booking.title, Booking.participants,
+                Booking.created_at, Booking.updated_at
+            )
+            .outerjoin(User, User.id == Booking.user_id)
+            .where(Booking.deleted_at.is_(None))
+        )
+
+    @staticmethod
+    def filter_bookings(query, room_id: str = None, user_id: str = None, date_from: date = None, date_to: date = None):
+        if room_id:
+            query = query.where(Booking.room_id == room_id)
+        if user_id:
+            query = query.where(Booking.user_id == user_id)
+        if date_from:
+            query = query.where(Booking.date >= date_from)
+        if date_to:
+            query = query.where(Booking.date <= date_to)
+        return query
+
+    @staticmethod
+    async def get_all_bookings(session: AsyncSession, room_id: str = None, user_id: str = None, booking_date: date = None, date_from: date = None, date_to: date = None) -> List[BookingRow]:
+        query = BookingRepository.filter_bookings(BookingRepository.booking_rows_query(), room_id, user_id, date_from, date_to)
+        if booking_date:
+            query = query.where(Booking.date == booking_date)
+        result = await session.execute(query)
+        return [BookingRow.from_row(row) for row in result]
+
+    @staticmethod
+    async def get_bookings_page(session: AsyncSession, limit: int, after: tuple = None, date_from: date = None, date_to: date = None, room_id: str = None, user_id: str = None) -> List[BookingRow]:
+        """Страница бронирований в порядке (date, start_minute, id) после ключа after"""
+        query = BookingRepository.filter_bookings(BookingRepository.booking_rows_query(), room_id, user_id, date_from, date_to)
+        if after:
+            query = query.where(tuple_(Booking.date, Booking.start_minute, Booking.id) > tuple_(*after))
+        query = query.order_by(Booking.date, Booking.start_minute, Booking.id).limit(limit)
+        result = await session.execute(query)
+        return [BookingRow.from_row(row) for row in result]
+
+    @staticmethod
+    async def get_agenda(session: AsyncSession, user_id: str, email: str, date_from: date = None, date_to: date = None) -> List[BookingRow]:
+        """
+        Бронирования пользователя и встречи, куда он приглашен, в порядке (date, start_minute).
+        Обе части - поиск по индексу (ix_bookings_user_date, ix_booking_participants_email),
+        объединенные UNION, затем выборка по первичному ключу
+        """
+        owned = BookingRepository.filter_bookings(select(Booking.id), user_id=user_id, date_from=date_from, date_to=date_to)
+        invited = select(BookingParticipant.booking_id).where(BookingParticipant.email == email.strip().lower())
+        query = BookingRepository.filter_bookings(BookingRepository.booking_rows_query(), date_from=date_from, date_to=date_to)
+        query = query.where(Booking.id.in_(union(owned, invited))).order_by(Booking.date, Booking.start_minute, Booking.id)
+        result = await session.execute(query)
+        return [BookingRow.from_row(row) for row in result]
 
     @staticmethod
     async def get_booking_by_id(session: AsyncSession, booking_id: str):
-        result = await session.execute(select(Booking).where(Booking.id == booking_id))
+        result = await session.execute(
+            select(Booking).options(joinedload(Booking.user)).where(Booking.id == booking_id, Booking.deleted_at.is_(None))
+        )
         return result.scalar()
 
     @staticmethod
     async def get_room_bookings(session: AsyncSession, room_id: str):
-        result = await session.execute(select(Booking).where(Booking.room_id == room_id))
+        result = await session.execute(select(Booking).where(Booking.room_id == room_id, Booking.deleted_at.is_(None)))
         return result.scalars().all()
 
     @staticmethod
     async def get_user_bookings(session: AsyncSession, user_id: str):
-        result = await session.execute(select(Booking).where(Booking.user_id == user_id))
+        result = await session.execute(select(Booking).where(Booking.user_id == user_id, Booking.deleted_at.is_(None)))
         return result.scalars().all()
 
     @staticmethod
     async def get_bookings_by_date(session: AsyncSession, booking_date: date):
-        result = await session.execute(select(Booking).where(Booking.date == booking_date))
+        result = await session.execute(select(Booking).where(Booking.date == booking_date, Booking.deleted_at.is_(None)))
         return result.scalars().all()
 
     @staticmethod
-    async def check_availability(session: AsyncSession, room_id: str, booking_date: date, start_time: str, end_time: str):
-        bookings = await BookingRepository.get_room_bookings(session, room_id)
-        day_bookings = [b for b in bookings if b.date == booking_date]
+    def conflict_exists(room_id, booking_date: date, start_minute: int, end_minute: int):
+        """EXISTS по пересекающимся бронированиям (индекс ix_bookings_date_room_time)"""
+        return exists().where(
+            Booking.room_id == room_id,
+            Booking.date == booking_date,
+            Booking.start_minute < end_minute,
+            Booking.end_minute > start_minute,
+            Booking.deleted_at.is_(None)
+        )
+
+    @staticmethod
+    async def get_day_occupancy(session: AsyncSession, booking_date: date, room_ids: list) -> dict:
+        """
+        room_id -> DayOccupancy на дату. Чего нет в кэше - догружается одним
+        запросом (покрывающий индекс ix_bookings_date_room_time)
+        """
+        occupancy = {}
+        missing = []
+        for room_id in room_ids:
+            entry = occupancy_cache.get(room_id, booking_date)
+            if entry is None:
+                missing.append(room_id)
+            else:
+                occupancy[room_id] = entry
+        if not missing:
+            return occupancy
+
+        generation = occupancy_cache.generation
+        query = select(Booking.room_id, Booking.start_minute, Booking.end_minute).where(
+            Booking.date == booking_date,
+            Booking.deleted_at.is_(None)
+        )
+        # Много комнат - дешевле прочитать весь день, чем строить огромный IN
+        if len(missing) <= 100:
+            query = query.where(Booking.room_id.in_(missing))
+        intervals = {room_id: [] for room_id in missing}
+        for room_id, start_minute, end_minute in await session.execute(query):
+            if room_id in intervals:
+                intervals[room_id].append((start_minute, end_minute))
+        for room_id, room_intervals in intervals.items():
+            occupancy[room_id] = occupancy_cache.store(room_id, booking_date, room_intervals, generation)
+        return occupancy
+
+    @staticmethod
+    async def check_availability(session: AsyncSession, room_id: str, booking_date: date, start_minute: int, end_minute: int):
+        if occupancy_cache.enabled:
+            occupancy = await BookingRepository.get_day_occupancy(session, booking_date, [room_id])
+            # "Свободно" по маске точно для этого воркера; другой воркер мог успеть
+            # занять слот - тогда вставку отклонит БД. "Занято" перепроверяем SQL
+            if occupancy[room_id].is_free(start_minute, end_minute):
+                return True
+        result = await session.execute(
+            select(BookingRepository.conflict_exists(room_id, booking_date, start_minute, end_minute))
+        )
+        return not result.scalar()
+
+    @staticmethod
+    def is_overlap_error(error: IntegrityError) -> bool:
+        """Отказ триггера SQLite / exclusion constraint PostgreSQL из-за пересечения"""
+        return BOOKING_OVERLAP_CONSTRAINT in str(error.orig)
 
-        for booking in day_bookings:
-            if not (end_time <= booking.start_time or start_time >= booking.end_time):
+    @staticmethod
+    async def add_booking(session: AsyncSession, booking: Booking) -> bool:
+        """
+        Вставка с коммитом. Предварительная проверка check_availability
+        не защищает от гонки - итоговое решение принимает БД.
+        False, если слот успел занять другой запрос.
+        """
+        session.add(booking)
+        try:
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            if BookingRepository.is_overlap_error(e):
                 return False
+            raise
         return True
 
     @staticmethod
-    async def create_booking(session: AsyncSession, room_id: str, user_id: str, booking_date: date, start_time: str, end_time: str, title: str, participants: list = None):
-        available = await BookingRepository.check_availability(session, room_id, booking_date, start_time, end_time)
+    async def create_booking(session: AsyncSession, room_id: str, user_id: str, booking_date: date, start_minute: int, end_minute: int, title: str, participants: list = None):
+        available = await BookingRepository.check_availability(session, room_id, booking_date, start_minute, end_minute)
         if not available:
             return None
 
@@ -51,26 +184,26 @@ class BookingRepository:
             room_id=room_id,
             user_id=user_id,
             date=booking_date,
-            start_time=start_time,
-            end_time=end_time,
+            start_minute=start_minute,
+            end_minute=end_minute,
             title=title,
             participants=",".join(participants) if participants else ""
         )
-        session.add(new_booking)
-        await session.commit()
+        if not await BookingRepository.add_booking(session, new_booking):
+            return None
         await session.refresh(new_booking)
         return new_booking
 
     @staticmethod
-    async def update_booking(session: AsyncSession, booking_id: str, start_time: str = None, end_time: str = None, title: str = None):
+    async def update_booking(session: AsyncSession, booking_id: str, start_minute: int = None, end_minute: int = None, title: str = None):
         booking = await BookingRepository.get_booking_by_id(session, booking_id)
         if not booking:
             return None
 
-        if start_time:
-            booking.start_time = start_time
-        if end_time:
-            booking.end_time = end_time
+        if start_minute is not None:
+            booking.start_minute = start_minute
+        if end_minute is not None:
+            booking.end_minute = end_minute
         if title:
             booking.title = title
 
@@ -84,6 +217,37 @@ class BookingRepository:
         if not booking:
             return False
 
-        await session.delete(booking)
+        BookingRepository.mark_deleted(booking)
         await session.commit()
-        return True
\ No newline at end of file
+        return True
+
+    @staticmethod
+    def mark_deleted(booking: Booking):
+        """Мягкое удаление: строка остается tombstone-ом для ленты изменений"""
+        booking.deleted_at = booking.updated_at = datetime.utcnow()
+
+    @staticmethod
+    async def get_changes(session: AsyncSession, limit: int, after: tuple = None):
+        """
+        Изменения в порядке (updated_at, id) после ключа after, включая
+        tombstone-ы и BookingDeletion (бронирования, удаленные каскадом вместе
+        с комнатой или пользователем). Без after - только живые бронирования
+        (первая синхронизация)
+        """
+        query = select(Booking).options(joinedload(Booking.user))
+        if not after:
+            query = query.where(Booking.deleted_at.is_(None)).order_by(Booking.updated_at, Booking.id).limit(limit)
+            return (await session.execute(query)).scalars().all()
+
+        query = query.where(tuple_(Booking.updated_at, Booking.id) > tuple_(*after))
+        bookings = (await session.execute(query.order_by(Booking.updated_at, Booking.id).limit(limit))).scalars().all()
+        deletions = (await session.execute(
+            select(BookingDeletion)
+            .where(tuple_(BookingDeletion.updated_at, BookingDeletion.id) > tuple_(*after))
+            .order_by(BookingDeletion.updated_at, BookingDeletion.id)
+            .limit(limit)
+        )).scalars().all()
+        if not deletions:
+            return bookings
+        # Оба списка упорядочены по (updated_at, id) - общий порядок курсора
+        return sorted([*bookings, *deletions], key=lambda change: (change.updated_at, change.id))[:limit]
\ No newline at end of file
@@ -1,33 +1,147 @@
+import logging
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, exists, and_, or_, case, func, literal, union_all
 from typing import Optional, List
 
-from app.models import Room
+from app.models import Room, Booking
+
+logger = logging.getLogger(__name__)
 
 class RoomRepository:
     @staticmethod
     async def get_all_rooms(session: AsyncSession) -> List[Room]:
         try:
-            print("📦 RoomRepository: Запрос всех комнат...")
             result = await session.execute(select(Room))
             rooms = list(result.scalars().all())
-            print(f"📦 RoomRepository: Найдено {len(rooms)} комнат")
+            logger.debug("Найдено %d комнат", len(rooms))
             
-            for room in rooms:
-                print(f"  - {room.name} (id: {room.id})")
+            if logger.isEnabledFor(logging.DEBUG):
+                for room in rooms:
+                    logger.debug("  - %s (id: %s)", room.name, room.id)
             
             return rooms
-        except Exception as e:
-            print(f"❌ RoomRepository error: {str(e)}")
+        except Exception:
+            logger.exception("Ошибка при получении комнат")
             raise
     
+    @staticmethod
+    async def get_available_rooms(session: AsyncSession, booking_date, start_minute: int, end_minute: int, min_capacity: int = None) -> List[Room]:
+        """Комнаты без пересекающихся бронирований - один запрос с NOT EXISTS"""
+        busy = exists().where(
+            Booking.room_id == Room.id,
+            Booking.date == booking_date,
+            Booking.start_minute < end_minute,
+            Booking.end_minute > start_minute,
+            Booking.deleted_at.is_(None)
+        )
+        query = select(Room).where(~busy)
+        if min_capacity:
+            query = query.where(Room.capacity >= min_capacity)
+        result = await session.execute(query.order_by(Room.capacity, Room.name))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_rooms_by_capacity(session: AsyncSession, min_capacity: int = None) -> List[Room]:
+        query = select(Room)
+        if min_capacity:
+            query = query.where(Room.capacity >= min_capacity)
+        result = await session.execute(query.order_by(Room.capacity, Room.name))
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def get_free_gaps(
+        session: AsyncSession,
+        booking_date,
+        day_start: int,
+        day_end: int,
+        duration: int,
+        limit: int,
+        min_capacity: int = None,
+        room_ids: List[str] = None
+    ):
+        """
+        Первые limit свободных промежутков дня длиной >= duration одним запросом:
+        (room_id, name, capacity, gap_start, gap_end) по возрастанию gap_start.
+
+        Промежутки до каждого бронирования считаются оконной функцией (конец
+        предыдущих бронирований комнаты), плюс хвост после последнего бронирования
+        и комнаты без бронирований в окне (NOT EXISTS). Наружу уходит только
+        limit строк, а не все бронирования дня.
+        """
+        in_window = and_(
+            Booking.date == booking_date,
+            Booking.start_minute < day_end,
+            Booking.end_minute > day_start,
+            Booking.deleted_at.is_(None)
+        )
+        if room_ids is not None:
+            in_window = and_(in_window, Booking.room_id.in_(room_ids))
+        
+        prev_end = func.max(Booking.end_minute).over(
+            partition_by=Booking.room_id,
+            order_by=Booking.start_minute,
+            rows=(None, -1)
+        )
+        day = select(
+            Booking.room_id,
+            Booking.start_minute,
+            Booking.end_minute,
+            prev_end.label("prev_end")
+        ).where(in_window).cte("day_bookings")
+        
+        # GREATEST/LEAST через CASE - одинаково в SQLite и PostgreSQL
+        gap_start = case(
+            (or_(day.c.prev_end.is_(None), day.c.prev_end < day_start), day_start),
+            else_=day.c.prev_end
+        )
+        gap_end = case((day.c.start_minute > day_end, day_end), else_=day.c.start_minute)
+        before = select(
+            day.c.room_id.label("room_id"),
+            gap_start.label("gap_start"),
+            gap_end.label("gap_end")
+        ).where(gap_end - gap_start >= duration)
+        
+        last_end = func.max(day.c.end_minute)
+        tail_start = case((last_end < day_start, day_start), else_=last_end)
+        after = (
+            select(day.c.room_id, tail_start, literal(day_end))
+            .group_by(day.c.room_id)
+            .having(day_end - tail_start >= duration)
+        )
+        
+        empty = select(Room.id, literal(day_start), literal(day_end)).where(
+            ~exists().where(Booking.room_id == Room.id, in_window)
+        )
+        if room_ids is not None:
+            empty = empty.where(Room.id.in_(room_ids))
+        
+        gaps = union_all(before, after, empty).subquery()
+        query = (
+            select(Room.id, Room.name, Room.capacity, gaps.c.gap_start, gaps.c.gap_end)
+            .join(gaps, gaps.c.room_id == Room.id)
+            .order_by(gaps.c.gap_start, Room.capacity, Room.name)
+            .limit(limit)
+        )
+        if min_capacity:
+            query = query.where(Room.capacity >= min_capacity)
+        result = await session.execute(query)
+        return result.all()
+    
+    @staticmethod
+    async def get_rooms_by_ids(session: AsyncSession, room_ids: List[str] = None):
+        """(id, name) комнат в порядке названия; None - все комнаты"""
+        query = select(Room.id, Room.name)
+        if room_ids is not None:
+            query = query.where(Room.id.in_(room_ids))
+        result = await session.execute(query.order_by(Room.name))
+        return result.all()
+    
     @staticmethod
     async def get_room_by_id(session: AsyncSession, room_id: str) -> Optional[Room]:
         room = await session.get(Room, room_id)
-        if room:
-            print(f"📦 RoomRepository: Найдена комната {room.name}")
-        else:
-            print(f"📦 RoomRepository: Комната с ID {room_id} не найдена")
+        if room is None:
+            logger.debug("Комната с ID %s не найдена", room_id)
         return room
     
     @staticmethod
@@ -36,7 +150,7 @@ class RoomRepository:
         session.add(room)
         await session.commit()
         await session.refresh(room)
-        print(f"📦 RoomRepository: Создана комната {room.name}")
+        logger.info("Создана комната %s", room.name, extra={"room_id": room.id})
         return room
     
     @staticmethod
@@ -47,7 +161,7 @@ class RoomRepository:
                 setattr(room, key, value)
             await session.commit()
             await session.refresh(room)
-            print(f"📦 RoomRepository: Обновлена комната {room.name}")
+            logger.info("Обновлена комната %s", room.name, extra={"room_id": room.id})
         return room
     
     @staticmethod
@@ -56,6 +170,6 @@ class RoomRepository:
         if room:
             await session.delete(room)
             await session.commit()
-            print(f"📦 RoomRepository: Удалена комната {room.name}")
+            logger.info("Удалена комната %s", room.name, extra={"room_id": room.id})
             return True
         return False
\ No newline at end of file
@@ -1,44 +1,45 @@
+import logging
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from typing import Optional, List
 
 from app.models import User
 
+logger = logging.getLogger(__name__)
+
 class UserRepository:
     @staticmethod
     async def get_all_users(session: AsyncSession) -> List[User]:
         try:
-            print("📦 Repository: Запрос всех пользователей...")
-            result = await session.execute(select(User))
+            # Роли подгружаются тем же запросом (JOIN), без refresh на каждую строку
+            result = await session.execute(select(User).options(joinedload(User.role)))
             users = list(result.scalars().all())
-            print(f"📦 Repository: Найдено {len(users)} пользователей")
+            logger.debug("Найдено %d пользователей", len(users))
             
-            # Загружаем связанные данные ролей
-            for user in users:
-                await session.refresh(user, ['role'])
-                print(f"  - {user.first_name} {user.last_name} ({user.email}) - роль: {user.role.name if user.role else 'нет'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                for user in users:
+                    logger.debug("  - %s (%s) - роль: %s", user.id, user.email, user.role.name if user.role else "нет")
             
             return users
-        except Exception as e:
-            print(f"❌ Repository error: {str(e)}")
+        except Exception:
+            logger.exception("Ошибка при получении пользователей")
             raise
     
     @staticmethod
     async def get_user_by_id(session: AsyncSession, user_id: str) -> Optional[User]:
-        user = await session.get(User, user_id)
-        if user:
-            await session.refresh(user, ['role'])
-        return user
+        result = await session.execute(
+            select(User).options(joinedload(User.role)).where(User.id == user_id)
+        )
+        return result.scalar()
     
     @staticmethod
     async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]:
         result = await session.execute(
-            select(User).where(User.email == email)
+            select(User).options(joinedload(User.role)).where(User.email == email)
         )
-        user = result.scalar()
-        if user:
-            await session.refresh(user, ['role'])
-        return user
+        return result.scalar()
     
     @staticmethod
     async def create_user(session: AsyncSession, user_data: dict) -> User:
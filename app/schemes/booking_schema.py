@@ -25,4 +25,29 @@ class BookingResponseSchema(BaseModel):
     endTime: str
     title: str
     participants: List[str]
-    createdAt: str
\ No newline at end of file
+    createdAt: str
+    updatedAt: str = ""
+
+class BookingPageSchema(BaseModel):
+    items: List[BookingResponseSchema]
+    nextCursor: Optional[str] = None
+
+class BookingChangeSchema(BaseModel):
+    """Элемент ленты изменений: бронирование целиком или tombstone {id, deleted, updatedAt}"""
+    id: str
+    deleted: bool
+    updatedAt: str
+    roomId: Optional[str] = None
+    userId: Optional[str] = None
+    userName: Optional[str] = None
+    date: Optional[str] = None
+    startTime: Optional[str] = None
+    endTime: Optional[str] = None
+    title: Optional[str] = None
+    participants: Optional[List[str]] = None
+    createdAt: Optional[str] = None
+
+class BookingChangesSchema(BaseModel):
+    changes: List[BookingChangeSchema]
+    nextCursor: str
+    hasMore: bool
\ No newline at end of file
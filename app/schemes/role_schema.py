@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class RoleResponseSchema(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
\ No newline at end of file
@@ -18,5 +18,5 @@ class RoomResponseSchema(BaseModel):
     name: str
     capacity: int
     amenities: str
-    price: float
+    price: Optional[float] = 0
     createdAt: str
\ No newline at end of file
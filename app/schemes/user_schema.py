@@ -16,5 +16,16 @@ class UserResponseSchema(BaseModel):
     role: str
     createdAt: str
 
+class UserAuthResponseSchema(UserResponseSchema):
+    accessToken: str
+    tokenType: str
+    expiresIn: int
+
+class CurrentUserSchema(BaseModel):
+    id: str
+    name: str
+    email: str
+    role: str
+
 class UserRoleUpdateSchema(BaseModel):
     role: str
\ No newline at end of file
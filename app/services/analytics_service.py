@@ -0,0 +1,210 @@
+import logging
+from datetime import date, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.exceptions.analytics_exceptions import InvalidAnalyticsQuery
+from app.exceptions.room_exceptions import RoomNotFound
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.utils.analytics_cache import analytics_cache
+from app.utils.booking_time import format_time, parse_time
+
+logger = logging.getLogger(__name__)
+
+# Диапазон по умолчанию - последние 30 дней; больше 10 лет не считаем
+DEFAULT_ANALYTICS_DAYS = 30
+MAX_ANALYTICS_DAYS = 3660
+GROUP_BY = ("room", "user", "day", "week", "month", "total")
+
+
+def month_end(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def split_periods(date_from: date, date_to: date, today: date):
+    """
+    [date_from, date_to] -> закрытые месяцы (до текущего, кэшируются) и
+    открытый остаток (текущий месяц и будущее, считается каждый раз)
+    """
+    current_month = today.replace(day=1)
+    closed = []
+    start = date_from
+    while start <= date_to and start < current_month:
+        end = min(month_end(start), date_to)
+        closed.append((start, end))
+        start = end + timedelta(days=1)
+    return closed, ((start, date_to) if start <= date_to else None)
+
+
+def bucket_key(day: date, group_by: str) -> str:
+    if group_by == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if group_by == "month":
+        return day.strftime("%Y-%m")
+    if group_by == "total":
+        return "total"
+    return day.isoformat()
+
+
+def add_values(target: list, values) -> None:
+    for index, value in enumerate(values):
+        target[index] += value
+
+
+def analytics_item(values, capacity_minutes: int = None) -> dict:
+    """(бронирований, минут, минут в рабочем окне, выручка) -> JSON; загрузка в % рабочего времени"""
+    bookings, minutes, working, revenue = values
+    return {
+        "bookings": bookings,
+        "bookedMinutes": minutes,
+        "revenue": round(revenue, 2),
+        "utilisation": round(100 * working / capacity_minutes, 1) if capacity_minutes else None,
+    }
+
+
+class AnalyticsService:
+    @staticmethod
+    async def _by_period(name: str, date_from: date, date_to: date, params: tuple, fetch) -> dict:
+        """
+        Сумма агрегатов fetch(start, end) по закрытым месяцам (из кэша) и открытому
+        остатку. fetch возвращает {ключ: (числа...)}; агрегаты складываются поэлементно
+        """
+        closed, open_range = split_periods(date_from, date_to, date.today())
+        parts = []
+        for start, end in closed:
+            key = (name, start, end) + params
+            # Цены комнат входят в выручку, поэтому и версия "rooms";
+            # "booking-rollups" - сводки пересобраны командой app.cli
+            versions = analytics_cache.versions(("bookings:" + start.strftime("%Y-%m"), "rooms", "booking-rollups"))
+            value = analytics_cache.get(key, versions)
+            if value is None:
+                value = await fetch(start, end)
+                analytics_cache.put(key, versions, value)
+            parts.append(value)
+        if open_range:
+            parts.append(await fetch(*open_range))
+
+        merged = {}
+        for part in parts:
+            for key, values in part.items():
+                add_values(merged.setdefault(key, [0] * len(values)), values)
+        return merged
+
+    @staticmethod
+    def _validate_range(date_from: date, date_to: date):
+        date_to = date_to or date.today()
+        date_from = date_from or date_to - timedelta(days=DEFAULT_ANALYTICS_DAYS - 1)
+        if date_from > date_to:
+            raise InvalidAnalyticsQuery("'from' must not be after 'to'")
+        if (date_to - date_from).days >= MAX_ANALYTICS_DAYS:
+            raise InvalidAnalyticsQuery(f"Range must not exceed {MAX_ANALYTICS_DAYS} days")
+        return date_from, date_to
+
+    @staticmethod
+    async def get_summary(
+        session: AsyncSession,
+        date_from: date = None,
+        date_to: date = None,
+        group_by: str = "room",
+        room_id: str = None,
+        day_start: str = "08:00",
+        day_end: str = "20:00"
+    ) -> dict:
+        """
+        Бронирования, занятые минуты, выручка и загрузка за период с группировкой
+        по комнате, пользователю, дню, неделе (с понедельника), месяцу или итогом.
+        Загрузка - доля рабочего окна [day_start, day_end) всех комнат периода
+        """
+        date_from, date_to = AnalyticsService._validate_range(date_from, date_to)
+        if group_by not in GROUP_BY:
+            raise InvalidAnalyticsQuery(f"groupBy must be one of: {', '.join(GROUP_BY)}")
+        try:
+            work_start = parse_time(day_start)
+            work_end = parse_time(day_end)
+        except ValueError as e:
+            raise InvalidAnalyticsQuery(str(e))
+        if work_end <= work_start:
+            raise InvalidAnalyticsQuery("Day end must be after day start")
+
+        rooms = await AnalyticsRepository.get_room_names(session, room_id)
+        if room_id and not rooms:
+            raise RoomNotFound(f"Room {room_id} not found")
+
+        sql_group = group_by if group_by in ("room", "user") else "date"
+
+        async def fetch(start, end):
+            return await AnalyticsRepository.aggregate(session, sql_group, start, end, room_id, work_start, work_end)
+
+        rows = await AnalyticsService._by_period(
+            "summary", date_from, date_to, (sql_group, room_id, work_start, work_end), fetch
+        )
+        days = (date_to - date_from).days + 1
+        window = work_end - work_start
+
+        items = []
+        if group_by == "room":
+            for key, name in rooms.items():
+                items.append({"key": key, "label": name, **analytics_item(rows.get(key, (0, 0, 0, 0.0)), days * window)})
+        elif group_by == "user":
+            names = await AnalyticsRepository.get_user_names(session, list(rows))
+            ordered = sorted(rows.items(), key=lambda item: (-item[1][1], item[0]))
+            for key, values in ordered:
+                items.append({"key": key, "label": names.get(key, ""), **analytics_item(values)})
+        else:
+            # Все корзины периода, в том числе пустые - для графиков
+            buckets = {}
+            for offset in range(days):
+                day = date_from + timedelta(days=offset)
+                bucket = buckets.setdefault(bucket_key(day, group_by), [[0, 0, 0, 0.0], 0])
+                add_values(bucket[0], rows.get(day, ()))
+                bucket[1] += 1
+            for key, (values, bucket_days) in buckets.items():
+                items.append({"key": key, "label": key, **analytics_item(values, len(rooms) * bucket_days * window)})
+
+        totals = [0, 0, 0, 0.0]
+        for values in rows.values():
+            add_values(totals, values)
+        return {
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat(),
+            "groupBy": group_by,
+            "roomId": room_id,
+            "dayStart": format_time(work_start),
+            "dayEnd": format_time(work_end),
+            "totals": analytics_item(totals, len(rooms) * days * window),
+            "items": items,
+        }
+
+    @staticmethod
+    async def get_peak_hours(session: AsyncSession, date_from: date = None, date_to: date = None, room_id: str = None, top: int = 3) -> dict:
+        """
+        Загрузка по часам суток: сколько бронирований захватывает час и какая доля
+        его минут занята во всех комнатах за период. peakHours - top самых занятых
+        """
+        date_from, date_to = AnalyticsService._validate_range(date_from, date_to)
+        rooms = await AnalyticsRepository.get_room_names(session, room_id)
+        if room_id and not rooms:
+            raise RoomNotFound(f"Room {room_id} not found")
+
+        async def fetch(start, end):
+            return await AnalyticsRepository.hourly(session, start, end, room_id)
+
+        rows = await AnalyticsService._by_period("hourly", date_from, date_to, (room_id,), fetch)
+        capacity = len(rooms) * ((date_to - date_from).days + 1) * 60
+        items = []
+        for hour in range(24):
+            bookings, minutes = rows.get(hour, (0, 0))
+            items.append({
+                "hour": format_time(hour * 60),
+                "bookings": bookings,
+                "bookedMinutes": minutes,
+                "utilisation": round(100 * minutes / capacity, 1) if capacity else None,
+            })
+        busiest = sorted((item for item in items if item["bookedMinutes"]), key=lambda item: -item["bookedMinutes"])
+        return {
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat(),
+            "roomId": room_id,
+            "peakHours": [item["hour"] for item in busiest[:top]],
+            "items": items,
+        }
@@ -1,28 +1,87 @@
+import logging
+import os
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import uuid
 
 from app.models import Booking, User, Room
 from app.schemes.booking_schema import BookingCreateSchema
 from app.exceptions.booking_exceptions import BookingNotFound, TimeSlotNotAvailable, InvalidBookingData
+from app.exceptions.user_exceptions import UserNotFound
+from app.repositories.user_repository import UserRepository
 from app.repositories.booking_repository import BookingRepository
+from app.utils.booking_time import parse_time
+from app.utils.cursor import encode_cursor, decode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Транзакция могла получить updated_at раньше, а закоммититься позже уже
+# отданных изменений (ждала блокировку). Поэтому курсор "догнавшего" клиента
+# отстает на это время, и последние секунды присылаются повторно - клиент
+# применяет изменения по id, повтор безопасен
+SYNC_CURSOR_LAG_SECONDS = float(os.getenv("SYNC_CURSOR_LAG_SECONDS", "5"))
 
 class BookingService:
     @staticmethod
-    async def get_all_bookings(session: AsyncSession, room_id=None, user_id=None, booking_date=None):
-        try:
-            print(f"📦 BookingService: Запрос бронирований...")
-            bookings = await BookingRepository.get_all_bookings(session, room_id, user_id, booking_date)
-            print(f"📦 BookingService: Найдено {len(bookings)} бронирований")
-            return bookings
-        except Exception as e:
-            print(f"❌ BookingService error: {str(e)}")
-            raise
+    async def get_all_bookings(session: AsyncSession, room_id=None, user_id=None, booking_date=None, date_from=None, date_to=None):
+        bookings = await BookingRepository.get_all_bookings(session, room_id, user_id, booking_date, date_from, date_to)
+        logger.debug("Найдено %d бронирований", len(bookings))
+        return bookings
+    
+    @staticmethod
+    async def get_bookings_page(session: AsyncSession, limit: int, cursor: str = None, date_from=None, date_to=None, room_id=None, user_id=None):
+        """Страница бронирований (BookingRow) и курсор следующей страницы (None - страниц больше нет)"""
+        after = None
+        if cursor:
+            try:
+                day, start_minute, booking_id = decode_cursor(cursor)
+                after = (date.fromisoformat(day), int(start_minute), str(booking_id))
+            except (ValueError, TypeError):
+                raise InvalidBookingData("Invalid cursor")
+        
+        # Берем на одну запись больше, чтобы понять, есть ли следующая страница
+        bookings = await BookingRepository.get_bookings_page(
+            session, limit + 1, after, date_from, date_to, room_id, user_id
+        )
+        next_cursor = None
+        if len(bookings) > limit:
+            bookings = bookings[:limit]
+            last = bookings[-1]
+            next_cursor = encode_cursor(last.date.isoformat(), parse_time(last.startTime), last.id)
+        return bookings, next_cursor
+    
+    @staticmethod
+    async def get_changes(session: AsyncSession, limit: int, since: str = None):
+        """
+        Изменения после курсора since: (изменения, курсор, есть ли еще).
+        Без since - все живые бронирования, курсор для следующего опроса
+        """
+        after = None
+        if since:
+            try:
+                updated_at, booking_id = decode_cursor(since)
+                after = (datetime.fromisoformat(updated_at), str(booking_id))
+            except (ValueError, TypeError):
+                raise InvalidBookingData("Invalid cursor")
+        
+        bookings = await BookingRepository.get_changes(session, limit + 1, after)
+        has_more = len(bookings) > limit
+        bookings = bookings[:limit]
+        
+        position = (bookings[-1].updated_at, bookings[-1].id) if bookings else after
+        if not has_more:
+            # Догнали: откатываем курсор на SYNC_CURSOR_LAG_SECONDS, но не раньше since
+            horizon = (datetime.utcnow() - timedelta(seconds=SYNC_CURSOR_LAG_SECONDS), "")
+            position = min(position, horizon) if position else horizon
+            if after:
+                position = max(position, after)
+        next_cursor = encode_cursor(position[0].isoformat(), position[1])
+        return bookings, next_cursor, has_more
     
     @staticmethod
     async def get_booking_by_id(session: AsyncSession, booking_id: str):
-        print(f"🔍 Поиск бронирования по ID: {booking_id}")
         booking = await BookingRepository.get_booking_by_id(session, booking_id)
         if not booking:
             raise BookingNotFound(f"Booking with id {booking_id} not found")
@@ -31,62 +90,59 @@ class BookingService:
     @staticmethod
     async def create_booking(session: AsyncSession, booking_data: BookingCreateSchema):
         # Проверяем существование пользователя и комнаты
-        user = await session.get(User, booking_data.user_id)
+        user = await session.get(User, booking_data.userId)
         if not user:
-            raise InvalidBookingData(f"User with id {booking_data.user_id} not found")
+            raise InvalidBookingData(f"User with id {booking_data.userId} not found")
         
-        room = await session.get(Room, booking_data.room_id)
+        room = await session.get(Room, booking_data.roomId)
         if not room:
-            raise InvalidBookingData(f"Room with id {booking_data.room_id} not found")
+            raise InvalidBookingData(f"Room with id {booking_data.roomId} not found")
         
-        # Проверяем доступность временного слота
-        conflicting_bookings = await session.execute(
-            select(Booking).where(
-                and_(
-                    Booking.room_id == booking_data.room_id,
-                    Booking.date == booking_data.date,
-                    or_(
-                        and_(
-                            Booking.start_time < booking_data.end_time,
-                            Booking.end_time > booking_data.start_time
-                        )
-                    )
-                )
-            )
-        )
-        
-        if conflicting_bookings.scalar():
-            raise TimeSlotNotAvailable(
-                f"Time slot {booking_data.start_time}-{booking_data.end_time} "
-                f"on {booking_data.date} is not available for room {room.name}"
-            )
+        try:
+            booking_date = datetime.strptime(booking_data.date, "%Y-%m-%d").date()
+        except ValueError:
+            raise InvalidBookingData("Invalid date format. Use YYYY-MM-DD")
         
         # Проверяем, что дата не в прошлом
-        if booking_data.date < date.today():
+        if booking_date < date.today():
             raise InvalidBookingData("Cannot book for past dates")
         
         # Проверяем правильность временного интервала
         try:
-            start_dt = datetime.strptime(booking_data.start_time, "%H:%M")
-            end_dt = datetime.strptime(booking_data.end_time, "%H:%M")
-            if end_dt <= start_dt:
-                raise InvalidBookingData("End time must be after start time")
+            start_minute = parse_time(booking_data.startTime)
+            end_minute = parse_time(booking_data.endTime)
         except ValueError:
             raise InvalidBookingData("Invalid time format. Use HH:MM")
+        if end_minute <= start_minute:
+            raise InvalidBookingData("End time must be after start time")
+        
+        # Проверяем доступность временного слота
+        available = await BookingRepository.check_availability(
+            session, booking_data.roomId, booking_date, start_minute, end_minute
+        )
+        
+        if not available:
+            raise TimeSlotNotAvailable(
+                f"Time slot {booking_data.startTime}-{booking_data.endTime} "
+                f"on {booking_data.date} is not available for room {room.name}"
+            )
         
         new_booking = Booking(
             id=f"booking_{uuid.uuid4().hex[:8]}",
-            room_id=booking_data.room_id,
-            user_id=booking_data.user_id,
-            date=booking_data.date,
-            start_time=booking_data.start_time,
-            end_time=booking_data.end_time,
+            room_id=booking_data.roomId,
+            user_id=booking_data.userId,
+            date=booking_date,
+            start_minute=start_minute,
+            end_minute=end_minute,
             title=booking_data.title,
-            participants=booking_data.participants
+            participants=",".join(booking_data.participants) if booking_data.participants else ""
         )
         
-        session.add(new_booking)
-        await session.commit()
+        if not await BookingRepository.add_booking(session, new_booking):
+            raise TimeSlotNotAvailable(
+                f"Time slot {booking_data.startTime}-{booking_data.endTime} "
+                f"on {booking_data.date} is not available for room {room.name}"
+            )
         await session.refresh(new_booking)
         return new_booking
     
@@ -94,13 +150,24 @@ class BookingService:
     async def delete_booking(session: AsyncSession, booking_id: str):
         booking = await BookingService.get_booking_by_id(session, booking_id)
         
-        await session.delete(booking)
+        BookingRepository.mark_deleted(booking)
         await session.commit()
         return True
     
+    @staticmethod
+    async def get_user_agenda(session: AsyncSession, user_id: str, date_from: date = None, date_to: date = None):
+        """Свои бронирования и приглашения пользователя, по умолчанию начиная с сегодняшнего дня"""
+        user = await UserRepository.get_user_by_id(session, user_id)
+        if not user:
+            raise UserNotFound(f"User with id {user_id} not found")
+        date_from = date_from or date.today()
+        if date_to and date_to < date_from:
+            raise InvalidBookingData("'to' must not be before 'from'")
+        return await BookingRepository.get_agenda(session, user.id, user.email, date_from, date_to)
+
     @staticmethod
     async def get_user_bookings(session: AsyncSession, user_id: str):
         result = await session.execute(
-            select(Booking).where(Booking.user_id == user_id)
+            select(Booking).where(Booking.user_id == user_id, Booking.deleted_at.is_(None))
         )
         return result.scalars().all()
\ No newline at end of file
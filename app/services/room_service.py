@@ -1,3 +1,6 @@
+import logging
+from datetime import date, datetime, timedelta
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import uuid
@@ -6,22 +9,55 @@ from app.models import Room
 from app.schemes.room_schema import RoomCreateSchema
 from app.exceptions.room_exceptions import RoomNotFound, InvalidRoomData
 from app.repositories.room_repository import RoomRepository
+from app.repositories.booking_repository import BookingRepository
+from app.utils.booking_time import parse_time, format_time
+from app.utils.occupancy_cache import OCCUPANCY_SLOT_MINUTES
+
+logger = logging.getLogger(__name__)
+
+# Ограничения поиска свободных слотов
+MAX_SEARCH_DAYS = 31
+MAX_SEARCH_SLOTS = 100
+# Для сегодняшнего дня слоты начинаются не раньше ближайших :00/:15/:30/:45
+SLOT_STEP_MINUTES = 15
+GRID_ENCODINGS = ("bits", "runs")
+
+
+def encode_runs(bits: str) -> list:
+    """Длины чередующихся серий, первая - свободная (может быть 0): "0001100" -> [3, 2, 2]"""
+    runs = []
+    current = "0"
+    length = 0
+    for bit in bits:
+        if bit == current:
+            length += 1
+        else:
+            runs.append(length)
+            current = bit
+            length = 1
+    runs.append(length)
+    return runs
+
+
+def parse_amenities(amenities) -> list:
+    """Список через запятую, без регистра: "Проектор, Wi-Fi" -> ["проектор", "wi-fi"]"""
+    if not amenities:
+        return []
+    return [a.strip().casefold() for a in amenities.split(",") if a.strip()]
+
+
+def has_amenities(room: Room, wanted: list) -> bool:
+    # Сравнение в Python: LIKE/lower() в SQLite не понимают регистр кириллицы
+    available = (room.amenities or "").casefold()
+    return all(a in available for a in wanted)
 
 class RoomService:
     @staticmethod
     async def get_all_rooms(session: AsyncSession):
-        try:
-            print("🔄 Получение всех комнат из базы...")
-            rooms = await RoomRepository.get_all_rooms(session)
-            print(f"✅ Успешно получено {len(rooms)} комнат")
-            return rooms
-        except Exception as e:
-            print(f"❌ Ошибка в RoomService.get_all_rooms: {str(e)}")
-            raise
+        return await RoomRepository.get_all_rooms(session)
     
     @staticmethod
     async def get_room_by_id(session: AsyncSession, room_id: str):
-        print(f"🔍 Поиск комнаты по ID: {room_id}")
         room = await RoomRepository.get_room_by_id(session, room_id)
         if not room:
             raise RoomNotFound(f"Room with id {room_id} not found")
@@ -29,8 +65,6 @@ class RoomService:
     
     @staticmethod
     async def create_room(session: AsyncSession, name: str, capacity: int, amenities: str = "", price: float = 0):
-        print(f"🏗️ Создание комнаты: {name}, вместимость: {capacity}")
-    
         if not name:
             raise InvalidRoomData("Room name is required")
     
@@ -50,7 +84,7 @@ class RoomService:
         await session.commit()
         await session.refresh(new_room)
     
-        print(f"✅ Комната создана: {new_room.name}")
+        logger.info("Комната создана: %s, вместимость: %d", new_room.name, new_room.capacity, extra={"room_id": new_room.id})
         return new_room
     
     @staticmethod
@@ -82,6 +116,22 @@ class RoomService:
         await session.refresh(room)
         return room
     
+    @staticmethod
+    async def update_room_price(session: AsyncSession, room_id: str, price):
+        room = await RoomService.get_room_by_id(session, room_id)
+        
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            raise InvalidRoomData("Room price must be a number")
+        if price < 0:
+            raise InvalidRoomData("Room price must not be negative")
+        
+        room.price = price
+        await session.commit()
+        await session.refresh(room)
+        return room
+    
     @staticmethod
     async def delete_room(session: AsyncSession, room_id: str):
         room = await RoomService.get_room_by_id(session, room_id)
@@ -91,32 +141,158 @@ class RoomService:
         return True
     
     @staticmethod
-    async def get_available_rooms(session: AsyncSession, date, start_time, end_time):
+    async def get_available_rooms(session: AsyncSession, date, start_time, end_time, min_capacity: int = None, amenities: str = None):
         """Получить доступные комнаты на указанное время"""
-        all_rooms = await RoomService.get_all_rooms(session)
+        try:
+            start_minute = parse_time(start_time)
+            end_minute = parse_time(end_time)
+        except ValueError as e:
+            raise InvalidRoomData(str(e))
+        if end_minute <= start_minute:
+            raise InvalidRoomData("End time must be after start time")
         
-        # Получаем бронирования на эту дату
-        from app.models import Booking
-        from sqlalchemy import select
+        rooms = await RoomRepository.get_available_rooms(session, date, start_minute, end_minute, min_capacity)
+        wanted = parse_amenities(amenities)
+        return [room for room in rooms if has_amenities(room, wanted)]
+    
+    @staticmethod
+    async def find_free_slots(
+        session: AsyncSession,
+        duration: int,
+        days: int = 7,
+        limit: int = 10,
+        start_date: date = None,
+        day_start: str = "08:00",
+        day_end: str = "20:00",
+        min_capacity: int = None,
+        amenities: str = None
+    ):
+        """
+        Ближайшие limit свободных слотов длиной duration минут в ближайшие days дней.
+        По одному запросу на день (RoomRepository.get_free_gaps), пока не наберется
+        limit слотов. По одному слоту на свободный промежуток
+        """
+        try:
+            work_start = parse_time(day_start)
+            work_end = parse_time(day_end)
+        except ValueError as e:
+            raise InvalidRoomData(str(e))
+        if work_end <= work_start:
+            raise InvalidRoomData("Day end must be after day start")
+        if not 0 < duration <= work_end - work_start:
+            raise InvalidRoomData("Duration must fit into the working day")
+        if not 1 <= days <= MAX_SEARCH_DAYS:
+            raise InvalidRoomData(f"Days must be between 1 and {MAX_SEARCH_DAYS}")
+        if not 1 <= limit <= MAX_SEARCH_SLOTS:
+            raise InvalidRoomData(f"Limit must be between 1 and {MAX_SEARCH_SLOTS}")
         
-        result = await session.execute(
-            select(Booking).where(Booking.date == date)
-        )
-        bookings = result.scalars().all()
+        # Оборудование фильтруется в Python, поэтому только тогда грузим комнаты
+        room_ids = None
+        wanted = parse_amenities(amenities)
+        if wanted:
+            room_ids = [
+                room.id for room in await RoomRepository.get_rooms_by_capacity(session, min_capacity)
+                if has_amenities(room, wanted)
+            ]
+            if not room_ids:
+                return []
         
-        # Фильтруем комнаты, которые заняты в указанное время
-        available_rooms = []
-        for room in all_rooms:
-            room_bookings = [b for b in bookings if b.room_id == room.id]
-            
-            is_available = True
-            for booking in room_bookings:
-                # Проверяем пересечение временных интервалов
-                if not (end_time <= booking.start_time or start_time >= booking.end_time):
-                    is_available = False
-                    break
+        now = datetime.now()
+        today = now.date()
+        start_date = max(start_date or today, today)
+        
+        slots = []
+        for offset in range(days):
+            current = start_date + timedelta(days=offset)
+            earliest = work_start
+            if current == today:
+                minute = now.hour * 60 + now.minute
+                earliest = max(work_start, -(-minute // SLOT_STEP_MINUTES) * SLOT_STEP_MINUTES)
+                if work_end - earliest < duration:
+                    continue
             
-            if is_available:
-                available_rooms.append(room)
+            # Дни идут по порядку, поэтому хватает сортировки по времени внутри дня
+            gaps = await RoomRepository.get_free_gaps(
+                session, current, earliest, work_end, duration, limit - len(slots), min_capacity, room_ids
+            )
+            for room_id, room_name, capacity, gap_start, gap_end in gaps:
+                slots.append({
+                    "roomId": room_id,
+                    "roomName": room_name,
+                    "capacity": capacity,
+                    "date": current.isoformat(),
+                    "startTime": format_time(gap_start),
+                    "endTime": format_time(gap_start + duration),
+                    "freeUntil": format_time(gap_end),
+                })
+            if len(slots) >= limit:
+                break
+        return slots
+    
+    @staticmethod
+    async def get_availability_grid(
+        session: AsyncSession,
+        start_date: date,
+        days: int = 7,
+        room_ids: list = None,
+        slot_minutes: int = 30,
+        day_start: str = "08:00",
+        day_end: str = "20:00",
+        encoding: str = "bits"
+    ):
+        """
+        Матрица занятости комнаты x дни. Для каждого дня - строка слотов
+        "0"/"1" (1 - занято хотя бы частично) либо run-length (encode_runs).
+        Строится из кэша занятости: слот сетки - OR нескольких слотов маски
+        """
+        try:
+            work_start = parse_time(day_start)
+            work_end = parse_time(day_end)
+        except ValueError as e:
+            raise InvalidRoomData(str(e))
+        if encoding not in GRID_ENCODINGS:
+            raise InvalidRoomData(f"Encoding must be one of: {', '.join(GRID_ENCODINGS)}")
+        if slot_minutes % OCCUPANCY_SLOT_MINUTES:
+            raise InvalidRoomData(f"Slot must be a multiple of {OCCUPANCY_SLOT_MINUTES} minutes")
+        if work_end <= work_start or work_start % slot_minutes or work_end % slot_minutes:
+            raise InvalidRoomData("Day start/end must be aligned to the slot and end after start")
+        if not 1 <= days <= MAX_SEARCH_DAYS:
+            raise InvalidRoomData(f"Days must be between 1 and {MAX_SEARCH_DAYS}")
         
-        return available_rooms
\ No newline at end of file
+        rooms = await RoomRepository.get_rooms_by_ids(session, room_ids)
+        ids = [room_id for room_id, _ in rooms]
+        
+        # Сдвиг и ширина окна в слотах маски, сколько слотов маски в слоте сетки
+        factor = slot_minutes // OCCUPANCY_SLOT_MINUTES
+        first = work_start // OCCUPANCY_SLOT_MINUTES
+        width = (work_end - work_start) // OCCUPANCY_SLOT_MINUTES
+        window = (1 << width) - 1
+        
+        grid = {room_id: [] for room_id in ids}
+        for offset in range(days):
+            occupancy = await BookingRepository.get_day_occupancy(session, start_date + timedelta(days=offset), ids)
+            for room_id in ids:
+                bits = (occupancy[room_id].bits >> first) & window
+                # Бит j после свертки - OR слотов маски j..j+factor-1,
+                # дальше берем каждый factor-й
+                folded = bits
+                for shift in range(1, factor):
+                    folded |= bits >> shift
+                # Младший бит - начало дня, поэтому строку разворачиваем
+                raw = format(folded, f"0{width}b")[::-1][::factor]
+                grid[room_id].append(encode_runs(raw) if encoding == "runs" else raw)
+        
+        return {
+            "from": start_date.isoformat(),
+            "days": days,
+            "slotMinutes": slot_minutes,
+            "dayStart": format_time(work_start),
+            "dayEnd": format_time(work_end),
+            "slotsPerDay": width // factor,
+            "encoding": encoding,
+            "rooms": [
+                {"id": room_id, "name": name, "days": grid[room_id]}
+                for room_id, name in rooms
+            ],
+        }
+
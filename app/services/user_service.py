@@ -1,95 +1,64 @@
+import logging
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
 import uuid
-import bcrypt
 
 from app.models import User, Role
 from app.schemes.user_schema import UserCreateSchema
-from app.exceptions.user_exceptions import UserAlreadyExists, UserNotFound, InvalidUserData
+from app.exceptions.user_exceptions import UserAlreadyExists, UserNotFound, InvalidUserData, PasswordHashingBusy
 from app.repositories.user_repository import UserRepository
+from app.utils import password as password_utils
+
+logger = logging.getLogger(__name__)
 
 class UserService:
     @staticmethod
-    def hash_password(password: str) -> str:
-        """Хеширование пароля"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+    async def hash_password(password: str) -> str:
+        """Хеширование пароля (в пуле воркеров, не блокирует event loop)"""
+        return await password_utils.hash_password(password)
     
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Проверка пароля"""
-        try:
-            return bcrypt.checkpw(
-                plain_password.encode('utf-8'), 
-                hashed_password.encode('utf-8')
-            )
-        except Exception as e:
-            print(f"❌ Ошибка проверки пароля: {e}")
-            return False
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        """Проверка пароля (в пуле воркеров, не блокирует event loop)"""
+        return await password_utils.verify_password(plain_password, hashed_password)
     
     @staticmethod
     async def authenticate_user(session: AsyncSession, email: str, password: str):
         """Аутентификация пользователя с проверкой пароля через bcrypt"""
-        print(f"🔐 Аутентификация пользователя: {email}")
-        
         try:
-            # Ищем пользователя по email
-            result = await session.execute(
-                select(User).where(User.email == email)
-            )
-            user = result.scalar()
+            # Ищем пользователя по email (роль подгружается тем же запросом)
+            user = await UserRepository.get_user_by_email(session, email)
             
             if not user:
-                print(f"❌ Пользователь с email {email} не найден")
+                logger.info("Вход: пользователь с email %s не найден", email)
                 return None
             
-            print(f"✅ Найден пользователь: {user.first_name} {user.last_name}")
-            
             # Проверяем, что у пользователя есть пароль
             if not user.password:
-                print("❌ У пользователя нет пароля в БД")
+                logger.warning("У пользователя нет пароля в БД", extra={"user_id": user.id})
                 return None
             
             # Проверка пароля через bcrypt
-            print(f"🔑 Проверка пароля через bcrypt...")
-            
-            # Проверяем пароль через bcrypt
-            is_valid = bcrypt.checkpw(
-                password.encode('utf-8'), 
-                user.password.encode('utf-8')
-            )
+            is_valid = await UserService.verify_password(password, user.password)
             
             if is_valid:
-                print("✅ Пароль проверен успешно")
-                
-                # Загружаем связанные данные роли
-                await session.refresh(user, ['role'])
-                role_name = user.role.name if user.role else 'user'
-                print(f"👤 Роль пользователя: {role_name}")
-                
+                logger.info("Успешный вход", extra={"user_id": user.id, "role": user.role.name if user.role else "user"})
                 return user
             else:
-                print(f"❌ Неверный пароль для пользователя {email}")
+                logger.info("Неверный пароль", extra={"user_id": user.id})
                 return None
                 
-        except Exception as e:
-            print(f"❌ Ошибка при аутентификации: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except PasswordHashingBusy:
+            raise
+        except Exception:
+            logger.exception("Ошибка при аутентификации")
             return None
     
     @staticmethod
     async def get_all_users(session: AsyncSession):
-        try:
-            print("🔄 Получение всех пользователей из базы...")
-            users = await UserRepository.get_all_users(session)
-            print(f"✅ Успешно получено {len(users)} пользователей")
-            return users
-        except Exception as e:
-            print(f"❌ Ошибка в UserService.get_all_users: {str(e)}")
-            raise
+        return await UserRepository.get_all_users(session)
     
     @staticmethod
     async def get_user_by_id(session: AsyncSession, user_id: str):
@@ -108,8 +77,6 @@ class UserService:
     @staticmethod
     async def create_user(session: AsyncSession, user_data: UserCreateSchema):
         """Создание нового пользователя с правильным хешированием пароля"""
-        print(f"👤 Регистрация нового пользователя: {user_data.email}")
-        
         # Проверяем существование
         existing = await UserRepository.get_user_by_email(session, user_data.email)
         if existing:
@@ -133,13 +100,7 @@ class UserService:
             await session.refresh(role)
         
         # Хешируем пароль ПРАВИЛЬНО
-        print(f"🔐 Хеширование пароля...")
-        hashed_password = bcrypt.hashpw(
-            user_data.password.encode('utf-8'),
-            bcrypt.gensalt()
-        ).decode('utf-8')
-        
-        print(f"✅ Пароль хеширован: {hashed_password[:30]}...")
+        hashed_password = await UserService.hash_password(user_data.password)
         
         # Создаем пользователя
         new_user = User(
@@ -156,7 +117,7 @@ class UserService:
         await session.refresh(new_user)
         await session.refresh(new_user, ['role'])
         
-        print(f"✅ Пользователь успешно создан: {new_user.first_name} {new_user.last_name}")
+        logger.info("Зарегистрирован пользователь", extra={"user_id": new_user.id})
         
         return new_user
     
@@ -1,11 +1,17 @@
-import { initializeAuth, getCurrentUser, logout, isAdmin, getAllUsers, setCurrentUser, createUser, loginWithPassword } from './auth.js';
+import { initializeAuth, getCurrentUser, logout, isAdmin, getAllUsers, setCurrentUser, createUser, loginWithPassword, apiFetch } from './auth.js';
 import { showNotification } from './notifications.js';
 
+// Размер страницы при постраничной загрузке бронирований
+const BOOKINGS_PAGE_SIZE = 200;
+
 class SoveshaikaApp {
     constructor() {
         this.currentUser = null;
         this.rooms = [];
         this.bookings = [];
+        // Состояние синхронизации бронирований (GET /api/bookings/changes)
+        this.bookingsById = new Map();
+        this.bookingsCursor = null;
         this.users = [];
         this.allUsers = [];
         this.timeSlots = this.generateTimeSlots(); // Перенесено в конструктор
@@ -39,6 +45,12 @@ class SoveshaikaApp {
         // Настраиваем обработчики событий
         this.setupEventListeners();
         this.bindEvents();
+        // Токен истек (apiFetch получил 401) - заново на экран входа
+        window.addEventListener('soveshaika:session-expired', () => {
+            this.currentUser = null;
+            this.showAuthView();
+            showNotification('Сессия истекла, войдите снова', 'info');
+        });
         
         // Проверяем авторизацию
         await this.checkAuthAndLoad();
@@ -48,6 +60,49 @@ class SoveshaikaApp {
             this.updateUserDisplay();
             await this.loadRooms();
         }
+        
+        this.connectBookingEvents();
+    }
+    
+    // Живые обновления: чужие бронирования приходят по WebSocket, без опроса
+    connectBookingEvents(delay = 1000) {
+        const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${protocol}//${location.host}/ws/bookings`);
+        let refreshTimer = null;
+        let slotsChanged = false;
+        
+        socket.onopen = () => {
+            delay = 1000;
+            // Пока соединения не было, события могли потеряться - догоняем по ленте
+            if (this.bookingsCursor) {
+                this.loadAllBookings();
+            }
+        };
+        socket.onmessage = (message) => {
+            const data = JSON.parse(message.data);
+            if (data.type === 'overflow') {
+                return;
+            }
+            const booking = data.booking;
+            slotsChanged = slotsChanged ||
+                (booking.roomId === document.getElementById('roomSelect')?.value &&
+                 booking.date === document.getElementById('bookingDate')?.value);
+            // Пачку событий применяем одной синхронизацией
+            clearTimeout(refreshTimer);
+            refreshTimer = setTimeout(() => {
+                if (this.bookingsCursor) {
+                    this.loadAllBookings();
+                }
+                if (slotsChanged) {
+                    slotsChanged = false;
+                    this.updateTimeSlots();
+                }
+            }, 200);
+        };
+        socket.onclose = () => {
+            // Переподключение с нарастающей паузой
+            setTimeout(() => this.connectBookingEvents(Math.min(delay * 2, 30000)), delay);
+        };
     }
     
     // НОВЫЙ МЕТОД: проверка авторизации и загрузка данных
@@ -56,7 +111,8 @@ class SoveshaikaApp {
         
         try {
             const userData = localStorage.getItem('soveshaika_user');
-            if (userData) {
+            // Сессия без accessToken сохранена до появления токенов - нужен новый вход
+            if (userData && JSON.parse(userData).accessToken) {
                 this.currentUser = JSON.parse(userData);
                 this.updateUI();
                 await this.loadInitialData();
@@ -102,7 +158,7 @@ class SoveshaikaApp {
     async loadRooms() {
         console.log("🏢 Загрузка комнат...");
         try {
-            const response = await fetch('/api/rooms/');
+            const response = await apiFetch('/api/rooms/');
             if (response.ok) {
                 this.rooms = await response.json();
                 console.log(`✅ Загружено ${this.rooms.length} комнат`);
@@ -173,7 +229,7 @@ class SoveshaikaApp {
     async loadRoomsForAdmin() {
         console.log("🏢 Загрузка комнат для админ-панели...");
         try {
-            const response = await fetch('/api/rooms/');
+            const response = await apiFetch('/api/rooms/');
             if (response.ok) {
                 this.rooms = await response.json();
                 this.renderRoomsList();
@@ -237,7 +293,7 @@ class SoveshaikaApp {
         }
         
         try {
-            const response = await fetch('/api/rooms/', {
+            const response = await apiFetch('/api/rooms/', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -429,7 +485,7 @@ class SoveshaikaApp {
         }
 
         try {
-            const response = await fetch(`/api/rooms/${roomId}`, {
+            const response = await apiFetch(`/api/rooms/${roomId}`, {
                 method: 'DELETE'
             });
 
@@ -464,7 +520,7 @@ class SoveshaikaApp {
     async loadAuthUsers() {
         try {
             console.log("👥 Загрузка пользователей для авторизации...");
-            const response = await fetch('/api/users/');
+            const response = await apiFetch('/api/users/');
             if (response.ok) {
                 this.users = await response.json();
                 console.log(`✅ Загружено ${this.users.length} пользователей`);
@@ -484,7 +540,7 @@ class SoveshaikaApp {
     async loadAccessList() {
         console.log("👥 Загрузка списка пользователей для управления доступом...");
         try {
-            const response = await fetch('/api/users/');
+            const response = await apiFetch('/api/users/');
             if (response.ok) {
                 this.users = await response.json();
                 this.renderAccessList();
@@ -538,7 +594,7 @@ class SoveshaikaApp {
         console.log(`🔄 Обновление роли пользователя ${userId} на ${role}`);
         
         try {
-            const response = await fetch(`/api/users/${userId}/role`, {
+            const response = await apiFetch(`/api/users/${userId}/role`, {
                 method: 'PUT',
                 headers: {
                     'Content-Type': 'application/json'
@@ -562,22 +618,62 @@ class SoveshaikaApp {
         }
     }
 
+    // Постраничная загрузка бронирований по курсору; onPage вызывается после каждой страницы
+    async fetchBookingPages(params = {}, onPage = null) {
+        const bookings = [];
+        let cursor = null;
+        do {
+            const query = new URLSearchParams({ ...params, limit: BOOKINGS_PAGE_SIZE });
+            if (cursor) {
+                query.set('cursor', cursor);
+            }
+            const response = await apiFetch(`/api/bookings/?${query}`);
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const page = await response.json();
+            bookings.push(...page.items);
+            if (onPage) {
+                onPage(bookings);
+            }
+            cursor = page.nextCursor;
+        } while (cursor);
+        return bookings;
+    }
+
+    // Синхронизация по ленте изменений: первый вызов забирает все бронирования,
+    // следующие - только созданные/измененные/отмененные после курсора
     async loadAllBookings() {
-        console.log("📅 Загрузка всех бронирований...");
+        console.log("📅 Синхронизация бронирований...");
         try {
-            const response = await fetch('/api/bookings/');
-            if (response.ok) {
-                this.bookings = await response.json();
-                this.renderAllBookings();
-            } else {
-                console.error('❌ Ошибка загрузки бронирований:', response.status);
-                // Используем пустой массив вместо ошибки
-                this.bookings = [];
+            let hasMore = true;
+            while (hasMore) {
+                const query = new URLSearchParams({ limit: BOOKINGS_PAGE_SIZE });
+                if (this.bookingsCursor) {
+                    query.set('since', this.bookingsCursor);
+                }
+                const response = await apiFetch(`/api/bookings/changes?${query}`);
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                const page = await response.json();
+                for (const change of page.changes) {
+                    if (change.deleted) {
+                        this.bookingsById.delete(change.id);
+                    } else {
+                        this.bookingsById.set(change.id, change);
+                    }
+                }
+                this.bookingsCursor = page.nextCursor;
+                hasMore = page.hasMore;
+                // Список отрисовывается по мере прихода порций
+                this.bookings = Array.from(this.bookingsById.values()).sort((a, b) =>
+                    a.date.localeCompare(b.date) || a.startTime.localeCompare(b.startTime)
+                );
                 this.renderAllBookings();
             }
         } catch (error) {
             console.error('❌ Ошибка сети при загрузке бронирований:', error);
-            this.bookings = [];
             this.renderAllBookings();
         }
     }
@@ -637,7 +733,7 @@ class SoveshaikaApp {
         }
 
         try {
-            const response = await fetch(`/api/bookings/${bookingId}`, {
+            const response = await apiFetch(`/api/bookings/${bookingId}`, {
                 method: 'DELETE'
             });
 
@@ -791,21 +887,18 @@ class SoveshaikaApp {
             return;
         }
         
-        // Получаем бронирования для проверки занятости
+        const filteredRooms = [];
+        const today = new Date().toISOString().split('T')[0];
+        const checkDate = filterDate || today;
+        
+        // Получаем бронирования только на проверяемую дату
         let allBookings = [];
         try {
-            const response = await fetch('/api/bookings/');
-            if (response.ok) {
-                allBookings = await response.json();
-            }
+            allBookings = await this.fetchBookingPages({ booking_date: checkDate });
         } catch (error) {
             console.error("❌ Ошибка загрузки бронирований:", error);
         }
         
-        const filteredRooms = [];
-        const today = new Date().toISOString().split('T')[0];
-        const checkDate = filterDate || today;
-        
         for (const room of this.rooms) {
             let includeRoom = true;
             
@@ -990,7 +1083,7 @@ class SoveshaikaApp {
     
         try {
             // ИСПРАВЛЕНО: используем camelCase как в схеме!
-            const response = await fetch('/api/bookings/', {
+            const response = await apiFetch('/api/bookings/', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -1036,11 +1129,17 @@ class SoveshaikaApp {
         }
         
         try {
-            // Загружаем бронирования для выбранной комнаты и даты
-            const response = await fetch(`/api/bookings/?room_id=${roomId}&booking_date=${date}`);
+            // Сетка занятости комнаты на день: строка 0/1 по получасовым слотам
+            const first = this.timeSlots[0].time;
+            const last = this.getNextTimeSlot(this.timeSlots[this.timeSlots.length - 1].time);
+            const params = new URLSearchParams({
+                room_ids: roomId, from: date, days: 1, slot: 30, day_start: first, day_end: last
+            });
+            const response = await apiFetch(`/api/rooms/availability?${params}`);
             if (response.ok) {
-                const bookings = await response.json();
-                this.renderAvailableTimeSlots(bookings);
+                const grid = await response.json();
+                const bits = grid.rooms.length > 0 ? grid.rooms[0].days[0] : '';
+                this.renderAvailableTimeSlots(bits);
             } else {
                 console.error('❌ Ошибка загрузки временных слотов:', response.status);
                 this.showNotification('Не удалось загрузить доступные слоты', 'error');
@@ -1060,30 +1159,19 @@ class SoveshaikaApp {
         }
     }
 
-    renderAvailableTimeSlots(bookings) {
+    renderAvailableTimeSlots(bits) {
         const container = document.getElementById('availabilityGrid');
         if (!container) return;
         
         container.innerHTML = '<h3>Доступные слоты:</h3>';
         
-        if (!bookings || bookings.length === 0) {
+        if (!bits || !bits.includes('1')) {
             container.innerHTML += '<p class="text-muted">Свободно весь день</p>';
             return;
         }
         
-        const bookedSlots = new Set();
-        bookings.forEach(booking => {
-            // Добавляем все слоты между началом и концом бронирования
-            const start = this.timeToMinutes(booking.startTime);
-            const end = this.timeToMinutes(booking.endTime);
-            
-            for (let time = start; time < end; time += 30) {
-                const timeStr = this.minutesToTime(time);
-                bookedSlots.add(timeStr);
-            }
-        });
-        
-        const availableSlots = this.timeSlots.filter(slot => !bookedSlots.has(slot.time));
+        // i-й символ строки соответствует i-му получасовому слоту, '1' - занято
+        const availableSlots = this.timeSlots.filter((slot, index) => bits[index] !== '1');
         
         if (availableSlots.length === 0) {
             container.innerHTML += '<p class="text-muted">Нет доступных слотов на выбранную дату</p>';
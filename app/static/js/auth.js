@@ -1,4 +1,21 @@
 const API_BASE = '/api/users'; // Исправлен путь
+const SESSION_KEY = 'soveshaika_user';
+
+// Запрос к API с access-токеном из ответа login/register (Authorization: Bearer).
+// 401 по токену - срок истек: сессия сбрасывается, приложение показывает вход
+export async function apiFetch(url, options = {}) {
+  const token = authModule.getCurrentUser()?.accessToken;
+  const headers = new Headers(options.headers || {});
+  if (token && !headers.has('Authorization')) {
+    headers.set('Authorization', `Bearer ${token}`);
+  }
+  const response = await fetch(url, { ...options, headers });
+  if (response.status === 401 && token) {
+    authModule.logout();
+    window.dispatchEvent(new CustomEvent('soveshaika:session-expired'));
+  }
+  return response;
+}
 
 class AuthModule {
   constructor() {
@@ -8,7 +25,7 @@ class AuthModule {
 
   async initializeUsers() {
     try {
-      const response = await fetch(`${API_BASE}/`);
+      const response = await apiFetch(`${API_BASE}/`);
       if (response.ok) {
         this.users = await response.json();
       }
@@ -24,7 +41,7 @@ class AuthModule {
   }
 
   getCurrentUser() {
-    const userData = localStorage.getItem('soveshaika_user');
+    const userData = localStorage.getItem(SESSION_KEY);
     if (userData) {
       return JSON.parse(userData);
     }
@@ -42,7 +59,7 @@ class AuthModule {
   }
 
   logout() {
-    localStorage.removeItem('soveshaika_user');
+    localStorage.removeItem(SESSION_KEY);
     this.currentUser = null;
   }
 
@@ -53,7 +70,7 @@ class AuthModule {
   setCurrentUser(userId) {
     const user = this.users.find(u => u.id === userId);
     if (user) {
-      localStorage.setItem('soveshaika_user', JSON.stringify(user));
+      localStorage.setItem(SESSION_KEY, JSON.stringify(user));
       this.currentUser = user;
     }
   }
@@ -73,7 +90,7 @@ class AuthModule {
 
       const newUser = await response.json();
       this.users.push(newUser);
-      localStorage.setItem('soveshaika_user', JSON.stringify(newUser));
+      localStorage.setItem(SESSION_KEY, JSON.stringify(newUser));
       return { success: true, user: newUser };
     } catch (error) {
       console.error('Registration error:', error);
@@ -95,7 +112,7 @@ class AuthModule {
       }
       
       const user = await response.json();
-      localStorage.setItem('soveshaika_user', JSON.stringify(user));
+      localStorage.setItem(SESSION_KEY, JSON.stringify(user));
       this.currentUser = user;
       return { success: true, user };
     } catch (error) {
@@ -0,0 +1,78 @@
+"""
+Кэш агрегатов аналитики по закрытым периодам (календарным месяцам).
+
+Прошедший месяц почти не меняется, поэтому его GROUP BY считается один раз
+и хранится в памяти, а запрос за год складывает готовые месяцы и считает
+в БД только текущий (открытый) период. Агрегаты аддитивны - сумма месяцев
+равна агрегату за весь диапазон.
+
+Запись хранит версии, при которых посчитана ("bookings:YYYY-MM" и "rooms" из
+table_versions - цены комнат входят в выручку), и действительна, пока они не
+изменились: задним числом бронирование можно отменить, а цену - поменять.
+Пересборка дневных сводок (python -m app.cli rebuild-rollups) поднимает
+"booking-rollups" и сбрасывает все записи.
+
+Версии приходят через шину инвалидации, а она не гарантирует доставку
+(memory:// вообще не выходит за процесс). Поэтому у записи есть и срок
+жизни ANALYTICS_CACHE_TTL: воркер, пропустивший отмену задним числом или
+смену цены, отдает устаревший месяц не дольше этого срока.
+
+Настройки (переменные окружения):
+    ANALYTICS_CACHE_MAX_ENTRIES - максимум записей (LRU), по умолчанию 4096; 0 - кэш выключен
+    ANALYTICS_CACHE_TTL         - срок жизни записи, секунды, по умолчанию 300
+                                  для шины между процессами и 30 для memory://
+"""
+import os
+import time
+from collections import OrderedDict
+
+from app.utils.invalidation_bus import invalidation_bus
+from app.utils.table_versions import table_versions
+
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "4096"))
+ANALYTICS_CACHE_TTL = float(os.getenv(
+    "ANALYTICS_CACHE_TTL", "300" if invalidation_bus.cross_process else "30"
+))
+
+
+class AnalyticsCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def versions(self, version_keys: tuple) -> tuple:
+        """Текущие версии; читаются до запроса в БД - изменение во время запроса сделает запись устаревшей"""
+        return tuple(table_versions.get(key) for key in version_keys)
+
+    def get(self, key: tuple, versions: tuple):
+        """Сохраненный агрегат, если он посчитан при тех же версиях и не истек, иначе None"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == versions and entry[2] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple, versions: tuple, value) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (versions, value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+analytics_cache = AnalyticsCache(ANALYTICS_CACHE_MAX_ENTRIES, ANALYTICS_CACHE_TTL)
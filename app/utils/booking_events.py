@@ -0,0 +1,183 @@
+"""
+Живые обновления бронирований: fan-out событий по подпискам внутри воркера.
+
+После коммита ORM-сессии каждое созданное, измененное или отмененное
+бронирование превращается в одно JSON-сообщение (сериализуется один раз) и
+раскладывается по очередям подписчиков (install_booking_events). Подписка -
+набор комнат и/или дат; пустой набор - "все". Подписчики проиндексированы по
+комнате, поэтому публикация не перебирает все соединения, а простаивающее
+соединение ничего не стоит: оно просто ждет свою очередь, БД не опрашивается.
+
+Очередь подписчика ограничена. Кто не успевает читать, тот отключается
+(dropped): клиент переподключается и догоняет пропущенное через
+GET /api/bookings/changes.
+
+События рассылаются через шину инвалидации (канал booking-events), поэтому
+подписчик получает и коммиты других воркеров.
+
+Настройки (переменные окружения):
+    BOOKING_EVENTS_QUEUE_SIZE       - длина очереди подписчика, по умолчанию 100
+    BOOKING_EVENTS_MAX_SUBSCRIBERS  - максимум подписчиков на воркер, по умолчанию 10000
+"""
+import asyncio
+import json
+import os
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.utils.invalidation_bus import invalidation_bus
+
+BOOKING_EVENTS_QUEUE_SIZE = int(os.getenv("BOOKING_EVENTS_QUEUE_SIZE", "100"))
+BOOKING_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("BOOKING_EVENTS_MAX_SUBSCRIBERS", "10000"))
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    __slots__ = ("queue", "room_ids", "dates", "dropped")
+
+    def __init__(self, room_ids: frozenset, dates: frozenset, queue_size: int):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.room_ids = room_ids
+        self.dates = dates
+        self.dropped = False
+
+    async def get(self):
+        """Следующее сообщение; None - подписчик отключен за переполнение"""
+        if self.dropped:
+            return None
+        return await self.queue.get()
+
+
+class BookingEventHub:
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        # room_id -> подписчики этой комнаты; "" - подписчики всех комнат
+        self._by_room: dict = {}
+        self._count = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def subscribers(self) -> int:
+        return self._count
+
+    def subscribe(self, room_ids=(), dates=()) -> Subscription:
+        if self._count >= self.max_subscribers:
+            raise TooManySubscribers("Слишком много подписчиков")
+        subscription = Subscription(frozenset(room_ids), frozenset(dates), self.queue_size)
+        self._index(subscription)
+        self._count += 1
+        return subscription
+
+    def resubscribe(self, subscription: Subscription, room_ids=(), dates=()) -> None:
+        """Меняет фильтр существующей подписки (очередь сохраняется)"""
+        if subscription.dropped:
+            return
+        self._unindex(subscription)
+        subscription.room_ids = frozenset(room_ids)
+        subscription.dates = frozenset(dates)
+        self._index(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription.dropped:
+            return
+        self._unindex(subscription)
+        subscription.dropped = True
+        self._count -= 1
+
+    def publish(self, room_id: str, booking_date: str, message: str) -> None:
+        """Раздает готовое сообщение подписчикам комнаты/даты; вызывать из потока event loop"""
+        self.published += 1
+        for key in (room_id, ""):
+            for subscription in tuple(self._by_room.get(key, ())):
+                if subscription.dates and booking_date not in subscription.dates:
+                    continue
+                try:
+                    subscription.queue.put_nowait(message)
+                    self.delivered += 1
+                except asyncio.QueueFull:
+                    # Медленный потребитель: отключаем, догонит по ленте изменений
+                    self.unsubscribe(subscription)
+                    self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self._count,
+            "maxSubscribers": self.max_subscribers,
+            "queueSize": self.queue_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+    def _index(self, subscription: Subscription) -> None:
+        for key in subscription.room_ids or ("",):
+            self._by_room.setdefault(key, set()).add(subscription)
+
+    def _unindex(self, subscription: Subscription) -> None:
+        for key in subscription.room_ids or ("",):
+            subscribers = self._by_room.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_room[key]
+
+
+booking_event_hub = BookingEventHub(BOOKING_EVENTS_QUEUE_SIZE, BOOKING_EVENTS_MAX_SUBSCRIBERS)
+
+# Модель бронирования передается при установке, чтобы utils не зависел от models
+_booking_class = None
+
+
+def _collect_events(session, flush_context):
+    """after_flush: готовим сообщения до коммита, пока известно, что изменилось"""
+    if not booking_event_hub.subscribers and not invalidation_bus.has_peers:
+        return
+    booking_class = _booking_class
+    events = session.info.setdefault("booking_events", [])
+    for obj in session.new:
+        if isinstance(obj, booking_class):
+            events.append(_make_event("created", obj))
+    for obj in session.deleted:
+        if isinstance(obj, booking_class):
+            events.append(_make_event("deleted", obj))
+    for obj in session.dirty:
+        if isinstance(obj, booking_class) and session.is_modified(obj):
+            deleted = inspect(obj).attrs.deleted_at.history.added
+            events.append(_make_event("deleted" if deleted and deleted[0] else "updated", obj))
+
+
+def _make_event(kind: str, obj) -> tuple:
+    booking = obj.to_event()
+    message = json.dumps({"type": kind, "booking": booking}, ensure_ascii=False)
+    return obj.room_id, booking["date"], message
+
+
+def _publish_events(session):
+    for room_id, booking_date, message in session.info.pop("booking_events", ()):
+        invalidation_bus.publish("booking-events", {"roomId": room_id, "date": booking_date, "message": message})
+
+
+def _on_booking_event(payload: dict) -> None:
+    booking_event_hub.publish(payload["roomId"], payload["date"], payload["message"])
+
+
+def _discard_events(session):
+    session.info.pop("booking_events", None)
+
+
+def install_booking_events(booking_class, session_class=Session) -> None:
+    """Подписывает hub на коммиты ORM-сессий (повторный вызов ничего не делает)"""
+    global _booking_class
+    _booking_class = booking_class
+    if not event.contains(session_class, "after_flush", _collect_events):
+        event.listen(session_class, "after_flush", _collect_events)
+        event.listen(session_class, "after_commit", _publish_events)
+        event.listen(session_class, "after_rollback", _discard_events)
+    invalidation_bus.subscribe("booking-events", _on_booking_event)
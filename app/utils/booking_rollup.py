@@ -0,0 +1,192 @@
+"""
+Дневные сводки бронирований: booking_daily_rollup, строка на (room_id, date).
+
+В строке - число живых бронирований, занятые минуты, минуты в рабочем окне
+ROLLUP_DAY_START..ROLLUP_DAY_END (для загрузки) и выручка. Статистика и
+аналитика читают сводки вместо сканирования bookings: за год это не больше
+365 строк на комнату.
+
+Сводки поддерживаются инкрементально в той же транзакции, что и изменение:
+after_flush ORM-сессии считает дельты по созданным, перенесенным, отмененным
+и удаленным бронированиям и применяет их одним upsert (ON CONFLICT DO UPDATE
+есть и в SQLite, и в PostgreSQL). Откат транзакции откатывает и сводку.
+Выручка - booked_minutes x текущая цена комнаты (за час); изменение цены
+пересчитывает выручку сводок этой комнаты там же.
+
+Изменения bookings в обход ORM (ручной SQL, импорт) сводки не видят - после
+них и после смены рабочего окна сводки перестраиваются командой
+    python -m app.cli rebuild-rollups
+
+Настройки (переменные окружения):
+    ROLLUP_DAY_START - начало рабочего окна, по умолчанию 08:00
+    ROLLUP_DAY_END   - конец рабочего окна, по умолчанию 20:00
+"""
+import os
+
+from sqlalchemy import case, delete, event, func, insert, inspect, literal, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.utils.booking_time import parse_time
+
+ROLLUP_DAY_START = parse_time(os.getenv("ROLLUP_DAY_START", "08:00"))
+ROLLUP_DAY_END = parse_time(os.getenv("ROLLUP_DAY_END", "20:00"))
+
+_booking_class = None
+_room_class = None
+_rollup_class = None
+
+
+def working_minutes(start_minute: int, end_minute: int) -> int:
+    return max(0, min(end_minute, ROLLUP_DAY_END) - max(start_minute, ROLLUP_DAY_START))
+
+
+def _value(state, name: str, old: bool):
+    """Значение атрибута после (old=False) или до (old=True) flush"""
+    attr = state.attrs[name]
+    if old:
+        history = attr.history
+        if history.deleted:
+            return history.deleted[0]
+        if history.added:
+            return None
+    return attr.value
+
+
+def _contribution(state, old: bool):
+    """((room_id, date), (1, минут, минут в окне)) или None для отмененного/несуществующего"""
+    room_id = _value(state, "room_id", old)
+    booking_date = _value(state, "date", old)
+    if room_id is None or booking_date is None or _value(state, "deleted_at", old) is not None:
+        return None
+    start_minute = _value(state, "start_minute", old)
+    end_minute = _value(state, "end_minute", old)
+    return (room_id, booking_date), (1, end_minute - start_minute, working_minutes(start_minute, end_minute))
+
+
+def _add(deltas: dict, contribution, sign: int) -> None:
+    if contribution is None:
+        return
+    key, values = contribution
+    delta = deltas.setdefault(key, [0, 0, 0])
+    for index, value in enumerate(values):
+        delta[index] += sign * value
+
+
+def _collect_deltas(session) -> dict:
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, _booking_class):
+            _add(deltas, _contribution(inspect(obj), old=False), 1)
+    for obj in session.deleted:
+        if isinstance(obj, _booking_class):
+            _add(deltas, _contribution(inspect(obj), old=True), -1)
+    for obj in session.dirty:
+        if isinstance(obj, _booking_class):
+            state = inspect(obj)
+            before = _contribution(state, old=True)
+            after = _contribution(state, old=False)
+            if before != after:
+                _add(deltas, before, -1)
+                _add(deltas, after, 1)
+    return {key: delta for key, delta in deltas.items() if any(delta)}
+
+
+def _repriced_rooms(session) -> list:
+    rooms = []
+    for obj in session.dirty:
+        if isinstance(obj, _room_class) and inspect(obj).attrs.price.history.has_changes():
+            rooms.append(obj.id)
+    return rooms
+
+
+def _upsert(connection, rows: list):
+    table = _rollup_class.__table__
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = dialect_insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.room_id, table.c.date],
+        set_={
+            name: table.c[name] + statement.excluded[name]
+            for name in ("bookings", "booked_minutes", "working_minutes")
+        },
+    )
+
+
+def _revenue():
+    """booked_minutes x цена комнаты за час"""
+    table = _rollup_class.__table__
+    price = select(func.coalesce(_room_class.price, 0)).where(_room_class.id == table.c.room_id).scalar_subquery()
+    return func.coalesce(table.c.booked_minutes * price / 60.0, 0)
+
+
+def _apply_rollup(session, flush_context):
+    """after_flush: дельты сводок в той же транзакции"""
+    deltas = _collect_deltas(session)
+    repriced = _repriced_rooms(session)
+    if not deltas and not repriced:
+        return
+    table = _rollup_class.__table__
+    connection = session.connection()
+    if deltas:
+        keys = list(deltas)
+        connection.execute(_upsert(connection, [
+            {"room_id": room_id, "date": booking_date, "bookings": delta[0], "booked_minutes": delta[1], "working_minutes": delta[2], "revenue": 0}
+            for (room_id, booking_date), delta in deltas.items()
+        ]))
+        touched = tuple_(table.c.room_id, table.c.date).in_(keys)
+        connection.execute(update(table).where(touched).values(revenue=_revenue()))
+        connection.execute(delete(table).where(touched, table.c.bookings <= 0))
+    if repriced:
+        connection.execute(update(table).where(table.c.room_id.in_(repriced)).values(revenue=_revenue()))
+
+
+async def rebuild_booking_rollups(connection) -> int:
+    """
+    Пересобирает сводки из bookings одним INSERT ... SELECT GROUP BY в
+    транзакции вызывающего (AsyncConnection). Возвращает число строк сводки
+    """
+    booking = _booking_class
+    table = _rollup_class.__table__
+    if connection.dialect.name == "postgresql":
+        # Иначе бронирование, закоммиченное во время пересборки, потеряется
+        await connection.exec_driver_sql(f"LOCK TABLE {booking.__tablename__} IN SHARE MODE")
+    start = case((booking.start_minute > ROLLUP_DAY_START, booking.start_minute), else_=ROLLUP_DAY_START)
+    end = case((booking.end_minute < ROLLUP_DAY_END, booking.end_minute), else_=ROLLUP_DAY_END)
+    aggregates = (
+        select(
+            booking.room_id,
+            booking.date,
+            func.count(booking.id),
+            func.sum(booking.end_minute - booking.start_minute),
+            func.sum(case((end > start, end - start), else_=0)),
+            literal(0.0),
+        )
+        .where(booking.deleted_at.is_(None))
+        .group_by(booking.room_id, booking.date)
+    )
+    await connection.execute(delete(table))
+    await connection.execute(insert(table).from_select(
+        ["room_id", "date", "bookings", "booked_minutes", "working_minutes", "revenue"], aggregates
+    ))
+    await connection.execute(update(table).values(revenue=_revenue()))
+    return await connection.scalar(select(func.count()).select_from(table))
+
+
+async def booking_rollups_missing(connection) -> bool:
+    """Бронирования есть, а сводок нет - таблицу только что создали на старой базе"""
+    has_rollups = await connection.scalar(select(_rollup_class.__table__.c.room_id).limit(1))
+    has_bookings = await connection.scalar(
+        select(_booking_class.id).where(_booking_class.deleted_at.is_(None)).limit(1)
+    )
+    return has_rollups is None and has_bookings is not None
+
+
+def install_booking_rollup(booking_class, room_class, rollup_class, session_class=Session) -> None:
+    """Подписывает сводки на flush ORM-сессий (повторный вызов ничего не делает)"""
+    global _booking_class, _room_class, _rollup_class
+    _booking_class, _room_class, _rollup_class = booking_class, room_class, rollup_class
+    if not event.contains(session_class, "after_flush", _apply_rollup):
+        event.listen(session_class, "after_flush", _apply_rollup)
@@ -0,0 +1,28 @@
+"""
+Время бронирования хранится в БД как целое число минут от полуночи.
+Наружу (JSON) по-прежнему отдается строка "HH:MM".
+"""
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_time(value: str) -> int:
+    """Строка HH:MM (или H:MM) -> минуты от полуночи. Бросает ValueError на неверный формат"""
+    if isinstance(value, int):
+        minutes = value
+    else:
+        hours, sep, mins = str(value).strip().partition(":")
+        if not sep or not hours.isdigit() or len(mins) != 2 or not mins.isdigit():
+            raise ValueError(f"Invalid time format: {value!r}. Use HH:MM")
+        if int(mins) >= 60:
+            raise ValueError(f"Invalid time format: {value!r}. Use HH:MM")
+        minutes = int(hours) * 60 + int(mins)
+
+    if not 0 <= minutes <= MINUTES_PER_DAY:
+        raise ValueError(f"Time out of range: {value!r}")
+    return minutes
+
+
+def format_time(minutes: int) -> str:
+    """Минуты от полуночи -> строка HH:MM"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
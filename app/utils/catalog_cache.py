@@ -0,0 +1,112 @@
+"""
+Read-through кэш справочников (комнаты, роли): готовое JSON-тело + версия.
+
+Справочники меняются редко, а читаются на каждом переключении вида, поэтому
+GET /api/rooms/ и GET /api/roles/ отдают байты из памяти и не ходят в БД.
+Первое чтение после изменения загружает справочник (loader), сериализует
+его один раз и запоминает.
+
+Запись действительна, пока не изменилась версия таблицы (table_versions):
+ее поднимает коммит, затронувший Room/Role, в этом воркере и в остальных
+(через шину инвалидации). Версия, прочитанная до загрузки, сохраняется в
+записи - загрузка, начатая до изменения, сразу устаревает. По ней и окну
+version_epoch строится ETag: версия 0 у только что запущенного воркера не
+закрепляет за собой данные дольше окна. Шина не гарантирует доставку, а
+memory:// не выходит за процесс, поэтому у записей есть TTL - для memory://
+короткий: остальные воркеры узнают об изменении только по нему.
+
+Настройки (переменные окружения):
+    CATALOG_CACHE_TTL - время жизни записи, секунды, по умолчанию 300 для шины
+                        между процессами и 10 для memory://; 0 - кэш выключен
+"""
+import asyncio
+import os
+import time
+
+import orjson
+
+from app.utils.invalidation_bus import invalidation_bus
+from app.utils.table_versions import table_versions, version_epoch
+
+CATALOG_CACHE_TTL = float(os.getenv(
+    "CATALOG_CACHE_TTL", "300" if invalidation_bus.cross_process else "10"
+))
+
+CATALOGS = ("rooms", "roles")
+
+
+class CatalogEntry:
+    __slots__ = ("name", "body", "version", "expires_at")
+
+    def __init__(self, name: str, body: bytes, version: int, expires_at: float):
+        self.name = name
+        self.body = body
+        self.version = version
+        self.expires_at = expires_at
+
+    @property
+    def etag(self) -> str:
+        """Окно считается при каждом ответе - запись живет дольше одного окна"""
+        return make_etag(self.name, version_epoch(), self.version)
+
+
+class CatalogCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}
+        # Одновременные промахи ждут одну загрузку, а не идут в БД каждый
+        self._locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, name: str, loader) -> CatalogEntry:
+        """Запись справочника; loader - async-функция, возвращающая JSON-совместимые данные"""
+        entry = self._fresh(name)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            entry = self._fresh(name)
+            if entry is not None:
+                return entry
+            version = table_versions.get(name)
+            body = orjson.dumps(await loader())
+            previous = self._entries.get(name)
+            if previous is not None and previous.version == version and previous.body != body:
+                # Истек TTL, а данные другие: сообщение шины потерялось - новая версия,
+                # иначе клиенты со старым ETag получали бы 304
+                version = table_versions.bump(name)
+            entry = CatalogEntry(name, body, version, time.monotonic() + self.ttl)
+            if self.ttl > 0:
+                self._entries[name] = entry
+            return entry
+
+    def stats(self) -> dict:
+        return {
+            "catalogs": {
+                name: {
+                    "version": table_versions.get(name),
+                    "cached": self._fresh(name) is not None,
+                    "bytes": len(self._entries[name].body) if name in self._entries else 0,
+                }
+                for name in CATALOGS
+            },
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _fresh(self, name: str):
+        entry = self._entries.get(name)
+        if entry is not None and entry.version == table_versions.get(name) and entry.expires_at > time.monotonic():
+            return entry
+        return None
+
+
+def make_etag(*parts) -> str:
+    """Слабый ETag из имени и версий: W/"rooms-1760000000000000000" """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+catalog_cache = CatalogCache(CATALOG_CACHE_TTL)
@@ -0,0 +1,18 @@
+"""
+Окружение, в котором запущено приложение.
+
+Отладочные режимы (проверка числа SQL-запросов, dev-ключ подписи токенов)
+работают только в явно объявленном окружении разработки или тестов -
+случайно оставленная переменная не включит их на боевом трафике.
+
+Настройки (переменные окружения):
+    APP_ENV - production (по умолчанию), development или test
+"""
+import os
+
+APP_ENV = os.getenv("APP_ENV", "production").lower()
+DEV_ENVIRONMENTS = ("development", "test")
+
+
+def is_dev_environment() -> bool:
+    return APP_ENV in DEV_ENVIRONMENTS
@@ -0,0 +1,377 @@
+"""
+Шина инвалидации in-process кэшей между воркерами.
+
+У каждого воркера uvicorn свои кэши (занятость комнат, комнаты, роли) и свои
+WebSocket-подписчики. publish(channel, payload) синхронно вызывает
+обработчики этого воркера и отправляет сообщение остальным воркерам через
+бэкенд; у них те же обработчики вызываются из фоновой задачи шины.
+Обработчики синхронные и должны быть быстрыми (сбросить запись, разослать
+событие).
+
+Бэкенд выбирается по INVALIDATION_BUS_URL:
+    memory://                 - один процесс (по умолчанию); несколько шин
+                                MemoryBus с общим брокером видят друг друга
+    sqlite:///path/to/bus.db  - воркеры на одной машине: сообщения пишутся в
+                                отдельный SQLite-файл, получатели опрашивают
+                                PRAGMA data_version (меняется только при
+                                коммите другого соединения, чтение дешевое)
+    redis://host:6379/0       - несколько машин, Redis pub/sub (нужен пакет
+                                redis; подойдет любой совместимый клиент)
+
+Шина не гарантирует доставку: сообщения, отправленные до start() или после
+stop(), другие воркеры не увидят. Поэтому у кэшей остается TTL.
+
+Настройки (переменные окружения):
+    INVALIDATION_BUS_URL        - бэкенд, по умолчанию memory://
+    INVALIDATION_BUS_POLL_MS    - период опроса SQLite, по умолчанию 100
+    INVALIDATION_BUS_RETENTION  - сколько секунд хранить сообщения в SQLite, по умолчанию 60
+    INVALIDATION_BUS_CHANNEL    - канал Redis, по умолчанию soveshaika:invalidate
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_BUS_URL = os.getenv("INVALIDATION_BUS_URL", "memory://")
+INVALIDATION_BUS_POLL_MS = int(os.getenv("INVALIDATION_BUS_POLL_MS", "100"))
+INVALIDATION_BUS_RETENTION = float(os.getenv("INVALIDATION_BUS_RETENTION", "60"))
+INVALIDATION_BUS_CHANNEL = os.getenv("INVALIDATION_BUS_CHANNEL", "soveshaika:invalidate")
+
+
+class InvalidationBus:
+    """Общая часть: подписки, локальная доставка, счетчики"""
+
+    backend = "none"
+    # Доходят ли сообщения до других процессов (для memory:// - нет)
+    cross_process = False
+
+    def __init__(self):
+        # Сообщения от самого себя, вернувшиеся через бэкенд, пропускаются
+        self.origin = uuid.uuid4().hex
+        self._handlers = defaultdict(list)
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+
+    @property
+    def has_peers(self) -> bool:
+        """Могут ли сообщения дойти до других воркеров"""
+        return False
+
+    def subscribe(self, channel: str, handler) -> None:
+        if handler not in self._handlers[channel]:
+            self._handlers[channel].append(handler)
+
+    def publish(self, channel: str, payload: dict) -> None:
+        """Вызывать из потока event loop (например, в after_commit сессии)"""
+        self.published += 1
+        self._dispatch(channel, payload)
+        self._send(channel, payload)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "published": self.published,
+            "received": self.received,
+            "errors": self.errors,
+        }
+
+    def _send(self, channel: str, payload: dict) -> None:
+        pass
+
+    def _receive(self, origin: str, channel: str, payload: dict) -> None:
+        if origin == self.origin:
+            return
+        self.received += 1
+        self._dispatch(channel, payload)
+
+    def _dispatch(self, channel: str, payload: dict) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                self.errors += 1
+                logger.exception("Ошибка обработчика шины инвалидации", extra={"channel": channel})
+
+
+class MemoryBus(InvalidationBus):
+    backend = "memory"
+
+    def __init__(self, broker: list = None):
+        super().__init__()
+        # Шины с общим брокером ведут себя как воркеры одного приложения
+        self._broker = broker if broker is not None else []
+        self._broker.append(self)
+
+    @property
+    def has_peers(self) -> bool:
+        return len(self._broker) > 1
+
+    def _send(self, channel: str, payload: dict) -> None:
+        for bus in self._broker:
+            if bus is not self:
+                bus._receive(self.origin, channel, payload)
+
+
+class _RemoteBus(InvalidationBus, ABC):
+    """
+    Бэкенд в другом процессе: отправка пачками из фоновой задачи, прием - в своей.
+    Транспорт без любого из абстрактных методов не создается (TypeError)
+    """
+
+    cross_process = True
+
+    def __init__(self):
+        super().__init__()
+        self._outbox = deque()
+        self._wakeup = None
+        self._tasks = []
+
+    @property
+    def has_peers(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        await self._connect()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(self._write_loop)),
+            asyncio.create_task(self._run(self._read_loop)),
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._outbox:
+            # Дописываем то, что успели опубликовать перед остановкой
+            await self._write(self._drain())
+        await self._close()
+
+    def _send(self, channel: str, payload: dict) -> None:
+        if not self._tasks:
+            return
+        self._outbox.append(json.dumps({"o": self.origin, "c": channel, "p": payload}))
+        self._wakeup.set()
+
+    def _drain(self) -> list:
+        batch = list(self._outbox)
+        self._outbox.clear()
+        return batch
+
+    def _receive_raw(self, raw) -> None:
+        message = json.loads(raw)
+        self._receive(message["o"], message["c"], message["p"])
+
+    async def _write_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await self._write(self._drain())
+
+    async def _run(self, loop) -> None:
+        # Бэкенд недоступен - не роняем воркер, повторяем с паузой
+        delay = 0.5
+        while True:
+            try:
+                await loop()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.errors += 1
+                logger.exception("Ошибка шины инвалидации", extra={"backend": self.backend})
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    @abstractmethod
+    async def _connect(self) -> None:
+        ...
+
+    @abstractmethod
+    async def _close(self) -> None:
+        ...
+
+    @abstractmethod
+    async def _write(self, batch: list) -> None:
+        ...
+
+    @abstractmethod
+    async def _read_loop(self) -> None:
+        ...
+
+
+class SQLiteBus(_RemoteBus):
+    backend = "sqlite"
+
+    def __init__(self, path: str, poll_ms: int = INVALIDATION_BUS_POLL_MS, retention: float = INVALIDATION_BUS_RETENTION):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_ms / 1000
+        self.retention = retention
+        self._connection = None
+        self._last_id = 0
+        self._data_version = None
+        self._pruned_at = 0.0
+        # sqlite3-соединение используется из одного потока
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="invalidation-bus")
+
+    async def _call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def _connect(self) -> None:
+        await self._call(self._open)
+
+    async def _close(self) -> None:
+        await self._call(self._connection.close)
+        self._executor.shutdown(wait=False)
+
+    async def _write(self, batch: list) -> None:
+        if batch:
+            await self._call(self._insert, batch)
+
+    async def _read_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for raw in await self._call(self._poll):
+                self._receive_raw(raw)
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS invalidations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, message TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        # Старые сообщения новому воркеру не нужны - его кэши пустые
+        self._last_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()[0]
+        self._data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+        self._connection = connection
+
+    def _insert(self, batch: list) -> None:
+        now = time.time()
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.executemany(
+                "INSERT INTO invalidations (message, created_at) VALUES (?, ?)",
+                [(raw, now) for raw in batch],
+            )
+            if now - self._pruned_at > self.retention:
+                self._connection.execute("DELETE FROM invalidations WHERE created_at < ?", (now - self.retention,))
+                self._pruned_at = now
+
+    def _poll(self) -> list:
+        data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return []
+        self._data_version = data_version
+        rows = self._connection.execute(
+            "SELECT id, message FROM invalidations WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        if rows:
+            self._last_id = rows[-1][0]
+        return [message for _, message in rows]
+
+
+class RedisBus(_RemoteBus):
+    backend = "redis"
+
+    def __init__(self, client, channel: str = INVALIDATION_BUS_CHANNEL):
+        """client - redis.asyncio.Redis или совместимая замена (publish, pubsub)"""
+        super().__init__()
+        self.client = client
+        self.channel = channel
+        self._pubsub = None
+
+    async def _connect(self) -> None:
+        self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+
+    async def _close(self) -> None:
+        await self._pubsub.unsubscribe(self.channel)
+        await self._pubsub.close()
+        await self.client.close()
+
+    async def _write(self, batch: list) -> None:
+        for raw in batch:
+            await self.client.publish(self.channel, raw)
+
+    async def _read_loop(self) -> None:
+        async for message in self._pubsub.listen():
+            if message.get("type") == "message":
+                self._receive_raw(message["data"])
+
+
+def create_bus(url: str) -> InvalidationBus:
+    if url.startswith("memory:"):
+        return MemoryBus()
+    if url.startswith("sqlite:"):
+        return SQLiteBus(url.split(":///", 1)[-1])
+    if url.startswith(("redis:", "rediss:", "unix:")):
+        try:
+            import redis.asyncio
+        except ImportError:
+            raise RuntimeError("INVALIDATION_BUS_URL=redis://... требует пакет redis (pip install redis)")
+        return RedisBus(redis.asyncio.from_url(url))
+    raise ValueError(f"Неизвестный бэкенд шины инвалидации: {url}")
+
+
+invalidation_bus = create_bus(INVALIDATION_BUS_URL)
+
+
+# Модель -> канал; передается при установке, чтобы utils не зависел от models
+_entity_channels = {}
+
+
+def _collect_entities(session, flush_context):
+    """after_flush: id созданных/измененных/удаленных объектов по каналам"""
+    changed = session.info.setdefault("invalidated_entities", {})
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        channel = _entity_channels.get(type(obj))
+        if channel is not None:
+            changed.setdefault(channel, set()).add(obj.id)
+
+
+def _publish_entities(session):
+    version = time.time_ns()
+    for channel, ids in session.info.pop("invalidated_entities", {}).items():
+        invalidation_bus.publish(channel, {"ids": sorted(ids), "version": version})
+
+
+def _discard_entities(session):
+    session.info.pop("invalidated_entities", None)
+
+
+def install_entity_invalidation(channels: dict, session_class=Session) -> None:
+    """
+    {Модель: канал}: после коммита, затронувшего объекты модели, публикует
+    {"ids": [...], "version": время коммита в нс} в ее канал (повторный
+    вызов только обновляет словарь)
+    """
+    _entity_channels.update(channels)
+    if not event.contains(session_class, "after_flush", _collect_entities):
+        event.listen(session_class, "after_flush", _collect_entities)
+        event.listen(session_class, "after_commit", _publish_entities)
+        event.listen(session_class, "after_rollback", _discard_entities)
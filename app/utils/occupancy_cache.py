@@ -0,0 +1,234 @@
+"""
+Кэш занятости комнат по дням: (room_id, date) -> битовая маска слотов.
+
+Сутки делятся на слоты по OCCUPANCY_SLOT_MINUTES минут, занятый слот - единичный
+бит в int. Проверка пересечения - одно побитовое И вместо запроса к bookings.
+Бронирования не обязаны попадать в сетку слотов, поэтому маска консервативна:
+"свободно" по ней всегда точно, а "занято" точно только когда и бронирования
+дня, и проверяемый интервал выровнены по слотам. В остальных случаях
+is_free возвращает None и решает SQL.
+
+Записи заполняются лениво (BookingRepository.get_day_occupancy). После коммита
+сессии новые бронирования дописываются в маску, измененные и удаленные -
+сбрасывают запись (install_occupancy_invalidation, ловит и каскадные удаления
+комнат/пользователей). Изменения рассылаются через шину инвалидации, так что
+другие воркеры обновляют свои записи так же. Шина не гарантирует доставку,
+поэтому у записей есть TTL; окончательно пересечения все равно запрещает БД.
+
+Настройки (переменные окружения):
+    OCCUPANCY_SLOT_MINUTES     - размер слота, по умолчанию 5
+    OCCUPANCY_CACHE_SIZE       - максимум записей (LRU), 0 - кэш выключен
+    OCCUPANCY_CACHE_MAX_BYTES  - ограничение памяти, по умолчанию 8 МБ
+    OCCUPANCY_CACHE_TTL        - время жизни записи, секунды
+"""
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import date
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.utils.invalidation_bus import invalidation_bus
+
+OCCUPANCY_SLOT_MINUTES = int(os.getenv("OCCUPANCY_SLOT_MINUTES", "5"))
+OCCUPANCY_CACHE_SIZE = int(os.getenv("OCCUPANCY_CACHE_SIZE", "20000"))
+OCCUPANCY_CACHE_MAX_BYTES = int(os.getenv("OCCUPANCY_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+OCCUPANCY_CACHE_TTL = float(os.getenv("OCCUPANCY_CACHE_TTL", "60"))
+
+# Ключ, узел OrderedDict и сама запись - примерная цена записи без маски
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def is_aligned(start_minute: int, end_minute: int, slot: int = OCCUPANCY_SLOT_MINUTES) -> bool:
+    return start_minute % slot == 0 and end_minute % slot == 0
+
+
+def interval_mask(start_minute: int, end_minute: int, slot: int = OCCUPANCY_SLOT_MINUTES) -> int:
+    """Биты всех слотов, которые задевает интервал [start, end)"""
+    first = start_minute // slot
+    last = -(-end_minute // slot)
+    return ((1 << (last - first)) - 1) << first
+
+
+class DayOccupancy:
+    __slots__ = ("bits", "aligned", "expires_at")
+
+    def __init__(self, bits: int = 0, aligned: bool = True, expires_at: float = 0.0):
+        self.bits = bits
+        self.aligned = aligned
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_intervals(cls, intervals, expires_at: float = 0.0) -> "DayOccupancy":
+        occupancy = cls(expires_at=expires_at)
+        for start_minute, end_minute in intervals:
+            occupancy.add(start_minute, end_minute)
+        return occupancy
+
+    def add(self, start_minute: int, end_minute: int) -> None:
+        self.bits |= interval_mask(start_minute, end_minute)
+        self.aligned = self.aligned and is_aligned(start_minute, end_minute)
+
+    def is_free(self, start_minute: int, end_minute: int):
+        """True/False, либо None, если по маске ответить точно нельзя"""
+        if not self.bits & interval_mask(start_minute, end_minute):
+            return True
+        if self.aligned and is_aligned(start_minute, end_minute):
+            return False
+        return None
+
+
+class OccupancyCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, DayOccupancy]" = OrderedDict()
+        self._bytes = 0
+        # Растет при каждом изменении; загрузка, начатая до изменения,
+        # не должна положить в кэш устаревшие данные
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, room_id: str, booking_date):
+        key = (room_id, booking_date)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(self, room_id: str, booking_date, intervals, generation: int):
+        """Кладет запись, если с начала загрузки (generation) ничего не менялось"""
+        entry = DayOccupancy.from_intervals(intervals, time.monotonic() + self.ttl)
+        if not self.enabled or generation != self.generation:
+            return entry
+        key = (room_id, booking_date)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += self._entry_size(entry)
+        self._evict()
+        return entry
+
+    def add(self, room_id: str, booking_date, start_minute: int, end_minute: int) -> None:
+        """Новое бронирование - дописываем в маску, если запись есть"""
+        self.generation += 1
+        entry = self._entries.get((room_id, booking_date))
+        if entry is not None:
+            self._bytes -= self._entry_size(entry)
+            entry.add(start_minute, end_minute)
+            self._bytes += self._entry_size(entry)
+
+    def invalidate(self, room_id: str, booking_date) -> None:
+        self.generation += 1
+        self._remove((room_id, booking_date))
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "slotMinutes": OCCUPANCY_SLOT_MINUTES,
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    @staticmethod
+    def _entry_size(entry: DayOccupancy) -> int:
+        return sys.getsizeof(entry.bits) + _ENTRY_OVERHEAD_BYTES
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._entry_size(entry)
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(entry)
+            self.evictions += 1
+
+
+occupancy_cache = OccupancyCache(OCCUPANCY_CACHE_SIZE, OCCUPANCY_CACHE_MAX_BYTES, OCCUPANCY_CACHE_TTL)
+
+# Модель бронирования передается при установке, чтобы utils не зависел от models
+_booking_class = None
+
+
+def _collect_changes(session, flush_context):
+    """after_flush: запоминаем затронутые (room_id, date) до коммита"""
+    booking_class = _booking_class
+    changes = session.info.setdefault("occupancy_changes", [])
+    for obj in session.new:
+        if isinstance(obj, booking_class):
+            changes.append(("add", obj.room_id, obj.date, obj.start_minute, obj.end_minute))
+    for obj in session.deleted:
+        if isinstance(obj, booking_class):
+            changes.append(("invalidate", obj.room_id, obj.date))
+    for obj in session.dirty:
+        if isinstance(obj, booking_class):
+            state = inspect(obj)
+            changes.append(("invalidate", obj.room_id, obj.date))
+            # Бронирование перенесли - старый день тоже устарел
+            old_rooms = state.attrs.room_id.history.deleted or [obj.room_id]
+            old_dates = state.attrs.date.history.deleted or [obj.date]
+            for room_id in old_rooms:
+                for booking_date in old_dates:
+                    changes.append(("invalidate", room_id, booking_date))
+
+
+def _apply_changes(session):
+    # Через шину: применяется и в этом воркере, и в остальных;
+    # version - для версий дней (table_versions)
+    version = time.time_ns()
+    for change in session.info.pop("occupancy_changes", ()):
+        payload = {"op": change[0], "roomId": change[1], "date": change[2].isoformat(), "version": version}
+        if change[0] == "add":
+            payload["start"], payload["end"] = change[3], change[4]
+        invalidation_bus.publish("occupancy", payload)
+
+
+def _on_occupancy_message(payload: dict) -> None:
+    booking_date = date.fromisoformat(payload["date"])
+    if payload["op"] == "add":
+        occupancy_cache.add(payload["roomId"], booking_date, payload["start"], payload["end"])
+    else:
+        occupancy_cache.invalidate(payload["roomId"], booking_date)
+
+
+def _discard_changes(session):
+    session.info.pop("occupancy_changes", None)
+
+
+def install_occupancy_invalidation(booking_class, session_class=Session) -> None:
+    """Подписывает кэш на коммиты ORM-сессий (повторный вызов ничего не делает)"""
+    global _booking_class
+    _booking_class = booking_class
+    if not event.contains(session_class, "after_flush", _collect_changes):
+        event.listen(session_class, "after_flush", _collect_changes)
+        event.listen(session_class, "after_commit", _apply_changes)
+        event.listen(session_class, "after_rollback", _discard_changes)
+    invalidation_bus.subscribe("occupancy", _on_occupancy_message)
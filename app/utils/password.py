@@ -0,0 +1,114 @@
+"""
+Хеширование и проверка паролей bcrypt вне event loop.
+
+Один вызов bcrypt занимает 200-300 мс CPU, поэтому он выполняется в
+ограниченном пуле воркеров. Запросы сверх числа воркеров ждут своей
+очереди (await не блокирует loop), а при переполнении очереди сразу
+получают PasswordHashingBusy - шторм логинов не копится бесконечно.
+
+Настройки (переменные окружения):
+    PASSWORD_HASH_WORKERS    - размер пула (по умолчанию min(4, CPU))
+    PASSWORD_HASH_EXECUTOR   - thread (по умолчанию) или process
+    PASSWORD_HASH_MAX_QUEUE  - сколько запросов может ждать воркера
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from app.exceptions.user_exceptions import PasswordHashingBusy
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread").lower()
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "100"))
+
+
+def _hash_sync(password: str) -> str:
+    # bcrypt импортируется при первом хешировании, а не при старте приложения
+    import bcrypt
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def _verify_sync(plain_password: str, hashed_password: str) -> bool:
+    import bcrypt
+    try:
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except ValueError:
+        # В БД лежит не bcrypt-хеш
+        return False
+
+
+class PasswordHasherPool:
+    def __init__(self, workers: int, executor: str = "thread", max_queue: int = 100):
+        self.workers = max(1, workers)
+        self.executor_kind = executor
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self.workers)
+
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+
+    def _get_executor(self) -> Executor:
+        # Пул создается при первом логине, а не при импорте
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise PasswordHashingBusy("Too many concurrent password checks, try again later")
+
+        self.queued += 1
+        enqueued_at = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.total_wait += time.perf_counter() - enqueued_at
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "inFlight": self.in_flight,
+            "queued": self.queued,
+            "maxQueue": self.max_queue,
+            "saturation": round(self.in_flight / self.workers, 3),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avgWaitMs": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_pool = PasswordHasherPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_MAX_QUEUE)
+
+
+async def hash_password(password: str) -> str:
+    return await password_pool.run(_hash_sync, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(_verify_sync, plain_password, hashed_password)
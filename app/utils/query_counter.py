@@ -0,0 +1,75 @@
+"""
+Подсчет SQL-запросов, выполненных в рамках запроса к API или блока кода.
+
+Режим проверки включается переменной окружения QUERY_COUNT_ASSERT=true:
+для списочных эндпоинтов задан фиксированный лимит запросов, который не
+зависит от размера выборки. При превышении лимита бросается AssertionError,
+поэтому тесты через TestClient падают на любом N+1 (tests/test_query_budgets.py).
+
+Проверка бросает исключение на живом запросе, поэтому работает только при
+APP_ENV=development или test; в production флаг игнорируется.
+"""
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from app.utils.environment import is_dev_environment
+
+QUERY_COUNT_REQUESTED = os.getenv("QUERY_COUNT_ASSERT", "False").lower() == "true"
+QUERY_COUNT_ASSERT = QUERY_COUNT_REQUESTED and is_dev_environment()
+
+# (метод, путь) -> максимальное число SQL-запросов на один вызов
+QUERY_BUDGETS = {
+    ("GET", "/api/bookings/"): 1,
+    ("GET", "/api/users/"): 1,
+    ("GET", "/api/admin/users"): 1,
+    ("GET", "/api/admin/stats"): 1,
+    ("GET", "/api/rooms/"): 1,
+    ("GET", "/api/roles/"): 1,
+}
+
+_current_counter: ContextVar[Optional["QueryCounter"]] = ContextVar("query_counter", default=None)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+def install_query_counter(engine) -> None:
+    """Подключает счетчик к движку (повторный вызов ничего не делает)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = ""):
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(counter.statements)
+        raise AssertionError(
+            f"{label or 'block'} issued {counter.count} SQL statements, limit is {limit}:\n{statements}"
+        )
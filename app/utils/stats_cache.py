@@ -0,0 +1,91 @@
+"""
+Снимок счетчиков GET /api/admin/stats: готовое JSON-тело в памяти.
+
+Дашборды опрашивают статистику каждые несколько секунд, а меняется она
+только при изменении пользователей, комнат и бронирований. Снимок хранит
+версии этих таблиц (table_versions), при которых посчитан: коммит, поднявший
+любую из них (в этом воркере или, через шину, в соседнем), делает снимок
+устаревшим, и следующий запрос пересчитывает его одним SQL-запросом.
+Одновременные запросы ждут один пересчет. Короткий TTL - страховка на
+случай потерянного сообщения шины; для ETag (304 без снимка) такой
+страховкой служит окно version_epoch.
+
+Настройки (переменные окружения):
+    STATS_CACHE_TTL - время жизни снимка, секунды, по умолчанию 5; 0 - без снимка
+"""
+import asyncio
+import os
+import time
+
+import orjson
+
+from app.utils.catalog_cache import make_etag
+from app.utils.table_versions import table_versions, version_epoch
+
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "5"))
+
+# Таблицы, от которых зависят счетчики (и ETag ответа)
+STATS_VERSION_KEYS = ("users", "rooms", "bookings", "booking-rollups")
+
+
+class StatsSnapshot:
+    __slots__ = ("body", "etag", "versions", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, versions: tuple, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.versions = versions
+        self.expires_at = expires_at
+
+
+class StatsCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot = None
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def etag(self) -> str:
+        """ETag текущих версий - для 304 без чтения снимка"""
+        return make_etag("stats", *self._versions())
+
+    async def get(self, loader) -> StatsSnapshot:
+        """loader - async-функция, возвращающая словарь счетчиков"""
+        snapshot = self._fresh()
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        async with self._lock:
+            snapshot = self._fresh()
+            if snapshot is not None:
+                return snapshot
+            # Версии до запроса: изменение во время подсчета сделает снимок устаревшим
+            versions = self._versions()
+            body = orjson.dumps(await loader())
+            snapshot = StatsSnapshot(body, make_etag("stats", *versions), versions, time.monotonic() + self.ttl)
+            if self.ttl > 0:
+                self._snapshot = snapshot
+            return snapshot
+
+    def stats(self) -> dict:
+        return {
+            "cached": self._fresh() is not None,
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _fresh(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.versions == self._versions() and snapshot.expires_at > time.monotonic():
+            return snapshot
+        return None
+
+    @staticmethod
+    def _versions() -> tuple:
+        return (*(table_versions.get(key) for key in STATS_VERSION_KEYS), version_epoch())
+
+
+stats_cache = StatsCache(STATS_CACHE_TTL)
@@ -0,0 +1,86 @@
+"""
+Версии таблиц и партиций (бронирования за день) для ETag и кэшей.
+
+Версия меняется при каждом закоммиченном изменении: ее поднимают сообщения
+шины инвалидации ("rooms", "roles", "users", "occupancy", "booking-rollups"),
+поэтому все воркеры видят одни и те же изменения. Значение - время изменения в нс,
+которое публикатор кладет в сообщение ("version"): воркеры, получившие одно
+и то же изменение, приходят к одной версии, и ETag совпадает независимо от
+того, какой воркер ответил. Версия никогда не уменьшается; до первого
+изменения она 0 у всех воркеров.
+
+Шина не гарантирует доставку, а memory:// вообще не выходит за процесс:
+воркер, пропустивший изменение, отвечал бы 304 на устаревшие данные без
+срока. Поэтому в ETag входит еще номер окна времени (version_epoch):
+TABLE_VERSIONS_MAX_AGE секунд, по умолчанию 300 для транспорта между
+процессами (sqlite://, redis://) и 10 для memory://. Устаревший ETag живет
+не дольше окна - и после пропущенного сообщения, и после перезапуска.
+
+Ключи бронирований: "bookings" (все), "bookings:YYYY-MM-DD" (день) и
+"bookings:YYYY-MM" (месяц). Хранятся последние TABLE_VERSIONS_MAX_PARTITIONS
+ключей; вытесненный получает "пол" - максимум вытесненных версий.
+
+Настройки (переменные окружения):
+    TABLE_VERSIONS_MAX_PARTITIONS - сколько ключей хранить, по умолчанию 10000
+    TABLE_VERSIONS_MAX_AGE        - окно ETag в секундах (см. выше)
+"""
+import os
+import time
+from collections import OrderedDict
+
+from app.utils.invalidation_bus import invalidation_bus
+
+TABLE_VERSIONS_MAX_PARTITIONS = int(os.getenv("TABLE_VERSIONS_MAX_PARTITIONS", "10000"))
+TABLE_VERSIONS_MAX_AGE = float(os.getenv(
+    "TABLE_VERSIONS_MAX_AGE", "300" if invalidation_bus.cross_process else "10"
+))
+
+
+def new_version() -> int:
+    """Значение поля "version" для сообщения шины"""
+    return time.time_ns()
+
+
+def version_epoch() -> int:
+    """Номер окна TABLE_VERSIONS_MAX_AGE - часть ETag, одинаковая у всех воркеров"""
+    return int(time.time() // TABLE_VERSIONS_MAX_AGE)
+
+
+class TableVersions:
+    def __init__(self, max_partitions: int):
+        self.max_partitions = max_partitions
+        self._floor = 0
+        self._versions = OrderedDict()
+
+    def get(self, key: str) -> int:
+        return self._versions.get(key, self._floor)
+
+    def bump(self, key: str, version: int = None) -> int:
+        """Новая версия строго больше прежней (даже если часы отстают)"""
+        version = max(self.get(key) + 1, version or new_version())
+        self._versions[key] = version
+        self._versions.move_to_end(key)
+        while len(self._versions) > self.max_partitions:
+            _, evicted = self._versions.popitem(last=False)
+            self._floor = max(self._floor, evicted)
+        return version
+
+
+table_versions = TableVersions(TABLE_VERSIONS_MAX_PARTITIONS)
+
+
+def _on_entities(channel: str):
+    return lambda payload: table_versions.bump(channel, payload.get("version"))
+
+
+def _on_occupancy(payload: dict) -> None:
+    version = payload.get("version")
+    table_versions.bump("bookings", version)
+    table_versions.bump("bookings:" + payload["date"], version)
+    # Месяц - период кэша аналитики (app/utils/analytics_cache.py)
+    table_versions.bump("bookings:" + payload["date"][:7], version)
+
+
+for _channel in ("rooms", "roles", "users", "booking-rollups"):
+    invalidation_bus.subscribe(_channel, _on_entities(_channel))
+invalidation_bus.subscribe("occupancy", _on_occupancy)
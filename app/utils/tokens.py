@@ -0,0 +1,88 @@
+"""
+Короткоживущие подписанные access-токены (JWT, HS256).
+
+Токен выдается при входе и содержит id пользователя и его роль, поэтому
+проверка запроса не требует ни bcrypt, ни обращения к users/role.
+Уже проверенные токены хранятся в LRU-кэше: повторный запрос с тем же
+токеном стоит один поиск в словаре и сравнение exp.
+
+Без JWT_SECRET приложение не стартует: ключом по умолчанию из открытого
+репозитория любой подписал бы себе токен администратора. Только при
+APP_ENV=development или test вместо него берется случайный ключ процесса
+(токены не переживают перезапуск и не принимаются другими воркерами).
+
+Настройки (переменные окружения):
+    JWT_SECRET               - ключ подписи (обязателен вне development/test)
+    JWT_ACCESS_TTL_MINUTES   - время жизни токена, по умолчанию 30
+    JWT_CLAIMS_CACHE_SIZE    - размер LRU-кэша проверенных токенов
+"""
+import logging
+import os
+import secrets
+import time
+from collections import OrderedDict
+
+import jwt
+
+from app.exceptions.auth_exceptions import InvalidToken
+from app.utils.environment import APP_ENV, is_dev_environment
+
+logger = logging.getLogger(__name__)
+
+
+def _load_secret() -> str:
+    secret = os.getenv("JWT_SECRET")
+    if secret:
+        return secret
+    if not is_dev_environment():
+        raise RuntimeError(
+            f"JWT_SECRET is not set (APP_ENV={APP_ENV}); set it, or APP_ENV=development for a random dev key"
+        )
+    logger.warning("JWT_SECRET не задан - используется случайный ключ процесса (APP_ENV=%s)", APP_ENV)
+    return secrets.token_urlsafe(32)
+
+
+JWT_SECRET = _load_secret()
+JWT_ALGORITHM = "HS256"
+JWT_ACCESS_TTL_MINUTES = int(os.getenv("JWT_ACCESS_TTL_MINUTES", "30"))
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", "4096"))
+
+
+_claims_cache: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def create_access_token(user) -> tuple:
+    """Возвращает (токен, срок жизни в секундах)"""
+    now = int(time.time())
+    ttl = JWT_ACCESS_TTL_MINUTES * 60
+    claims = {
+        "sub": user.id,
+        "role": user.role.name if user.role else "user",
+        "name": f"{user.first_name} {user.last_name}",
+        "email": user.email,
+        "iat": now,
+        "exp": now + ttl,
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm=JWT_ALGORITHM), ttl
+
+
+def decode_access_token(token: str) -> dict:
+    claims = _claims_cache.get(token)
+    if claims is not None:
+        if claims["exp"] > time.time():
+            _claims_cache.move_to_end(token)
+            return claims
+        del _claims_cache[token]
+        raise InvalidToken("Token expired")
+
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options={"require": ["exp", "sub"]})
+    except jwt.ExpiredSignatureError:
+        raise InvalidToken("Token expired")
+    except jwt.InvalidTokenError:
+        raise InvalidToken("Invalid token")
+
+    _claims_cache[token] = claims
+    if len(_claims_cache) > JWT_CLAIMS_CACHE_SIZE:
+        _claims_cache.popitem(last=False)
+    return claims
@@ -0,0 +1,141 @@
+"""
+Задержка GET /api/admin/stats под нагрузкой дашбордов: --clients одновременных
+клиентов, каждый делает --calls запросов подряд.
+
+    3 counts  - как было: своя сессия и три последовательных COUNT(*)
+    1 query   - три скалярных подзапроса одним запросом (без снимка)
+    snapshot  - stats_cache: запрос в БД только после изменения данных;
+                раз в --change-every секунд имитируется коммит (версия "bookings")
+
+Запуск из корня проекта:
+    python benchmarks/admin_stats.py --clients 100
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.engine import create_engine
+from app.models.models import Base, Booking, Room, Role, User
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.utils.booking_rollup import rebuild_booking_rollups
+from app.utils.stats_cache import stats_cache
+from app.utils.table_versions import table_versions
+
+
+async def prepare(engine, count: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Role), [{"id": 1, "name": "user"}])
+        await conn.execute(insert(User), [
+            {"id": f"u{i}", "first_name": "Имя", "last_name": str(i), "email": f"u{i}@example.com", "password": "x", "role_id": 1}
+            for i in range(200)
+        ])
+        await conn.execute(insert(Room), [{"id": f"r{i}", "name": f"Room {i}", "capacity": 6, "price": 100} for i in range(20)])
+        slots = random.sample(range(20 * 365 * 24), count)
+        await conn.execute(insert(Booking), [
+            {
+                "id": f"b{n:06d}",
+                "room_id": f"r{slot % 20}",
+                "user_id": f"u{n % 200}",
+                "date": date.today() - timedelta(days=slot // 20 % 365),
+                "start_minute": 480 + slot // (20 * 365) * 30,
+                "end_minute": 510 + slot // (20 * 365) * 30,
+                "title": "Встреча",
+            }
+            for n, slot in enumerate(slots)
+        ])
+        await rebuild_booking_rollups(conn)
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def three_counts(session_factory):
+    async def call():
+        async with session_factory() as session:
+            users = (await session.execute(select(func.count(User.id)))).scalar()
+            rooms = (await session.execute(select(func.count(Room.id)))).scalar()
+            bookings = (await session.execute(
+                select(func.count(Booking.id)).where(Booking.deleted_at.is_(None))
+            )).scalar()
+            return {"totalUsers": users, "totalRooms": rooms, "totalBookings": bookings}
+    return call
+
+
+def one_query(session_factory):
+    async def call():
+        async with session_factory() as session:
+            return await AnalyticsRepository.get_totals(session)
+    return call
+
+
+def snapshot(session_factory):
+    async def call():
+        async with session_factory() as session:
+            async def load():
+                users, rooms, bookings = await AnalyticsRepository.get_totals(session)
+                return {"totalUsers": users, "totalRooms": rooms, "totalBookings": bookings}
+            return (await stats_cache.get(load)).body
+    return call
+
+
+async def measure(label: str, call, clients: int, calls: int, change_every: float = 0):
+    latencies = []
+
+    async def client():
+        for _ in range(calls):
+            started = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    async def writer():
+        while True:
+            await asyncio.sleep(change_every)
+            table_versions.bump("bookings")
+
+    background = asyncio.create_task(writer()) if change_every else None
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    if background:
+        background.cancel()
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<10} p50 {statistics.median(latencies):8.2f} ms  p99 {p99:8.2f} ms  "
+        f"{len(latencies) / elapsed:8.0f} calls/s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--change-every", type=float, default=0.5)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        session_factory = await prepare(engine, args.bookings)
+        print(f"{args.bookings} bookings, {args.clients} clients x {args.calls} calls")
+        await measure("3 counts", three_counts(session_factory), args.clients, args.calls)
+        await measure("1 query", one_query(session_factory), args.clients, args.calls)
+        await measure("snapshot", snapshot(session_factory), args.clients, args.calls, args.change_every)
+        print("snapshot cache:", stats_cache.stats())
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Аналитика за год: холодный запрос (GROUP BY по всем месяцам) против теплого
+(закрытые месяцы из кэша, в БД - только текущий). Холодный - по дневным
+сводкам (стандартное окно 08:00-20:00) и по bookings (нестандартное окно).
+
+Запуск из корня проекта:
+    python benchmarks/analytics.py --bookings 50000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.engine import create_engine
+from app.models.models import Base, Booking, Room, Role, User
+from app.services.analytics_service import AnalyticsService
+from app.utils.analytics_cache import analytics_cache
+from app.utils.booking_rollup import rebuild_booking_rollups
+
+
+async def prepare(engine, count: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Role), [{"id": 1, "name": "user"}])
+        await conn.execute(insert(User), [
+            {"id": f"u{i}", "first_name": "Имя", "last_name": str(i), "email": f"u{i}@example.com", "password": "x", "role_id": 1}
+            for i in range(50)
+        ])
+        await conn.execute(insert(Room), [{"id": f"r{i}", "name": f"Room {i}", "capacity": 6, "price": 100 + i} for i in range(20)])
+        # 20 комнат x 365 дней x 24 получасовых слота (08:00-20:00), без пересечений
+        slots = random.sample(range(20 * 365 * 24), count)
+        today = date.today()
+        await conn.execute(insert(Booking), [
+            {
+                "id": f"b{n:06d}",
+                "room_id": f"r{slot % 20}",
+                "user_id": f"u{n % 50}",
+                "date": today - timedelta(days=slot // 20 % 365),
+                "start_minute": 480 + slot // (20 * 365) * 30,
+                "end_minute": 510 + slot // (20 * 365) * 30,
+                "title": "Встреча",
+            }
+            for n, slot in enumerate(slots)
+        ])
+        # Вставка в обход ORM - сводки собираются отдельно
+        await rebuild_booking_rollups(conn)
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def measure(label: str, session_factory, group_by: str, repeat: int, cold: bool, day_start: str = "08:00"):
+    timings = []
+    date_from = date.today() - timedelta(days=364)
+    # Холодный: кэш ничего не сохраняет, каждый запрос считает все месяцы
+    analytics_cache.max_entries = 0 if cold else 4096
+    for _ in range(repeat):
+        async with session_factory() as session:
+            started = time.perf_counter()
+            await AnalyticsService.get_summary(session, date_from, date.today(), group_by, day_start=day_start)
+            timings.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<24} groupBy={group_by:<6} median {statistics.median(timings):8.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        session_factory = await prepare(engine, args.bookings)
+        print(f"{args.bookings} bookings over 365 days")
+        for group_by in ("room", "user", "month"):
+            if group_by != "user":
+                await measure("cold, bookings scan", session_factory, group_by, args.repeat, cold=True, day_start="07:00")
+            await measure("cold" if group_by == "user" else "cold, rollups", session_factory, group_by, args.repeat, cold=True)
+            await measure("warm", session_factory, group_by, args.repeat, cold=False)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Бенчмарк fan-out живых обновлений (app/utils/booking_events.py).
+
+Тысячи простаивающих подписчиков (как открытые дашборды), у каждого своя
+задача, ждущая очередь - как в /ws/bookings. Меряет память на подписчика,
+время публикации одного события и доставку до потребителей. Часть
+подписчиков не читает вовсе - они должны быть отключены за переполнение,
+не мешая остальным.
+
+Запуск из корня проекта:
+    python benchmarks/booking_events.py --subscribers 5000 --rooms 500 --events 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.booking_events import BookingEventHub
+
+
+async def consume(subscription, received: list):
+    while True:
+        message = await subscription.get()
+        if message is None:
+            return
+        received[0] += 1
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--slow", type=int, default=50, help="подписчиков, которые не читают")
+    parser.add_argument("--queue-size", type=int, default=100)
+    args = parser.parse_args()
+
+    hub = BookingEventHub(args.queue_size, args.subscribers + args.slow)
+    received = [0]
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = []
+    for n in range(args.subscribers):
+        # Каждый десятый смотрит все комнаты, остальные - одну
+        room_ids = () if n % 10 == 0 else (f"r{n % args.rooms}",)
+        tasks.append(asyncio.create_task(consume(hub.subscribe(room_ids), received)))
+    slow = [hub.subscribe() for _ in range(args.slow)]
+    await asyncio.sleep(0)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print(f"{args.subscribers} subscribers + {args.slow} slow: {used / (args.subscribers + args.slow):.0f} bytes each (with task)")
+
+    timings = []
+    started = time.perf_counter()
+    for n in range(args.events):
+        message = json.dumps({"type": "created", "booking": {"id": f"b{n}", "roomId": f"r{n % args.rooms}"}})
+        t0 = time.perf_counter()
+        hub.publish(f"r{n % args.rooms}", "2026-01-01", message)
+        timings.append((time.perf_counter() - t0) * 1_000_000)
+        # Даем потребителям разобрать очереди
+        if n % 50 == 0:
+            await asyncio.sleep(0)
+    while received[0] < hub.delivered - sum(s.queue.qsize() for s in slow):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    print(f"publish median {statistics.median(timings):.1f} us  p99 {sorted(timings)[int(len(timings) * 0.99)]:.1f} us")
+    print(f"{args.events} events -> {received[0]} deliveries in {elapsed * 1000:.0f} ms")
+    print(f"stats: {hub.stats()}")
+    for task in tasks:
+        task.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Списочное чтение бронирований: ORM-объекты + to_dict() против Core-строк.
+
+    orm   - select(Booking) + joinedload(user), to_dict(), orjson (как было)
+    rows  - BookingRepository.get_all_bookings: Core select -> BookingRow -> orjson
+Меряет время от запроса до готовых байт и пик памяти (tracemalloc) на одном
+и том же временном SQLite-файле; ответы обоих путей сравниваются побайтно.
+
+Запуск из корня проекта:
+    python benchmarks/booking_list.py --bookings 5000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.models.engine import create_engine
+from app.models.models import Base, Booking, Room, Role, User
+from app.repositories.booking_repository import BookingRepository
+
+
+async def prepare(engine, count: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(Role(id=1, name="user"))
+        session.add_all([
+            User(id=f"u{i}", first_name="Имя", last_name=f"Фамилия {i}", email=f"u{i}@example.com", password="x", role_id=1)
+            for i in range(50)
+        ])
+        rooms = count // 100 + 1
+        session.add_all([Room(id=f"r{i}", name=f"Room {i}", capacity=6) for i in range(rooms)])
+        # Слоты по 30 минут без пересечений: (комната, день, слот) уникальны
+        slots = random.sample(range(rooms * 30 * 20), count)
+        session.add_all([
+            Booking(
+                id=f"b{n:06d}",
+                room_id=f"r{slot % rooms}",
+                user_id=f"u{n % 50}",
+                date=date.today() + timedelta(days=slot // rooms % 30),
+                start_minute=480 + slot // (rooms * 30) * 30,
+                end_minute=510 + slot // (rooms * 30) * 30,
+                title=f"Встреча {n}",
+                participants="a@example.com,b@example.com" if n % 2 else "",
+            )
+            for n, slot in enumerate(slots)
+        ])
+        await session.commit()
+    return session_factory
+
+
+async def orm_path(session) -> bytes:
+    result = await session.execute(
+        select(Booking).options(joinedload(Booking.user)).where(Booking.deleted_at.is_(None))
+    )
+    return orjson.dumps([booking.to_dict() for booking in result.scalars().all()])
+
+
+async def rows_path(session) -> bytes:
+    return orjson.dumps(await BookingRepository.get_all_bookings(session))
+
+
+async def measure(label: str, session_factory, path, repeat: int, baseline: float = None):
+    timings = []
+    for _ in range(repeat):
+        # Новая сессия на запрос, как в get_db
+        async with session_factory() as session:
+            started = time.perf_counter()
+            body = await path(session)
+            timings.append((time.perf_counter() - started) * 1000)
+    async with session_factory() as session:
+        tracemalloc.start()
+        await path(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    median = statistics.median(timings)
+    speedup = f"  x{baseline / median:.1f}" if baseline else ""
+    print(f"{label:<6} median {median:7.1f} ms  peak memory {peak / 1024 / 1024:6.1f} MB  ({len(body)} bytes){speedup}")
+    return median, body
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        session_factory = await prepare(engine, args.bookings)
+        print(f"{args.bookings} bookings")
+        baseline, orm_body = await measure("orm", session_factory, orm_path, args.repeat)
+        _, rows_body = await measure("rows", session_factory, rows_path, args.repeat, baseline)
+        print("identical output:", orm_body == rows_body)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""
+Стресс-скрипт двойного бронирования (нагрузочный прогон; проверка с
+assert-ами для pytest - tests/test_booking_overlap.py).
+
+Несколько процессов (как воркеры uvicorn, у каждого свой движок) одновременно
+шлют POST /api/bookings/ с пересекающимися интервалами на одни и те же слоты.
+На каждый слот (комната + дата) должен выиграть ровно один запрос,
+остальные получают 400 "Это время уже занято".
+
+Запуск из корня проекта:
+    python benchmarks/double_booking_stress.py --processes 4 --requests 100 --slots 10
+
+С --drop-constraint триггеры удаляются - видно, что проверки в приложении
+(check-then-insert) недостаточно.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+ROOMS = 5
+
+
+def slot_of(n: int):
+    return f"r{n % ROOMS}", date.today() + timedelta(days=1 + n // ROOMS)
+
+
+async def prepare(drop_constraint: bool):
+    from sqlalchemy import text
+    from app.models.models import Base, Room, Role, User, async_session, engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if drop_constraint:
+            await conn.execute(text("DROP TRIGGER bookings_no_overlap_insert"))
+    async with async_session() as session:
+        session.add(Role(id=1, name="user"))
+        session.add(User(id="u1", first_name="Stress", last_name="User", email="stress@example.com", password="x", role_id=1))
+        session.add_all([Room(id=f"r{i}", name=f"Room {i}", capacity=6) for i in range(ROOMS)])
+        await session.commit()
+    await engine.dispose()
+
+
+async def fire(requests: int, slots: int, barrier_at: float):
+    import httpx
+    from main import app
+
+    async def one(client, n):
+        room_id, slot_date = slot_of(n % slots)
+        # Все интервалы слота пересекаются: начало 09:00-09:30, длительность час
+        start = 540 + random.randint(0, 30)
+        response = await client.post("/api/bookings/", json={
+            "roomId": room_id,
+            "userId": "u1",
+            "date": slot_date.isoformat(),
+            "startTime": f"{start // 60:02d}:{start % 60:02d}",
+            "endTime": f"{(start + 60) // 60:02d}:{(start + 60) % 60:02d}",
+            "title": "stress",
+        })
+        return n % slots, response.status_code
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Стартуем все процессы одновременно
+        await asyncio.sleep(max(0.0, barrier_at - time.time()))
+        return await asyncio.gather(*(one(client, n) for n in range(requests)))
+
+
+def worker(requests: int, slots: int, barrier_at: float, results):
+    import logging
+    logging.disable(logging.CRITICAL)
+    results.extend(asyncio.run(fire(requests, slots, barrier_at)))
+
+
+async def count_rows():
+    from sqlalchemy import func, select
+    from app.models.models import Booking, async_session, engine
+
+    async with async_session() as session:
+        rows = await session.execute(
+            select(Booking.room_id, Booking.date, func.count()).group_by(Booking.room_id, Booking.date)
+        )
+        counts = {(room_id, booking_date): n for room_id, booking_date, n in rows}
+    await engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=100, help="запросов на процесс")
+    parser.add_argument("--slots", type=int, default=10)
+    parser.add_argument("--database-url", default=None, help="по умолчанию временный SQLite-файл")
+    parser.add_argument("--drop-constraint", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{tmp}/stress.db"
+        # Ключ подписи токенов не нужен - случайный ключ процесса
+        os.environ.setdefault("APP_ENV", "development")
+        asyncio.run(prepare(args.drop_constraint))
+
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Manager() as manager:
+            results = manager.list()
+            barrier_at = time.time() + 3
+            processes = [
+                ctx.Process(target=worker, args=(args.requests, args.slots, barrier_at, results))
+                for _ in range(args.processes)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            results = list(results)
+
+        rows = asyncio.run(count_rows())
+
+    statuses = Counter(status for _, status in results)
+    wins = defaultdict(int)
+    for slot, status in results:
+        if status == 200:
+            wins[slot] += 1
+
+    print(f"requests: {len(results)}  statuses: {dict(statuses)}")
+    failed = False
+    for slot in range(args.slots):
+        room_id, slot_date = slot_of(slot)
+        stored = rows.get((room_id, slot_date), 0)
+        ok = wins[slot] == 1 and stored == 1
+        failed |= not ok
+        print(f"slot {room_id} {slot_date}: {wins[slot]} won, {stored} stored  {'OK' if ok else 'FAIL'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Задержка шины инвалидации между процессами (app/utils/invalidation_bus.py).
+
+Несколько процессов (как воркеры uvicorn) поднимают шину на одном бэкенде и
+по очереди публикуют сообщения; каждый процесс меряет, через сколько
+после отправки сообщение дошло до него. Проверяется, что каждое сообщение
+дошло до всех остальных процессов и не вернулось отправителю.
+
+Запуск из корня проекта:
+    python benchmarks/invalidation_bus.py --processes 4 --messages 200
+    python benchmarks/invalidation_bus.py --url redis://localhost:6379/0
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+async def run_worker(url: str, index: int, processes: int, messages: int, start_at: float) -> dict:
+    from app.utils.invalidation_bus import create_bus
+
+    bus = create_bus(url)
+    latencies = []
+    own = []
+    bus.subscribe("bench", lambda payload: (own if payload["from"] == index else latencies).append(
+        (time.time() - payload["sent"]) * 1000
+    ))
+    await bus.start()
+    await asyncio.sleep(max(0.0, start_at - time.time()))
+    for n in range(messages):
+        bus.publish("bench", {"from": index, "n": n, "sent": time.time()})
+        await asyncio.sleep(0.005)
+    # Ждем сообщения остальных
+    expected = messages * (processes - 1)
+    deadline = time.time() + 10
+    while len(latencies) < expected and time.time() < deadline:
+        await asyncio.sleep(0.05)
+    await bus.stop()
+    return {"latencies": latencies, "expected": expected, "own": len(own), "stats": bus.stats()}
+
+
+def worker(url, index, processes, messages, start_at, results):
+    results.append(asyncio.run(run_worker(url, index, processes, messages, start_at)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=200, help="сообщений от каждого процесса")
+    parser.add_argument("--url", default=None, help="по умолчанию sqlite:/// во временной папке")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{tmp}/bus.db"
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Manager() as manager:
+            results = manager.list()
+            start_at = time.time() + 3
+            processes = [
+                ctx.Process(target=worker, args=(url, i, args.processes, args.messages, start_at, results))
+                for i in range(args.processes)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            results = list(results)
+
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    received = sum(len(result["latencies"]) for result in results)
+    expected = sum(result["expected"] for result in results)
+    echoed = sum(result["own"] for result in results)
+    print(f"backend {url.split(':')[0]}: {received}/{expected} delivered, {echoed} local deliveries")
+    if latencies:
+        print(f"latency median {statistics.median(latencies):.1f} ms  p95 {latencies[int(len(latencies) * 0.95)]:.1f} ms  max {latencies[-1]:.1f} ms")
+    sys.exit(0 if received == expected and echoed == args.messages * args.processes else 1)
+
+
+if __name__ == "__main__":
+    main()
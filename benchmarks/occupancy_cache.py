@@ -0,0 +1,69 @@
+"""
+Бенчмарк проверки пересечений: SQL EXISTS против кэша занятости.
+
+BookingRepository.check_availability на случайных комнатах/днях/интервалах:
+сначала с выключенным кэшем (каждая проверка - запрос), потом с прогретым
+кэшем (побитовое И, в SQL уходят только ответы "занято").
+
+Запуск из корня проекта:
+    python benchmarks/occupancy_cache.py --rooms 500 --checks 5000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.engine import create_engine
+from app.repositories.booking_repository import BookingRepository
+from app.utils.occupancy_cache import occupancy_cache
+from benchmarks.room_search import prepare
+
+
+async def run(label: str, session_factory, checks: list):
+    free = 0
+    async with session_factory() as session:
+        started = time.perf_counter()
+        for room_id, booking_date, start_minute in checks:
+            free += await BookingRepository.check_availability(session, room_id, booking_date, start_minute, start_minute + 30)
+        elapsed = time.perf_counter() - started
+    print(f"{label:<12} {len(checks) / elapsed:9.0f} checks/s  {elapsed / len(checks) * 1e6:7.1f} us/check  ({free} free)")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--per-day", type=int, default=6)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--checks", type=int, default=5000)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        session_factory, total = await prepare(engine, args.rooms, args.per_day, args.days)
+        print(f"{args.rooms} rooms, {total} bookings, {args.checks} checks")
+        checks = [
+            (f"r{random.randrange(args.rooms):04d}",
+             date.today() + timedelta(days=random.randrange(args.days)),
+             random.randrange(8 * 60, 19 * 60, 15))
+            for _ in range(args.checks)
+        ]
+
+        max_entries = occupancy_cache.max_entries
+        occupancy_cache.max_entries = 0
+        await run("sql", session_factory, checks)
+        occupancy_cache.max_entries = max_entries
+        await run("cache cold", session_factory, checks)
+        await run("cache warm", session_factory, checks)
+        print(occupancy_cache.stats())
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+Бенчмарк поиска свободных комнат и слотов.
+
+500 комнат, по несколько бронирований на комнату в день на неделю вперед.
+Меряет RoomService.get_available_rooms (GET /api/rooms/available),
+RoomService.find_free_slots (GET /api/rooms/free-slots) и
+RoomService.get_availability_grid (GET /api/rooms/availability).
+
+Запуск из корня проекта:
+    python benchmarks/room_search.py --rooms 500 --per-day 6 --days 7
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.engine import create_engine
+from app.models.models import Base, Booking, Room, Role, User
+from app.services.room_service import RoomService
+
+AMENITIES = ["Проектор", "Wi-Fi", "Видеоконференция", "Флипчарт", "Smart board"]
+
+
+async def prepare(engine, rooms: int, per_day: int, days: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(Role(id=1, name="user"))
+        session.add(User(id="u1", first_name="Bench", last_name="User", email="bench@example.com", password="x", role_id=1))
+        session.add_all([
+            Room(
+                id=f"r{i:04d}",
+                name=f"Room {i}",
+                capacity=random.choice([4, 6, 8, 10, 20]),
+                amenities=", ".join(random.sample(AMENITIES, 2)),
+            )
+            for i in range(rooms)
+        ])
+        bookings = []
+        for i in range(rooms):
+            for offset in range(days):
+                # Часовые встречи в случайные часы 08:00-19:00 без пересечений
+                for hour in random.sample(range(8, 19), per_day):
+                    bookings.append(Booking(
+                        id=uuid.uuid4().hex[:12],
+                        room_id=f"r{i:04d}",
+                        user_id="u1",
+                        date=date.today() + timedelta(days=offset),
+                        start_minute=hour * 60,
+                        end_minute=hour * 60 + 60,
+                        title="bench",
+                        participants="",
+                    ))
+        session.add_all(bookings)
+        await session.commit()
+    return session_factory, len(bookings)
+
+
+async def measure(label: str, session_factory, call, repeat: int):
+    timings = []
+    async with session_factory() as session:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = await call(session)
+            timings.append((time.perf_counter() - started) * 1000)
+    size = len(result["rooms"]) if isinstance(result, dict) else len(result)
+    print(f"{label:<34} median {statistics.median(timings):7.2f} ms  p95 {sorted(timings)[int(repeat * 0.95) - 1]:7.2f} ms  ({size} results)")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--per-day", type=int, default=6)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        session_factory, total = await prepare(engine, args.rooms, args.per_day, args.days)
+        print(f"{args.rooms} rooms, {total} bookings")
+        tomorrow = date.today() + timedelta(days=1)
+
+        await measure("available 10:00-11:00", session_factory,
+                      lambda s: RoomService.get_available_rooms(s, tomorrow, "10:00", "11:00"), args.repeat)
+        await measure("available + capacity + amenities", session_factory,
+                      lambda s: RoomService.get_available_rooms(s, tomorrow, "10:00", "11:00", 8, "Проектор"), args.repeat)
+        await measure("free-slots 60 min, 10 slots", session_factory,
+                      lambda s: RoomService.find_free_slots(s, 60, args.days, 10, tomorrow), args.repeat)
+        await measure("free-slots 180 min, 10 slots", session_factory,
+                      lambda s: RoomService.find_free_slots(s, 180, args.days, 10, tomorrow), args.repeat)
+        await measure("free-slots 60 min, amenities", session_factory,
+                      lambda s: RoomService.find_free_slots(s, 60, args.days, 10, tomorrow, amenities="Проектор"), args.repeat)
+        await measure("grid all rooms x week, 30 min", session_factory,
+                      lambda s: RoomService.get_availability_grid(s, tomorrow, args.days), args.repeat)
+        await measure("grid all rooms x week, runs", session_factory,
+                      lambda s: RoomService.get_availability_grid(s, tomorrow, args.days, encoding="runs"), args.repeat)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Стоимость сериализации списка бронирований (на 1000 штук).
+
+Сравнивает пути, которыми ответ роутера превращается в байты:
+    dicts + jsonable_encoder + json     - возврат dict без response_model (как было)
+    dicts + jsonable_encoder + orjson   - то же с default_response_class=ORJSONResponse
+    response_model + orjson             - проверка через BookingResponseSchema
+                                          (validate + dump в pydantic-core), затем orjson
+    dicts + ORJSONResponse              - доверенный путь: готовые dict сразу в orjson
+Во всех вариантах время включает to_dict().
+
+Запуск из корня проекта:
+    python benchmarks/serialization.py --bookings 1000
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.models.models import Booking, User
+from app.schemes.booking_schema import BookingResponseSchema
+
+
+def make_bookings(count: int) -> list:
+    users = [User(id=f"u{i}", first_name="Имя", last_name=f"Фамилия {i}", email=f"u{i}@example.com") for i in range(20)]
+    now = datetime.utcnow()
+    return [
+        Booking(
+            id=f"booking_{n:08x}",
+            room_id=f"room_{n % 40:03d}",
+            user_id=users[n % 20].id,
+            user=users[n % 20],
+            date=date.today() + timedelta(days=n % 30),
+            start_minute=540 + (n % 16) * 30,
+            end_minute=570 + (n % 16) * 30,
+            title=f"Встреча {n}",
+            participants="a@example.com,b@example.com",
+            created_at=now,
+            updated_at=now,
+        )
+        for n in range(count)
+    ]
+
+
+def measure(label: str, render, repeat: int, baseline: float = None) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render()
+        timings.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(timings)
+    speedup = f"  x{baseline / median:.1f}" if baseline else ""
+    print(f"{label:<36} median {median:7.2f} ms  ({len(body)} bytes){speedup}")
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    bookings = make_bookings(args.bookings)
+    adapter = TypeAdapter(List[BookingResponseSchema])
+    print(f"{args.bookings} bookings")
+
+    baseline = measure(
+        "dicts + jsonable_encoder + json",
+        lambda: JSONResponse(jsonable_encoder([b.to_dict() for b in bookings])).body,
+        args.repeat,
+    )
+    measure(
+        "dicts + jsonable_encoder + orjson",
+        lambda: ORJSONResponse(jsonable_encoder([b.to_dict() for b in bookings])).body,
+        args.repeat, baseline,
+    )
+    measure(
+        "response_model + orjson",
+        lambda: ORJSONResponse(adapter.dump_python(
+            adapter.validate_python([b.to_dict() for b in bookings]), mode="json"
+        )).body,
+        args.repeat, baseline,
+    )
+    measure(
+        "dicts + ORJSONResponse (trusted)",
+        lambda: ORJSONResponse([b.to_dict() for b in bookings]).body,
+        args.repeat, baseline,
+    )
+    measure(
+        "  of which to_dict()",
+        lambda: [b.to_dict() for b in bookings],
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
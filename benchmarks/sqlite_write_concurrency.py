@@ -0,0 +1,88 @@
+"""
+Бенчмарк конкурентной записи бронирований в SQLite.
+
+Сравнивает движок с настройками по умолчанию (rollback journal, без
+busy_timeout) и движок из app.models.engine.create_engine (WAL,
+busy_timeout, synchronous=NORMAL, mmap, cache_size).
+
+Запуск из корня проекта:
+    python benchmarks/sqlite_write_concurrency.py --writers 50 --bookings 20
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.engine import create_engine
+from app.models.models import Base, Booking, Room, Role, User
+
+
+async def prepare(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(Role(id=1, name="user"))
+        session.add(User(id="u1", first_name="Bench", last_name="User", email="bench@example.com", password="x", role_id=1))
+        session.add_all([Room(id=f"r{i}", name=f"Room {i}", capacity=6) for i in range(20)])
+        await session.commit()
+    return session_factory
+
+
+async def writer(session_factory, writer_id: int, bookings: int, stats: dict):
+    for n in range(bookings):
+        async with session_factory() as session:
+            session.add(Booking(
+                id=uuid.uuid4().hex[:12],
+                room_id=f"r{writer_id % 20}",
+                user_id="u1",
+                date=date.today() + timedelta(days=writer_id * bookings + n),
+                start_minute=540,
+                end_minute=600,
+                title="bench",
+                participants="",
+            ))
+            try:
+                await session.commit()
+                stats["ok"] += 1
+            except OperationalError:
+                await session.rollback()
+                stats["locked"] += 1
+
+
+async def run(label: str, engine, writers: int, bookings: int):
+    session_factory = await prepare(engine)
+    stats = {"ok": 0, "locked": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(session_factory, w, bookings, stats) for w in range(writers)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    print(f"{label:<10} {stats['ok']:>7} ok  {stats['locked']:>5} locked  {elapsed:7.2f} s  {stats['ok'] / elapsed:9.1f} commits/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        default_url = f"sqlite+aiosqlite:///{tmp}/default.db"
+        tuned_url = f"sqlite+aiosqlite:///{tmp}/tuned.db"
+        # Как было раньше: create_async_engine без параметров, rollback journal
+        await run("default", create_async_engine(default_url), args.writers, args.bookings)
+        await run("tuned", create_engine(tuned_url), args.writers, args.bookings)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
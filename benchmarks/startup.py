@@ -0,0 +1,124 @@
+"""
+Время холодного старта: `python -X importtime -c "import main"` в отдельных
+процессах, медиана по --repeat запускам.
+
+    total     - импорт main целиком (фреймворки + приложение); бюджет
+                --budget-ms проверяется, только если задан
+    framework - fastapi, starlette, pydantic, sqlalchemy и их зависимости
+    app       - собственное время модулей app.* и main (роуты, модели, схемы),
+                бюджет --app-budget-ms, по умолчанию 250
+
+Общее время почти целиком - фреймворки (на медленной машине около секунды),
+от кода приложения оно не зависит, поэтому по умолчанию только печатается.
+Бюджет приложения - с запасом над измеренными 170-200 мс: сборка роутов и
+моделей в main и app.api.* занимает их основную часть, а разброс между
+запусками - десятки мс.
+
+Дополнительно проверяется, что при старте не импортируются модули, нужные
+только по требованию (uvicorn, jinja2, bcrypt, redis, asyncpg): их появление
+в импортах main - регрессия. Код возврата 1, если бюджет превышен или есть
+лишний импорт, - скрипт годится как проверка в CI.
+
+Запуск из корня проекта:
+    python benchmarks/startup.py --repeat 7
+    python benchmarks/startup.py --budget-ms 1500   # плюс бюджет импорта целиком
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+FRAMEWORK_PACKAGES = ("fastapi", "starlette", "pydantic", "pydantic_core", "sqlalchemy", "anyio")
+LAZY_PACKAGES = ("uvicorn", "jinja2", "bcrypt", "redis", "asyncpg")
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(собственное мкс, накопленное мкс, глубина, модуль)] из вывода -X importtime"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return modules
+
+
+def framework_time(modules: list) -> int:
+    """
+    Накопленное время пакетов фреймворков, не вложенных друг в друга (pydantic
+    внутри fastapi считается один раз). importtime печатает модуль после его
+    зависимостей, поэтому обход в обратном порядке идет от родителя к детям
+    """
+    total = 0
+    stack = []
+    for _, cumulative, depth, name in reversed(modules):
+        del stack[depth:]
+        if name in FRAMEWORK_PACKAGES and not any(stack):
+            total += cumulative
+        stack.append(name in FRAMEWORK_PACKAGES)
+    return total
+
+
+def run_once(python: str) -> dict:
+    env = dict(os.environ, LOG_LEVEL="WARNING", LOG_FORMAT="text")
+    # Без JWT_SECRET main не импортируется вне development/test
+    env.setdefault("APP_ENV", "development")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        sys.exit(f"import main failed:\n{result.stderr[-2000:]}")
+    modules = parse_importtime(result.stderr)
+
+    total = next(cumulative for _, cumulative, _, name in modules if name == "main")
+    app = sum(own for own, _, _, name in modules if name == "main" or name == "app" or name.startswith("app."))
+    framework = framework_time(modules)
+    lazy = sorted({name.split(".")[0] for _, _, _, name in modules if name.split(".")[0] in LAZY_PACKAGES})
+    return {"wall": wall, "total": total / 1000, "framework": framework / 1000, "app": app / 1000, "lazy": lazy}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="бюджет импорта main целиком (по умолчанию не проверяется)")
+    parser.add_argument("--app-budget-ms", type=float, default=250, help="бюджет собственных модулей app.* и main")
+    parser.add_argument("--python", default=sys.executable)
+    args = parser.parse_args()
+
+    # Первый запуск прогревает __pycache__ и дисковый кэш - в медиану не идет
+    run_once(args.python)
+    runs = [run_once(args.python) for _ in range(args.repeat)]
+
+    for metric in ("wall", "total", "framework", "app"):
+        values = [run[metric] for run in runs]
+        print(f"{metric:<10} median {statistics.median(values):8.1f} ms  min {min(values):8.1f} ms")
+
+    failures = []
+    lazy = sorted({name for run in runs for name in run["lazy"]})
+    if lazy:
+        failures.append(f"imported at startup: {', '.join(lazy)}")
+    total = statistics.median(run["total"] for run in runs)
+    if args.budget_ms is not None and total > args.budget_ms:
+        failures.append(f"import main {total:.1f} ms > budget {args.budget_ms:.0f} ms")
+    app = statistics.median(run["app"] for run in runs)
+    if app > args.app_budget_ms:
+        failures.append(f"app modules {app:.1f} ms > budget {args.app_budget_ms:.0f} ms")
+
+    for failure in failures:
+        print("FAIL:", failure)
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
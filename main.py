@@ -1,54 +1,64 @@
 import logging
 from fastapi import FastAPI, Request, Depends
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
-import uvicorn
+from functools import lru_cache
 from pathlib import Path
 import mimetypes
+import sys
 from dotenv import load_dotenv
 import os
 
+# .env должен быть прочитан до импорта модулей app - они читают настройки при импорте
+load_dotenv()
+
 # Импортируем из папки app
-from app.exceptions.user_exceptions import UserNotFound, UserAlreadyExists, InvalidUserData
+from app.exceptions.user_exceptions import UserNotFound, UserAlreadyExists, InvalidUserData, PasswordHashingBusy
 from app.exceptions.room_exceptions import RoomNotFound, InvalidRoomData
 from app.exceptions.booking_exceptions import BookingNotFound, TimeSlotNotAvailable, InvalidBookingData
 from app.exceptions.role_exceptions import RoleNotFound, InvalidRoleData
 
 # Импортируем роутеры из app
-from app.api import users_router, rooms_router, bookings_router, admin_router, roles_router
-from app.models import init_db
-
-load_dotenv()
+from app.api import users_router, rooms_router, bookings_router, admin_router, roles_router, events_router
+from app.api.dependencies import require_role
+from app.models import check_schema, engine
+from app.utils.logging_config import setup_logging, shutdown_logging
+from app.utils.invalidation_bus import invalidation_bus
+from app.utils.password import password_pool, verify_password
+from app.utils.query_counter import QUERY_COUNT_ASSERT, QUERY_COUNT_REQUESTED, QUERY_BUDGETS, install_query_counter, assert_max_queries
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./database/soveshchayka.db")
 APP_NAME = os.getenv("APP_NAME", "Совещайка")
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 PORT = int(os.getenv("PORT", "8000"))
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+# Старт воркера не трогает схему и не заполняет данные (create_all, роли, bcrypt
+# демо-паролей) - это явные шаги до запуска (README.md):
+#     python -m app.cli init-db        - таблицы (после alembic upgrade head - только роли)
+#     python -m app.cli seed-demo      - плюс демо-пользователи, комнаты, бронирования
+# check_schema только сверяет таблицы и колонки и останавливает старт с подсказкой,
+# а не падает на первом запросе с "no such table"
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("🚀 Инициализация базы данных...")
-    try:
-        await init_db()
-        print("✅ База данных инициализирована")
-    except Exception as e:
-        print(f"❌ Ошибка инициализации БД: {e}")
-        import traceback
-        traceback.print_exc()
+    await check_schema()
+    await invalidation_bus.start()
     yield
-    print("🛑 Приложение завершает работу...")
+    logger.info("Приложение завершает работу")
+    await invalidation_bus.stop()
+    password_pool.shutdown()
+    shutdown_logging()
 
 app = FastAPI(
     title="Совещайка - Система бронирования переговорных комнат",
     description="Система для бронирования переговорных комнат",
     version="1.0.0",
+    # orjson вместо stdlib json для всех ответов без явного response_class
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -61,28 +71,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if QUERY_COUNT_REQUESTED and not QUERY_COUNT_ASSERT:
+    logger.warning("QUERY_COUNT_ASSERT игнорируется: проверка включается только при APP_ENV=development или test")
+
 # Настройка статических файлов и шаблонов
+if QUERY_COUNT_ASSERT:
+    install_query_counter(engine)
+
+    @app.middleware("http")
+    async def query_budget_middleware(request: Request, call_next):
+        """Падаем, если списочный эндпоинт выполнил больше запросов, чем разрешено"""
+        budget = QUERY_BUDGETS.get((request.method, request.url.path))
+        if budget is None:
+            return await call_next(request)
+        with assert_max_queries(budget, f"{request.method} {request.url.path}") as counter:
+            response = await call_next(request)
+        response.headers["X-Query-Count"] = str(counter.count)
+        return response
+
 BASE_DIR = Path(__file__).parent
 APP_DIR = BASE_DIR / "app"
 
-mimetypes.init()
-mimetypes.add_type('application/javascript', '.js')
-mimetypes.add_type('text/css', '.css')
+# На Windows типы .js/.css берутся из реестра и бывают неверными. Без явного
+# mimetypes.init() таблица читается лениво, при первой отдаче статики
+if sys.platform == "win32":
+    mimetypes.add_type('application/javascript', '.js')
+    mimetypes.add_type('text/css', '.css')
 
 # Подключение статических файлов
 app.mount("/static", StaticFiles(directory=APP_DIR / "static"), name="static")
-app.mount("/static", StaticFiles(directory=APP_DIR / "static"), name="static")
 app.mount("/icons", StaticFiles(directory=APP_DIR / "icons"), name="icons")
 
-# Настройка шаблонов
-templates = Jinja2Templates(directory=APP_DIR / "templates")
+# Шаблоны (Jinja2) - при первом запросе главной страницы
+@lru_cache(maxsize=None)
+def get_templates():
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory=APP_DIR / "templates")
 
 # Подключение API роутеров
 app.include_router(users_router, prefix="/api/users", tags=["Users"])
 app.include_router(rooms_router, prefix="/api/rooms", tags=["Rooms"])
 app.include_router(bookings_router, prefix="/api/bookings", tags=["Bookings"])
-app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
+app.include_router(admin_router, prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_role("admin"))])
 app.include_router(roles_router, prefix="/api/roles", tags=["Roles"])
+app.include_router(events_router, prefix="/ws", tags=["Events"])
 
 # Обработчики исключений
 @app.exception_handler(UserNotFound)
@@ -107,6 +139,14 @@ async def bad_request_exception_handler(request: Request, exc: Exception):
         content={"detail": str(exc)},
     )
 
+@app.exception_handler(PasswordHashingBusy)
+async def busy_exception_handler(request: Request, exc: Exception):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(
@@ -117,14 +157,13 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.get("/debug/users")
 async def debug_users():
     from app.models import async_session, User, Role
-    from sqlalchemy import select
+    from sqlalchemy import select, inspect
     
     async with async_session() as session:
         try:
-            # Проверяем таблицы
-            from sqlalchemy import text
-            result = await session.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))
-            tables = result.fetchall()
+            # Проверяем таблицы (через инспектор - работает и на SQLite, и на PostgreSQL)
+            connection = await session.connection()
+            tables = await connection.run_sync(lambda conn: inspect(conn).get_table_names())
             
             # Проверяем пользователей
             users_result = await session.execute(select(User))
@@ -135,7 +174,7 @@ async def debug_users():
             roles = roles_result.scalars().all()
             
             return {
-                "tables": [t[0] for t in tables],
+                "tables": tables,
                 "users_count": len(users),
                 "users": [
                     {
@@ -180,7 +219,6 @@ async def debug_rooms():
 async def debug_passwords():
     from app.models import async_session, User
     from sqlalchemy import select
-    import bcrypt
     
     async with async_session() as session:
         try:
@@ -195,12 +233,9 @@ async def debug_passwords():
                 
                 if user.password:
                     # Пробуем проверить как bcrypt хеш
-                    try:
-                        if bcrypt.checkpw(b"password123", user.password.encode('utf-8')):
-                            password_correct = True
-                            password_type = "bcrypt"
-                    except:
-                        pass
+                    if await verify_password("password123", user.password):
+                        password_correct = True
+                        password_type = "bcrypt"
                     
                     # Пробуем как plain text
                     if user.password == "password123":
@@ -231,7 +266,7 @@ async def debug_passwords():
 # Главная страница
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return get_templates().TemplateResponse("index.html", {"request": request})
 
 # Здоровье приложения
 @app.get("/health")
@@ -239,6 +274,8 @@ async def health_check():
     return {"status": "healthy", "service": "soveshaika"}
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
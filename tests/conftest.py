@@ -0,0 +1,55 @@
+"""
+Общая настройка тестов: отдельная SQLite-база во временном каталоге и
+APP_ENV=test. Переменные окружения выставляются до импорта app - модули
+читают настройки при импорте.
+
+TEST_DATABASE_URL - прогнать тесты на другой (пустой) базе, например на
+PostgreSQL после alembic upgrade head (.github/workflows/tests.yml).
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+_db_dir = tempfile.mkdtemp(prefix="soveshaika-tests-")
+os.environ["APP_ENV"] = "test"
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite+aiosqlite:///{_db_dir}/test.db"
+os.environ["QUERY_COUNT_ASSERT"] = "true"
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("LOG_FORMAT", "text")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    from app.models import engine, init_db
+
+    async def prepare():
+        await init_db(demo_data=True)
+        # Соединения пула привязаны к этому event loop - TestClient откроет свои
+        await engine.dispose()
+
+    asyncio.run(prepare())
+    return main.app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post("/api/users/login", json={"email": "alex@company.com", "password": "password123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['accessToken']}"}
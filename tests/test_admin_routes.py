@@ -0,0 +1,36 @@
+"""Изменение справочников и ролей пользователей - только с токеном администратора"""
+import pytest
+
+MUTATING_ROUTES = [
+    ("PUT", "/api/users/user_002/role", {"role": "admin"}),
+    ("POST", "/api/rooms/", {"name": "Новая", "capacity": 4}),
+    ("PUT", "/api/rooms/room_001", {"name": "Переименована"}),
+    ("PUT", "/api/rooms/room_001/price", {"price": 1}),
+    ("DELETE", "/api/rooms/room_001", None),
+    ("POST", "/api/roles/", {"name": "guest"}),
+    ("PUT", "/api/roles/1", {"name": "superuser"}),
+    ("DELETE", "/api/roles/1", None),
+]
+
+
+@pytest.fixture(scope="module")
+def user_headers(client):
+    response = client.post("/api/users/login", json={"email": "maria@company.com", "password": "password123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['accessToken']}"}
+
+
+@pytest.mark.parametrize("method, url, body", MUTATING_ROUTES)
+def test_anonymous_rejected(client, method, url, body):
+    assert client.request(method, url, json=body).status_code == 401
+
+
+@pytest.mark.parametrize("method, url, body", MUTATING_ROUTES)
+def test_non_admin_rejected(client, user_headers, method, url, body):
+    assert client.request(method, url, json=body, headers=user_headers).status_code == 403
+
+
+def test_admin_updates_role(client, admin_headers):
+    response = client.put("/api/users/user_002/role", json={"role": "manager"}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    client.put("/api/users/user_002/role", json={"role": "user"}, headers=admin_headers)
@@ -0,0 +1,19 @@
+"""Кэш закрытых месяцев аналитики: версии и срок жизни записи"""
+from app.utils.analytics_cache import AnalyticsCache
+
+
+def test_entry_valid_for_same_versions():
+    cache = AnalyticsCache(max_entries=10, ttl=60)
+    cache.put(("summary", 1), (1, 2), {"r1": (1, 60, 60, 100.0)})
+    assert cache.get(("summary", 1), (1, 2)) == {"r1": (1, 60, 60, 100.0)}
+    assert cache.get(("summary", 1), (1, 3)) is None
+
+
+def test_entry_expires_without_version_change(monkeypatch):
+    """Пропущенное сообщение шины: версии те же, но запись истекла"""
+    now = [1000.0]
+    monkeypatch.setattr("app.utils.analytics_cache.time.monotonic", lambda: now[0])
+    cache = AnalyticsCache(max_entries=10, ttl=30)
+    cache.put(("summary", 1), (1, 2), {})
+    now[0] += 31
+    assert cache.get(("summary", 1), (1, 2)) is None
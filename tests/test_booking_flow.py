@@ -0,0 +1,77 @@
+"""
+Сквозной сценарий бронирования через API: создание, отказ на пересечение,
+дневная сводка (upsert ON CONFLICT), отмена и tombstone в ленте изменений.
+В CI прогоняется и на SQLite, и на PostgreSQL (TEST_DATABASE_URL)
+"""
+from datetime import date, timedelta
+
+DAY = (date.today() + timedelta(days=40)).isoformat()
+
+
+def create(client, start: str, end: str):
+    return client.post("/api/bookings/", json={
+        "roomId": "room_004",
+        "userId": "user_001",
+        "date": DAY,
+        "startTime": start,
+        "endTime": end,
+        "title": "Тест",
+        "participants": ["maria@company.com"],
+    })
+
+
+def room_totals(client, admin_headers) -> dict:
+    response = client.get(
+        "/api/admin/analytics",
+        params={"from": DAY, "to": DAY, "groupBy": "total", "room_id": "room_004"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["totals"]
+
+
+def test_booking_lifecycle(client, admin_headers):
+    since = client.get("/api/bookings/changes").json()["nextCursor"]
+
+    created = create(client, "09:00", "10:00")
+    assert created.status_code == 200, created.text
+    booking = created.json()
+    assert (booking["startTime"], booking["endTime"]) == ("09:00", "10:00")
+
+    assert create(client, "09:30", "10:30").status_code == 400
+
+    totals = room_totals(client, admin_headers)
+    assert (totals["bookings"], totals["bookedMinutes"], totals["revenue"]) == (1, 60, 250.0)
+
+    assert client.delete(f"/api/bookings/{booking['id']}").status_code == 200
+    assert room_totals(client, admin_headers)["bookings"] == 0
+
+    changes = client.get("/api/bookings/changes", params={"since": since}).json()["changes"]
+    assert {"id": booking["id"], "deleted": True} in [
+        {"id": change["id"], "deleted": change["deleted"]} for change in changes
+    ]
+
+    # Отмененное бронирование слот не держит
+    recreated = create(client, "09:00", "10:00")
+    assert recreated.status_code == 200, recreated.text
+    assert client.delete(f"/api/bookings/{recreated.json()['id']}").status_code == 200
+
+
+def test_room_delete_reports_cascaded_bookings(client, admin_headers):
+    """Бронирования удаляются вместе с комнатой - лента изменений сообщает об этом"""
+    room = client.post("/api/rooms/", json={"name": "Временная", "capacity": 2, "amenities": "", "price": 100}, headers=admin_headers)
+    assert room.status_code == 200, room.text
+    room_id = room.json()["id"]
+    booking = client.post("/api/bookings/", json={
+        "roomId": room_id, "userId": "user_001", "date": DAY,
+        "startTime": "12:00", "endTime": "13:00", "title": "Тест",
+    })
+    assert booking.status_code == 200, booking.text
+    since = client.get("/api/bookings/changes").json()["nextCursor"]
+
+    assert client.delete(f"/api/rooms/{room_id}", headers=admin_headers).status_code == 200
+
+    changes = client.get("/api/bookings/changes", params={"since": since}).json()["changes"]
+    assert {"id": booking.json()["id"], "deleted": True} in [
+        {"id": change["id"], "deleted": change["deleted"]} for change in changes
+    ]
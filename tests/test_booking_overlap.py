@@ -0,0 +1,89 @@
+"""
+Пересекающиеся бронирования одного слота: при одновременных запросах
+выигрывает ровно один, в БД не остается пересекающихся строк - и через API
+(проверка в приложении + ограничение БД), и в обход проверки приложения
+"""
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import aliased
+
+from app.models import Booking, async_session
+from app.repositories.booking_repository import BookingRepository
+
+CONCURRENCY = 20
+
+
+async def overlapping_pairs() -> int:
+    other = aliased(Booking)
+    async with async_session() as session:
+        return await session.scalar(
+            select(func.count()).select_from(Booking).join(other, and_(
+                other.room_id == Booking.room_id,
+                other.date == Booking.date,
+                other.id > Booking.id,
+                other.start_minute < Booking.end_minute,
+                other.end_minute > Booking.start_minute,
+            )).where(Booking.deleted_at.is_(None), other.deleted_at.is_(None))
+        )
+
+
+async def live_bookings(room_id: str, booking_date: date) -> int:
+    async with async_session() as session:
+        return await session.scalar(
+            select(func.count()).select_from(Booking)
+            .where(Booking.room_id == room_id, Booking.date == booking_date, Booking.deleted_at.is_(None))
+        )
+
+
+def test_concurrent_posts_one_winner(client):
+    booking_date = date.today() + timedelta(days=60)
+
+    def post(n: int) -> int:
+        # Все интервалы пересекаются: начало 09:00-09:19, длительность час
+        start = 540 + n
+        return client.post("/api/bookings/", json={
+            "roomId": "room_003",
+            "userId": "user_001",
+            "date": booking_date.isoformat(),
+            "startTime": f"{start // 60:02d}:{start % 60:02d}",
+            "endTime": f"{(start + 60) // 60:02d}:{(start + 60) % 60:02d}",
+            "title": "overlap",
+        }).status_code
+
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        statuses = list(pool.map(post, range(CONCURRENCY)))
+
+    assert statuses.count(200) == 1
+    assert statuses.count(400) == CONCURRENCY - 1
+    assert client.portal.call(live_bookings, "room_003", booking_date) == 1
+    assert client.portal.call(overlapping_pairs) == 0
+
+
+def test_database_rejects_overlap_without_app_check(client):
+    """check_availability пропущен - пересечение отсекает только ограничение БД"""
+    booking_date = date.today() + timedelta(days=61)
+
+    async def insert_all():
+        async def insert(n: int) -> bool:
+            async with async_session() as session:
+                return await BookingRepository.add_booking(session, Booking(
+                    id=f"overlap_{uuid.uuid4().hex[:8]}",
+                    room_id="room_003",
+                    user_id="user_001",
+                    date=booking_date,
+                    start_minute=600 + n,
+                    end_minute=660 + n,
+                    title="overlap",
+                    participants="",
+                ))
+
+        return await asyncio.gather(*(insert(n) for n in range(CONCURRENCY)))
+
+    results = client.portal.call(insert_all)
+    assert results.count(True) == 1
+    assert client.portal.call(live_bookings, "room_003", booking_date) == 1
+    assert client.portal.call(overlapping_pairs) == 0
@@ -0,0 +1,59 @@
+"""ETag по версиям таблиц: 304, окно version_epoch и изменение во время запроса"""
+from app.api import http_cache
+from app.api.http_cache import fresh_cache_headers, versions_etag
+from app.utils import catalog_cache as catalog_module
+from app.utils import table_versions as versions_module
+from app.utils.table_versions import TableVersions, table_versions
+
+
+def test_repeat_request_not_modified(client, monkeypatch):
+    monkeypatch.setattr(http_cache, "version_epoch", lambda: 1)
+    first = client.get("/api/bookings/")
+    assert first.status_code == 200
+    second = client.get("/api/bookings/", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+
+
+def test_etag_expires_with_epoch(client, monkeypatch):
+    """Воркер, пропустивший сообщение шины, отдает 304 не дольше окна"""
+    etag = client.get("/api/bookings/").headers["ETag"]
+    epoch = versions_module.version_epoch()
+    monkeypatch.setattr(http_cache, "version_epoch", lambda: epoch + 1)
+    response = client.get("/api/bookings/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_change_during_request_drops_etag():
+    etag = versions_etag("bookings", "bookings:2030-01-01", "users")
+    table_versions.bump("bookings:2030-01-01")
+    headers = fresh_cache_headers("bookings", etag, "bookings:2030-01-01", "users")
+    assert "ETag" not in headers
+    assert headers["Cache-Control"]
+
+
+def test_workers_agree_before_first_change():
+    assert TableVersions(100).get("bookings") == TableVersions(100).get("bookings")
+
+
+def test_catalog_etag_expires_with_epoch(client, monkeypatch):
+    etag = client.get("/api/rooms/").headers["ETag"]
+    assert client.get("/api/rooms/", headers={"If-None-Match": etag}).status_code == 304
+    epoch = versions_module.version_epoch()
+    monkeypatch.setattr(catalog_module, "version_epoch", lambda: epoch + 1)
+    response = client.get("/api/rooms/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_catalog_etag_after_restart(client, monkeypatch):
+    """Перезапущенный воркер начинает с версии 0 - старый ETag не переживает окно"""
+    epoch = versions_module.version_epoch()
+    monkeypatch.setattr(catalog_module, "version_epoch", lambda: epoch)
+    monkeypatch.setattr(catalog_module, "table_versions", TableVersions(100))
+    etag = client.get("/api/rooms/").headers["ETag"]
+    assert etag == f'W/"rooms-{epoch}-0"'
+
+    monkeypatch.setattr(catalog_module, "version_epoch", lambda: epoch + 1)
+    monkeypatch.setattr(catalog_module, "table_versions", TableVersions(100))
+    assert client.get("/api/rooms/", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,70 @@
+"""Проверки данных в миграциях: понятная ошибка до изменения схемы"""
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+VERSIONS = Path(__file__).parent.parent / "alembic" / "versions"
+
+
+def load_migration(name: str):
+    spec = importlib.util.spec_from_file_location(name, VERSIONS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_in_migration(tmp_path, statements, function):
+    engine = create_engine(f"sqlite:///{tmp_path}/migration.db")
+    try:
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+            with Operations.context(MigrationContext.configure(conn)):
+                return function()
+    finally:
+        engine.dispose()
+
+
+def test_existing_overlaps_listed(tmp_path):
+    migration = load_migration("e8b4d21f6a93_booking_no_overlap")
+    overlaps = run_in_migration(tmp_path, [
+        "CREATE TABLE bookings (id VARCHAR PRIMARY KEY, room_id VARCHAR, date VARCHAR,"
+        " start_minute INTEGER, end_minute INTEGER)",
+        "INSERT INTO bookings VALUES ('b1', 'room_1', '2025-12-16', 810, 900),"
+        " ('b2', 'room_1', '2025-12-16', 840, 960), ('b3', 'room_1', '2025-12-16', 960, 1020),"
+        " ('b4', 'room_2', '2025-12-16', 810, 960)",
+    ], migration.existing_overlaps)
+    assert overlaps == ["room_1 2025-12-16: b1 / b2"]
+
+
+def test_postgres_refuses_overlaps_before_constraint(monkeypatch):
+    migration = load_migration("e8b4d21f6a93_booking_no_overlap")
+    executed = []
+    context = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+    monkeypatch.setattr(migration, "op", SimpleNamespace(get_context=lambda: context, execute=executed.append))
+    monkeypatch.setattr(migration, "existing_overlaps", lambda: ["room_1 2025-12-16: b1 / b2"])
+    with pytest.raises(RuntimeError, match="room_1 2025-12-16: b1 / b2"):
+        migration.upgrade()
+    assert executed == []
+
+
+@pytest.mark.parametrize("start, end", [("", "10:00"), ("9:00", None), ("9:75", "10:00"), ("nine", "10:00")])
+def test_booking_minutes_names_bad_times(tmp_path, start, end):
+    migration = load_migration("a7c41e0b9d26_booking_minutes")
+    with pytest.raises(RuntimeError, match=r"b2 \("):
+        run_in_migration(tmp_path, [
+            "CREATE TABLE bookings (id VARCHAR PRIMARY KEY, start_time VARCHAR, end_time VARCHAR)",
+            "INSERT INTO bookings VALUES ('b1', '9:00', '10:00')",
+            f"INSERT INTO bookings VALUES ('b2', {start!r}, {'NULL' if end is None else repr(end)})",
+        ], migration.upgrade)
+
+
+def test_booking_minutes_accepts_legacy_formats():
+    migration = load_migration("a7c41e0b9d26_booking_minutes")
+    assert [migration._to_minutes(value) for value in ("09:30", "9:30", " 9 ", "24:00")] == [570, 570, 540, 1440]
@@ -0,0 +1,22 @@
+"""Один разбор CSV участников для ответа API и для booking_participants"""
+import pytest
+
+from app.models import Booking
+from app.models.rows import participant_emails, split_participants
+
+CASES = ["", "alex@company.com", "a@x.com,b@x.com", "a@x.com, B@x.com", "a@x.com,\tb@x.com\n", "a@x.com,,a@x.com"]
+
+
+@pytest.mark.parametrize("participants", CASES)
+def test_legacy_participants_field(participants):
+    # Формат ответа до появления booking_participants
+    legacy = [p.strip() for p in participants.split(",")] if participants else []
+    assert split_participants(participants) == legacy
+    booking = Booking(participants=participants, start_minute=540, end_minute=600)
+    assert booking.to_dict()["participants"] == legacy
+
+
+@pytest.mark.parametrize("participants", CASES)
+def test_emails_follow_split(participants):
+    emails = participant_emails(participants)
+    assert emails == list(dict.fromkeys(p.lower() for p in split_participants(participants) if p))
@@ -0,0 +1,18 @@
+"""
+Списочные эндпоинты укладываются в бюджет SQL-запросов из QUERY_BUDGETS.
+Middleware бросает AssertionError при превышении - TestClient пробрасывает его
+"""
+import pytest
+
+from app.utils.query_counter import QUERY_BUDGETS, QUERY_COUNT_ASSERT
+
+
+def test_query_count_assert_enabled():
+    assert QUERY_COUNT_ASSERT
+
+
+@pytest.mark.parametrize(("method", "path"), sorted(QUERY_BUDGETS))
+def test_endpoint_within_query_budget(client, admin_headers, method, path):
+    response = client.request(method, path, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert int(response.headers["X-Query-Count"]) <= QUERY_BUDGETS[(method, path)]
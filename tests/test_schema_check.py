@@ -0,0 +1,37 @@
+"""Проверка схемы при старте: понятная ошибка вместо "no such table" на первом запросе"""
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.models import check_schema
+from app.models.models import schema_problems
+
+
+def test_migrated_schema_passes(client):
+    client.portal.call(check_schema)
+
+
+def test_empty_database_lists_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/empty.db")
+    with engine.connect() as conn:
+        problems = schema_problems(conn)
+    engine.dispose()
+    assert "no table bookings" in problems
+    assert "no table users" in problems
+
+
+def test_unmigrated_table_lists_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE bookings (id VARCHAR PRIMARY KEY, start_time VARCHAR, end_time VARCHAR)"))
+        problems = schema_problems(conn)
+    engine.dispose()
+    bookings = next(problem for problem in problems if problem.startswith("no columns bookings."))
+    assert "start_minute" in bookings and "end_minute" in bookings
+
+
+def test_check_schema_names_commands(client, monkeypatch):
+    from app.models import models
+
+    monkeypatch.setattr(models, "schema_problems", lambda conn: ["no table bookings"])
+    with pytest.raises(RuntimeError, match=r"python -m app.cli init-db.*alembic upgrade head"):
+        client.portal.call(check_schema)